@@ -0,0 +1,72 @@
+"""Time-to-first-response regression benchmark for the MCP server.
+
+Starts server.py in a subprocess, polls it over SSE until a call to
+arango_startup_report succeeds and fails if the median exceeds the budget.
+The database does not need to be reachable since connections are lazy:
+
+    python benchmarks/cold_start_benchmark.py --runs 5 --budget 2.5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from fastmcp import Client
+from fastmcp.client.transports import SSETransport
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def first_response(port: int, deadline: float):
+    while time.perf_counter() < deadline:
+        try:
+            async with Client(SSETransport(f"http://127.0.0.1:{port}/sse")) as client:
+                result = await client.call_tool("arango_startup_report", {})
+                return result
+        except Exception:
+            await asyncio.sleep(0.02)
+    raise TimeoutError("server did not answer in time")
+
+
+def run_once(groups: str, timeout: float):
+    port = free_port()
+    env = dict(os.environ, MCP_PORT=str(port), MCP_TOOL_GROUPS=groups,
+               ARANGO_URL=os.environ.get("ARANGO_URL", "http://127.0.0.1:9"))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        report = asyncio.run(first_response(port, start + timeout))
+        return time.perf_counter() - start, report
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.5, help="seconds allowed for the median run")
+    parser.add_argument("--groups", default="all", help="value for MCP_TOOL_GROUPS")
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    durations = []
+    for i in range(args.runs):
+        seconds, report = run_once(args.groups, args.timeout)
+        durations.append(seconds)
+        print(f"run {i + 1}: {seconds * 1000:.0f} ms to first response")
+    print(f"last startup report: {report[0].text}")
+
+    median = statistics.median(durations)
+    print(f"median {median * 1000:.0f} ms, budget {args.budget * 1000:.0f} ms")
+    sys.exit(0 if median <= args.budget else 1)
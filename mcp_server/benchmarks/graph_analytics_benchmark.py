@@ -0,0 +1,81 @@
+"""Runtime benchmark for the in-process graph analytics.
+
+By default synthetic scale-free graphs are streamed as batches of [_from, _to]
+document id strings, the way the edge export yields them, through
+Graph.from_batches, so the id factorization is measured along with the
+algorithms; no ArangoDB needed:
+
+    python benchmarks/graph_analytics_benchmark.py --edges 1000000 10000000
+
+With --collection the graph is exported from an existing edge collection with
+load_graph instead (set ARANGO_URL and friends as for the server):
+
+    python benchmarks/graph_analytics_benchmark.py --collection knows
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from tools.graph_analytics import (
+    Graph, GRAPH_EXPORT_BATCH_SIZE, load_graph, pagerank, weakly_connected_components, degrees,
+    approximate_betweenness, label_propagation
+)
+
+
+def id_pairs(edges: int, avg_degree: int, rng):
+    """Batches of id pairs of a random graph whose targets follow a power law, like citation or link graphs."""
+    n = max(2, edges // avg_degree)
+    for start in range(0, edges, GRAPH_EXPORT_BATCH_SIZE):
+        size = min(GRAPH_EXPORT_BATCH_SIZE, edges - start)
+        src = rng.integers(0, n, size=size)
+        dst = np.minimum((rng.pareto(1.5, size=size) * n / 100).astype(np.int64), n - 1)
+        yield [[f"v/{s}", f"v/{d}"] for s, d in zip(src.tolist(), dst.tolist())]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def timed(name: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"  {name:<18} {time.perf_counter() - start:8.2f}s")
+    return result
+
+
+def run(graph: Graph, build_seconds: float, samples: int):
+    print(f"edges={graph.edge_count:>10} vertices={graph.vertex_count:>9} build={build_seconds:.2f}s "
+          f"peak_rss={peak_rss_mb():.0f}MB")
+    timed("pagerank", pagerank, graph)
+    timed("components", weakly_connected_components, graph)
+    timed("degree", degrees, graph)
+    timed(f"betweenness(k={samples})", approximate_betweenness, graph, samples=samples)
+    timed("label_propagation", label_propagation, graph)
+    print(f"  peak_rss={peak_rss_mb():.0f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--avg-degree", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=32)
+    parser.add_argument("--collection", help="Export this edge collection from ArangoDB instead")
+    args = parser.parse_args()
+
+    if args.collection:
+        start = time.perf_counter()
+        graph = load_graph(args.collection)
+        run(graph, time.perf_counter() - start, args.samples)
+    else:
+        # Peak RSS only grows, so run the sizes in increasing order
+        for size in sorted(args.edges):
+            start = time.perf_counter()
+            graph = Graph.from_batches(id_pairs(size, args.avg_degree, np.random.default_rng(42)))
+            run(graph, time.perf_counter() - start, args.samples)
+            del graph
@@ -0,0 +1,93 @@
+"""Encode time and bytes-on-wire for tool responses.
+
+Compares the default FastMCP path (pretty-printed pydantic JSON) with the
+compact orjson serializer and the negotiated binary encodings, and the old
+decode/re-encode image path with the base64 passthrough. No ArangoDB needed:
+
+    python benchmarks/serialization_benchmark.py --docs 10000 --image-mb 5
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+import pydantic_core
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from tools.serialization import dumps, encode_response, msgpack
+
+
+def make_documents(n: int):
+    return [{
+        "_key": str(i),
+        "_id": f"entities/{i}",
+        "_rev": uuid.uuid4().hex[:12],
+        "name": f"entity {i}",
+        "description": "lorem ipsum dolor sit amet " * 8,
+        "tags": ["alpha", "beta", "gamma"],
+        "score": i / 7,
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+        "valid_from": "2025-01-01T00:00:00",
+        "valid_until": None,
+    } for i in range(n)]
+
+
+def timed(fn, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def wire_size(result) -> int:
+    """Bytes of the JSON-RPC payload carrying the result."""
+    if isinstance(result, str):
+        return len(json.dumps(result))
+    return len(result.model_dump_json())
+
+
+def report(label: str, seconds: float, size: int):
+    print(f"  {label:<34} {seconds * 1000:9.2f} ms {size / 1024:12.1f} KiB")
+
+
+def run_documents(n: int):
+    docs = make_documents(n)
+    print(f"{n} documents")
+    cases = [
+        ("fastmcp default (pydantic, indent)", lambda: pydantic_core.to_json(docs, fallback=str, indent=2).decode()),
+        ("orjson compact", lambda: dumps(docs)),
+        ("json+gzip", lambda: encode_response(docs, "json+gzip")),
+    ]
+    if msgpack is not None:
+        cases += [
+            ("msgpack", lambda: encode_response(docs, "msgpack")),
+            ("msgpack+gzip", lambda: encode_response(docs, "msgpack+gzip")),
+        ]
+    for label, fn in cases:
+        seconds, result = timed(fn)
+        report(label, seconds, wire_size(result))
+
+
+def run_image(megabytes: float):
+    raw = os.urandom(int(megabytes * 1024 * 1024))
+    stored = base64.b64encode(raw).decode("ascii")
+    print(f"{megabytes} MB image")
+    seconds, result = timed(lambda: base64.b64encode(base64.b64decode(stored)).decode("ascii"))
+    report("decode + re-encode (old path)", seconds, len(result))
+    seconds, result = timed(lambda: stored)
+    report("stored base64 passthrough", seconds, len(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--image-mb", type=float, default=5)
+    args = parser.parse_args()
+
+    run_documents(args.docs)
+    run_image(args.image_mb)
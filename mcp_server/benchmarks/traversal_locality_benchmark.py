@@ -0,0 +1,136 @@
+"""Traversal latency benchmark for co-sharded versus default collection layouts.
+
+Needs an ArangoDB cluster, e.g. the one from docker-compose.cluster.yml. Loads
+the same community-structured graph twice, once sharded by _key and once
+co-sharded by community with arango_co_shard_collections, then times
+traversals from the same start vertices in both. In the Community Edition
+the coordinator drives every traversal step, so expect co-sharding to change
+little; the benchmark is there to measure that rather than assume it:
+
+    ARANGO_URL=http://localhost:8529 python benchmarks/traversal_locality_benchmark.py --shards 6 --depth 3
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from tools.db_connection import db
+from tools.basic_operations import arango_create_collection
+from tools.cluster_layout import arango_co_shard_collections
+
+BATCH_SIZE = 10_000
+
+
+def make_graph(vertices: int, communities: int, degree: int, locality: float, rng):
+    """Edges mostly stay within a community, like tenants or regions."""
+    community = rng.integers(0, communities, size=vertices)
+    members = [np.flatnonzero(community == c) for c in range(communities)]
+    src = np.repeat(np.arange(vertices), degree)
+    dst = rng.integers(0, vertices, size=len(src))
+    local = rng.random(len(src)) < locality
+    for i in np.flatnonzero(local):
+        group = members[community[src[i]]]
+        dst[i] = group[rng.integers(0, len(group))]
+    return community, src, dst
+
+
+def load(vertex_collection: str, edge_collection: str, community, src, dst) -> np.ndarray:
+    """Load the graph and return the _id the server assigned to each vertex.
+
+    A collection sharded by an attribute other than _key rejects documents
+    with a user-defined _key (error 1466), so the server generates the keys
+    and edges are mapped through the returned ids.
+    """
+    ids = []
+    for start in range(0, len(community), BATCH_SIZE):
+        vertices = [{"community": int(c)} for c in community[start:start + BATCH_SIZE]]
+        for result in db.collection(vertex_collection).insert_many(vertices):
+            if isinstance(result, Exception):
+                raise result
+            ids.append(result["_id"])
+    ids = np.array(ids, dtype=object)
+    for start in range(0, len(src), BATCH_SIZE):
+        edges = [
+            # Co-sharded edges carry the community of their _from vertex
+            {"_from": ids[s], "_to": ids[d], "community": int(community[s])}
+            for s, d in zip(src[start:start + BATCH_SIZE], dst[start:start + BATCH_SIZE])
+        ]
+        db.collection(edge_collection).import_bulk(edges, halt_on_error=True)
+    return ids
+
+
+def time_traversals(edge_collection: str, starts, depth: int) -> np.ndarray:
+    query = "FOR v IN 1..@depth OUTBOUND @start @@edges OPTIONS {uniqueVertices: 'global', order: 'bfs'} RETURN v._key"
+    latencies = []
+    for start in starts:
+        bind_vars = {"depth": depth, "start": start, "@edges": edge_collection}
+        begin = time.perf_counter()
+        sum(1 for _ in db.aql.execute(query, bind_vars=bind_vars, batch_size=10_000))
+        latencies.append(time.perf_counter() - begin)
+    return np.array(latencies) * 1000
+
+
+def report(name: str, latencies_ms: np.ndarray):
+    print(f"{name:<12} p50={np.percentile(latencies_ms, 50):8.2f}ms p95={np.percentile(latencies_ms, 95):8.2f}ms "
+          f"mean={latencies_ms.mean():8.2f}ms")
+
+
+def drop(*collections):
+    for name in collections:
+        if db.has_collection(name):
+            db.delete_collection(name)
+
+
+def run(args):
+    role = db.role()
+    if role != "COORDINATOR":
+        print(f"warning: server role is {role}, shard options are ignored outside a cluster")
+
+    rng = np.random.default_rng(42)
+    community, src, dst = make_graph(args.vertices, args.communities, args.degree, args.locality, rng)
+    starts = rng.choice(args.vertices, size=args.traversals, replace=False)
+
+    layouts = {
+        "default": ("bench_default_vertices", "bench_default_edges"),
+        "co-sharded": ("bench_local_vertices", "bench_local_edges"),
+    }
+    for vertex_collection, edge_collection in layouts.values():
+        drop(edge_collection, vertex_collection)
+    arango_create_collection(layouts["default"][0], shard_count=args.shards)
+    arango_create_collection(layouts["default"][1], "edge", shard_count=args.shards)
+    arango_co_shard_collections(layouts["co-sharded"][0], [layouts["co-sharded"][1]], "community",
+                                shard_count=args.shards)
+
+    try:
+        ids = {}
+        for name, (vertex_collection, edge_collection) in layouts.items():
+            start = time.perf_counter()
+            ids[name] = load(vertex_collection, edge_collection, community, src, dst)
+            print(f"loaded {vertex_collection}/{edge_collection} in {time.perf_counter() - start:.1f}s")
+
+        print(f"vertices={args.vertices} edges={len(src)} shards={args.shards} depth={args.depth} "
+              f"locality={args.locality}")
+        for name, (_, edge_collection) in layouts.items():
+            # Warm up caches so both layouts are measured hot
+            time_traversals(edge_collection, ids[name][starts[:10]], args.depth)
+            report(name, time_traversals(edge_collection, ids[name][starts], args.depth))
+    finally:
+        if not args.keep:
+            for vertex_collection, edge_collection in layouts.values():
+                drop(edge_collection, vertex_collection)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=100_000)
+    parser.add_argument("--communities", type=int, default=64)
+    parser.add_argument("--degree", type=int, default=5)
+    parser.add_argument("--locality", type=float, default=0.95,
+                        help="Fraction of edges whose target is in the source's community")
+    parser.add_argument("--shards", type=int, default=6)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--traversals", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections")
+    run(parser.parse_args())
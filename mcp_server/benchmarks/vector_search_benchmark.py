@@ -0,0 +1,69 @@
+"""Recall/latency benchmark for the in-process vector index.
+
+Runs entirely in memory on synthetic clustered embeddings, no ArangoDB needed:
+
+    python benchmarks/vector_search_benchmark.py --sizes 100000 1000000 --dim 384
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from tools import vector_operations
+from tools.vector_operations import VectorIndex
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def run(n: int, dim: int, queries: int, top_k: int):
+    rng = np.random.default_rng(42)
+    vectors = make_vectors(n, dim, clusters=max(16, n // 1000), rng=rng)
+    keys = [str(i) for i in range(n)]
+
+    index = VectorIndex()
+    start = time.perf_counter()
+    index.add_many(keys, vectors)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.build()
+    build_s = time.perf_counter() - start
+
+    query_vectors = vectors[rng.choice(n, size=queries, replace=False)]
+    query_vectors += 0.1 * rng.normal(size=query_vectors.shape).astype(np.float32)
+
+    latencies, recalls = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        hits = index.search(query, top_k)
+        latencies.append(time.perf_counter() - start)
+
+        scores = index.vectors @ (query / np.linalg.norm(query))
+        exact = {index.keys[i] for i in np.argpartition(-scores, top_k - 1)[:top_k]}
+        recalls.append(len(exact & {hit["key"] for hit in hits}) / top_k)
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"n={n:>9} dim={dim} type={'ivf' if index.centroids is not None else 'brute_force':<11} "
+          f"load={load_s:6.2f}s build={build_s:6.2f}s "
+          f"p50={np.percentile(latencies_ms, 50):7.2f}ms p99={np.percentile(latencies_ms, 99):7.2f}ms "
+          f"recall@{top_k}={np.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=vector_operations.IVF_NPROBE)
+    args = parser.parse_args()
+
+    vector_operations.IVF_NPROBE = args.nprobe
+    for size in args.sizes:
+        run(size, args.dim, args.queries, args.top_k)
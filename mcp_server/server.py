@@ -1,47 +1,53 @@
+import time
+_started_at = time.perf_counter()
+
 from fastmcp import FastMCP
-from typing import Dict, Any, List, Optional
 import os
 import dotenv
-import datetime
 import tools as arango_tools
-from tools.db_connection import db, mcp as base_mcp
+from tools import startup, profiling, admission
+from tools.serialization import dumps
 
 dotenv.load_dotenv()
 
-mcp = FastMCP(name="arango-knowledge-base", port=22000, host="0.0.0.0")
-
-mcp.add_tool(arango_tools.add_temporal_metadata)
-mcp.add_tool(arango_tools.arango_query)
-mcp.add_tool(arango_tools.arango_insert)
-mcp.add_tool(arango_tools.arango_update)
-mcp.add_tool(arango_tools.arango_remove)
-mcp.add_tool(arango_tools.arango_get_document)
-mcp.add_tool(arango_tools.arango_truncate_collection)
-mcp.add_tool(arango_tools.arango_list_collections)
-mcp.add_tool(arango_tools.arango_create_collection)
-mcp.add_tool(arango_tools.arango_create_edge)
-mcp.add_tool(arango_tools.arango_create_sequential_relationship)
-mcp.add_tool(arango_tools.arango_query_edges)
-mcp.add_tool(arango_tools.arango_traverse_graph)
-mcp.add_tool(arango_tools.arango_temporal_traverse)
-mcp.add_tool(arango_tools.arango_time_series_analysis)
-mcp.add_tool(arango_tools.arango_query_by_time_range)
-mcp.add_tool(arango_tools.arango_query_valid_at)
-mcp.add_tool(arango_tools.arango_set_validity_period)
-mcp.add_tool(arango_tools.arango_create_index)
-mcp.add_tool(arango_tools.arango_list_indexes)
-mcp.add_tool(arango_tools.arango_create_temporal_indexes)
-mcp.add_tool(arango_tools.arango_backup)
-mcp.add_tool(arango_tools.arango_get_metadata)
-
-# Image/Asset management tools
-# Setting FASTMCP_ALLOW_ARBITRARY_TYPES=1 environment variable will be needed
-mcp.add_tool(arango_tools.arango_upload_image)
-mcp.add_tool(arango_tools.arango_get_image)
-mcp.add_tool(arango_tools.arango_list_images)
-mcp.add_tool(arango_tools.arango_delete_image)
-mcp.add_tool(arango_tools.arango_update_image_metadata)
+startup.started_at = _started_at
+startup.timings["core_imports"] = time.perf_counter() - _started_at
+
+# Comma-separated tool groups to serve (see tools.TOOL_GROUPS), default all
+MCP_TOOL_GROUPS = os.environ.get("MCP_TOOL_GROUPS", "all")
+MCP_PORT = int(os.environ.get("MCP_PORT", "22000"))
+
+mcp = FastMCP(name="arango-knowledge-base", port=MCP_PORT, host="0.0.0.0", tool_serializer=dumps)
+
+enabled_groups = list(arango_tools.TOOL_GROUPS) if MCP_TOOL_GROUPS == "all" else [
+    group.strip() for group in MCP_TOOL_GROUPS.split(",")
+]
+if "startup" not in enabled_groups:
+    enabled_groups.append("startup")
+
+for group in enabled_groups:
+    if group not in arango_tools.TOOL_GROUPS:
+        raise ValueError(f"Unknown tool group '{group}', expected one of {', '.join(arango_tools.TOOL_GROUPS)}")
+    module, names = arango_tools.TOOL_GROUPS[group]
+    with startup.timed(f"import:{group}"):
+        functions = [getattr(arango_tools, name) for name in names]
+    with startup.timed(f"register:{group}"):
+        for function in functions:
+            mcp.add_tool(admission.in_worker_thread(profiling.profiled(function)))
+
+if "retention" in enabled_groups:
+    from tools import retention
+    retention.start_scheduler()
+
+if "vector" in enabled_groups:
+    from tools import vector_operations
+    vector_operations.preload()
+
+startup.mark_ready()
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(mcp.run(transport='sse', host="0.0.0.0"))
\ No newline at end of file
+    report = startup.arango_startup_report()
+    print(f"Startup took {report['total_ms']} ms: " +
+          ", ".join(f"{phase}={ms}ms" for phase, ms in report["phases_ms"].items()))
+    asyncio.run(mcp.run(transport='sse', host="0.0.0.0"))
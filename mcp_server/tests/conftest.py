@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tools package is imported the way server.py imports it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
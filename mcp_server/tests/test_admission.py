@@ -0,0 +1,66 @@
+from collections import defaultdict
+import pytest
+from tools import admission, basic_operations
+from tools.admission import QueryRejectedError
+
+
+class FakeCursor:
+    id = None
+
+    def __init__(self, docs):
+        self.docs = iter(docs)
+
+    def __next__(self):
+        return next(self.docs)
+
+    def has_more(self):
+        return False
+
+    def statistics(self):
+        return {}
+
+
+@pytest.fixture
+def aql(monkeypatch):
+    executed = []
+
+    class Aql:
+        def execute(self, query, bind_vars=None, **limits):
+            executed.append((query, bind_vars, limits))
+            return FakeCursor([{"_key": "a"}])
+
+    monkeypatch.setattr(admission, "db", type("Db", (), {"aql": Aql()})())
+    monkeypatch.setattr(admission, "MAX_CONCURRENT_QUERIES", 1)
+    monkeypatch.setattr(admission, "QUERY_QUEUE_TIMEOUT", 0.05)
+    monkeypatch.setattr(admission, "QUERY_MAX_RUNTIME", 0)
+    for name, table in (("_slots", {}), ("_in_flight", defaultdict(int)), ("_waiting", defaultdict(int)),
+                        ("_last_seen", {})):
+        monkeypatch.setattr(admission, name, table)
+    return executed
+
+
+def test_traversals_deeper_than_the_limit_are_rejected(monkeypatch):
+    monkeypatch.setattr(admission, "MAX_TRAVERSAL_DEPTH", 3)
+    assert admission.check_depth(3) == 3
+    with pytest.raises(QueryRejectedError):
+        admission.check_depth(4)
+
+
+def test_a_client_over_its_concurrency_quota_is_rejected_until_a_cursor_is_read(aql):
+    first = admission.execute("RETURN 1", tool="arango_query")
+    with pytest.raises(QueryRejectedError):
+        admission.execute("RETURN 2", tool="arango_query")
+    assert list(first) == [{"_key": "a"}]
+    assert list(admission.execute("RETURN 3", tool="arango_query")) == [{"_key": "a"}]
+    assert admission._stats.counters["rejected"] >= 1
+
+
+def test_tool_limits_are_passed_to_the_query(aql, monkeypatch):
+    monkeypatch.setattr(admission, "TOOL_QUERY_LIMITS", {"arango_query": {"memory_limit": 1024}})
+    list(admission.execute("RETURN 1", tool="arango_query", stream=True))
+    assert aql[0][2] == {"max_runtime": 0, "memory_limit": 1024, "fail_on_warning": False, "stream": True}
+
+
+def test_projected_document_reads_go_through_admission(aql):
+    assert basic_operations.arango_get_document("c", "a", fields=["name"]) == {"_key": "a"}
+    assert "KEEP(doc, @keep_fields)" in aql[0][0]
@@ -0,0 +1,61 @@
+import base64
+import pytest
+from tools import asset_operations
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 40
+
+
+class FakeDb:
+    def collections(self):
+        return [{"name": asset_operations.ASSETS_COLLECTION}]
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    documents = []
+
+    def insert(collection, document):
+        documents.append(document)
+        return {"_key": "k", "_id": f"{collection}/k"}
+
+    monkeypatch.setattr(asset_operations, "db", FakeDb())
+    monkeypatch.setattr(asset_operations, "versioned_insert", insert)
+    return documents
+
+
+def test_upload_strips_a_data_uri_and_detects_the_format(stored):
+    encoded = base64.b64encode(PNG).decode()
+    result = asset_operations.arango_upload_image(image_base64=f"data:image/png;base64,{encoded}", format="jpeg")
+    assert stored[0]["image_data"] == encoded
+    assert result["mime_type"] == "image/png" and result["size_bytes"] == len(PNG)
+
+
+def test_upload_rejects_invalid_base64_and_non_images(stored):
+    with pytest.raises(ValueError, match="base64"):
+        asset_operations.arango_upload_image(image_base64="not base64!")
+    with pytest.raises(ValueError, match="not a PNG"):
+        asset_operations.arango_upload_image(image_base64=base64.b64encode(b"<html></html>").decode())
+    with pytest.raises(ValueError, match="not a PNG"):
+        asset_operations.arango_upload_image(image_data=b"plain text")
+    assert not stored
+
+
+def test_upload_of_raw_bytes(stored):
+    jpeg = b"\xff\xd8\xff\xe0" + b"\x00" * 20
+    result = asset_operations.arango_upload_image(image_data=jpeg)
+    assert base64.b64decode(stored[0]["image_data"]) == jpeg and result["mime_type"] == "image/jpeg"
+
+
+def test_list_images_projects_metadata_within_the_budget(stored, monkeypatch):
+    executed = []
+
+    def execute(query, bind_vars, **kwargs):
+        executed.append((query, bind_vars))
+        return iter([{"_key": str(i), "description": "x" * 200} for i in range(20)])
+
+    monkeypatch.setattr(asset_operations.admission, "execute", execute)
+    results = asset_operations.arango_list_images(tag="cats'", max_response_bytes=1000)
+    query, bind_vars = executed[0]
+    assert "image_data" not in bind_vars["keep_fields"] and "KEEP(doc, @keep_fields)" in query
+    assert bind_vars["tag"] == "cats'" and "cats" not in query
+    assert results[-1]["_truncated"]
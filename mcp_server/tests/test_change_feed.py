@@ -0,0 +1,75 @@
+import pytest
+from tools import change_feed
+from tools.change_feed import ChangeFeed
+
+
+def event(tick, collection="c", key=None, op="upsert"):
+    return {"tick": str(tick), "op": op, "collection": collection, "key": key or f"k{tick}"}
+
+
+@pytest.fixture
+def running(monkeypatch):
+    feed = ChangeFeed(buffer_size=5)
+    feed.start_tick, feed.last_tick = "100", "100"
+    feed._thread = object()
+    feed._started.set()
+    monkeypatch.setattr(change_feed, "feed", feed)
+    return feed
+
+
+def buffer(feed, *events):
+    for e in events:
+        if len(feed.events) == feed.events.maxlen:
+            feed.evicted_tick = feed.events[0]["tick"]
+        feed.events.append(e)
+        feed.last_tick = e["tick"]
+
+
+def test_pages_resume_from_next_tick(running):
+    buffer(running, event(101), event(102, "other"), event(103), event(104))
+    first = change_feed.arango_subscribe_changes(["c"], since_tick="100", limit=2)
+    assert [e["tick"] for e in first["events"]] == ["101", "103"] and first["next_tick"] == "103"
+    second = change_feed.arango_subscribe_changes(["c"], since_tick=first["next_tick"], limit=2)
+    assert [e["tick"] for e in second["events"]] == ["104"] and second["next_tick"] == "104"
+    assert change_feed.arango_subscribe_changes(["c"], since_tick="104")["events"] == []
+
+
+def test_ticks_compare_numerically(running):
+    buffer(running, event(999), event(1000))
+    page = change_feed.arango_subscribe_changes(since_tick="999")
+    assert [e["tick"] for e in page["events"]] == ["1000"]
+
+
+def test_subscribing_returns_the_current_position(running):
+    buffer(running, event(101))
+    assert change_feed.arango_subscribe_changes() == {"events": [], "next_tick": "101", "resync_required": False}
+
+
+def test_ticks_older_than_the_buffer_are_read_from_the_wal(running, monkeypatch):
+    buffer(running, *(event(t) for t in range(101, 108)))
+    assert running.since("101", None, 10) is None
+    fetched = []
+
+    def fetch(lower, last_scanned=None):
+        fetched.append(lower)
+        return {"from_present": True, "last_included": "103",
+                "changes": [(event(102), None), (event(103, "other"), None)]}
+
+    monkeypatch.setattr(running, "fetch", fetch)
+    page = change_feed.arango_subscribe_changes(["c"], since_tick="101")
+    assert fetched == ["101"] and [e["tick"] for e in page["events"]] == ["102"] and page["next_tick"] == "103"
+
+
+def test_resync_is_required_once_the_wal_is_gone(running, monkeypatch):
+    monkeypatch.setattr(running, "fetch", lambda lower, last_scanned=None: {"from_present": False, "changes": []})
+    page = change_feed.arango_subscribe_changes(since_tick="50")
+    assert page["resync_required"] and page["next_tick"] == "100"
+
+
+def test_wal_entries_become_events(running):
+    running._collections = {"7": "c", "8": "_system_collection"}
+    upsert = running._to_event({"type": 2300, "tick": "5", "cid": 7, "data": {"_key": "a", "_rev": "r"}})
+    assert upsert == {"tick": "5", "op": "upsert", "collection": "c", "key": "a", "rev": "r"}
+    assert running._to_event({"type": 2004, "tick": "6", "cid": 7})["op"] == "truncate"
+    assert running._to_event({"type": 2300, "tick": "7", "cid": 8, "data": {}}) is None
+    assert running._to_event({"type": 2200, "tick": "8"}) is None
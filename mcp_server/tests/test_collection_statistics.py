@@ -0,0 +1,80 @@
+from collections import Counter
+import random
+from tools import collection_statistics
+from tools.collection_statistics import HyperLogLog, TopK, CollectionProfile, _sample
+
+
+def test_hyperloglog_small_cardinalities_are_near_exact():
+    hll = HyperLogLog()
+    for i in range(100):
+        hll.add(i)
+        hll.add(i)
+    assert abs(hll.estimate() - 100) <= 2
+
+
+def test_hyperloglog_large_cardinality_error():
+    hll = HyperLogLog()
+    for i in range(200_000):
+        hll.add(f"value-{i}")
+    assert abs(hll.estimate() - 200_000) / 200_000 < 0.05
+
+
+def test_hyperloglog_distinguishes_types():
+    hll = HyperLogLog()
+    for value in (1, "1", True, [1], {"a": 1}):
+        hll.add(value)
+    assert hll.estimate() == 5
+
+
+def test_topk_finds_heavy_hitters_in_a_skewed_stream():
+    rng = random.Random(0)
+    stream = [("string", "hot")] * 500 + [("number", 7)] * 300 + [("string", f"cold{rng.random()}") for _ in range(2000)]
+    rng.shuffle(stream)
+    top = TopK(capacity=20)
+    for value in stream:
+        top.add(value)
+    best = top.top(2)
+    assert [entry["value"] for entry in best] == ["hot", 7]
+    # Space-saving counts are upper bounds
+    assert best[0]["count"] >= 500 and best[1]["count"] >= 300
+
+
+def test_topk_is_exact_below_capacity():
+    top = TopK(capacity=10)
+    for value in "aabbbc":
+        top.add(("string", value))
+    assert top.top(3) == [{"value": "b", "count": 3}, {"value": "a", "count": 2}, {"value": "c", "count": 1}]
+
+
+def test_profile_replaces_updated_documents_instead_of_counting_them_twice():
+    profile = CollectionProfile("c", sample_size=10)
+    for i in range(4):
+        profile.add({"_key": str(i), "status": "new"})
+    profile.add({"_key": "0", "status": "done"})
+    profile.remove("1")
+    result = profile.to_dict(top_k=5)
+    assert result["sampled_documents"] == 3
+    assert result["fields"]["status"]["top_values"] == [{"value": "new", "count": 2}, {"value": "done", "count": 1}]
+
+
+def test_sample_is_uniform_over_the_collection(monkeypatch):
+    documents = [{"_key": str(i), "position": i} for i in range(20_000)]
+
+    def execute(query, bind_vars, **kwargs):
+        assert "LIMIT" not in query
+        return iter([doc for doc in documents if random.random() < bind_vars["fraction"]])
+
+    random.seed(1)
+    monkeypatch.setattr(collection_statistics.admission, "execute", execute)
+    profile = _sample("c", len(documents), 1000)
+    positions = [doc["position"] for doc in profile.documents.values()]
+    assert len(positions) == 1000
+    quarters = Counter(position * 4 // len(documents) for position in positions)
+    assert all(200 <= quarters[q] <= 300 for q in range(4))
+
+
+def test_distinct_counts_are_reported_for_the_sample():
+    profile = CollectionProfile("c", sample_size=10)
+    for i in range(6):
+        profile.add({"_key": str(i), "color": ["red", "blue", "green"][i % 3]})
+    assert profile.to_dict(top_k=1)["fields"]["color"]["distinct_in_sample"] == 3
@@ -0,0 +1,100 @@
+import json
+import pytest
+import requests
+from arango.http import DefaultHTTPClient
+from tools import db_connection
+from tools.db_connection import HostStats, HealthAwareHostResolver, ManagedHTTPClient, ConnectionManager
+
+
+def hosts(count=3):
+    return [HostStats(f"http://coordinator{i}:8529") for i in range(count)]
+
+
+@pytest.mark.parametrize("strategy", ["roundrobin", "leastloaded", "fallback"])
+def test_resolver_skips_ejected_and_already_tried_hosts(strategy):
+    stats = hosts()
+    stats[0].healthy = False
+    resolver = HealthAwareHostResolver(stats, strategy)
+    picked = {resolver.get_host_index() for _ in range(10)}
+    assert 0 not in picked
+    # python-arango passes the hosts a failed request was already sent to
+    assert resolver.get_host_index({1}) == 2
+
+
+def test_resolver_falls_back_to_ejected_hosts_when_none_is_healthy():
+    stats = hosts(2)
+    for host in stats:
+        host.healthy = False
+    resolver = HealthAwareHostResolver(stats, "fallback")
+    assert resolver.get_host_index() == 0
+    assert resolver.get_host_index({0}) == 1
+
+
+def test_roundrobin_and_leastloaded_spread_requests():
+    stats = hosts()
+    resolver = HealthAwareHostResolver(stats)
+    assert [resolver.get_host_index() for _ in range(4)] == [0, 1, 2, 0]
+    stats[0].in_flight, stats[1].in_flight = 5, 1
+    assert HealthAwareHostResolver(stats, "leastloaded").get_host_index() == 2
+
+
+def test_health_checks_eject_after_repeated_failures_and_readmit(monkeypatch):
+    monkeypatch.setattr(db_connection, "ARANGO_EJECT_AFTER_FAILURES", 2)
+    manager = ConnectionManager("http://a:8529, http://b:8529/", "db", None, None)
+    assert [h.url for h in manager.hosts] == ["http://a:8529", "http://b:8529"]
+    assert (manager.username, manager.password) == ("root", "")
+    down = {"http://a:8529"}
+    monkeypatch.setattr(manager, "_probe", lambda host: host.url not in down)
+    manager.check_hosts()
+    assert manager.hosts[0].healthy
+    manager.check_hosts()
+    assert not manager.hosts[0].healthy and manager.hosts[0].ejections == 1 and manager.hosts[1].healthy
+    down.clear()
+    manager.check_hosts()
+    assert manager.hosts[0].healthy and manager.hosts[0].consecutive_failures == 0
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    monkeypatch.setattr(db_connection, "ARANGO_RETRY_ATTEMPTS", 2)
+    monkeypatch.setattr(db_connection, "ARANGO_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(db_connection, "ARANGO_RETRY_JITTER", 0)
+    outcomes = []
+
+    def send_request(self, session, method, url, headers=None, params=None, data=None, auth=None):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+    monkeypatch.setattr(DefaultHTTPClient, "send_request", send_request)
+    stats = hosts(1)
+    return ManagedHTTPClient(stats), stats[0], outcomes
+
+
+def cursor(query):
+    return json.dumps({"query": query})
+
+
+def test_read_only_cursors_are_retried(sent):
+    client, host, outcomes = sent
+    outcomes.extend([requests.exceptions.ConnectionError("reset"), 503, 201])
+    response = client.send_request(None, "post", f"{host.url}/_db/kb/_api/cursor", data=cursor("FOR d IN c RETURN d"))
+    assert response.status_code == 201
+    assert host.requests == 3 and host.errors == 1 and host.in_flight == 0
+
+
+def test_writes_are_not_retried(sent):
+    client, host, outcomes = sent
+    outcomes.extend([503, 201])
+    response = client.send_request(None, "post", f"{host.url}/_db/kb/_api/cursor",
+                                   data=cursor("FOR d IN c UPDATE d WITH {a: 1} IN c"))
+    assert response.status_code == 503 and outcomes == [201]
+    outcomes[:] = [requests.exceptions.ConnectionError("reset")]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.send_request(None, "post", f"{host.url}/_db/kb/_api/document/c", data="{}")
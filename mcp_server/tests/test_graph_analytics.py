@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from tools.graph_analytics import (Graph, batched, pagerank, weakly_connected_components, degrees,
+                                   approximate_betweenness, label_propagation)
+
+nx = pytest.importorskip("networkx")
+
+
+@pytest.fixture
+def random_graph():
+    rng = np.random.default_rng(0)
+    edges = {(int(a), int(b)) for a, b in rng.integers(0, 60, size=(240, 2)) if a != b}
+    pairs = [[f"v/{a:02d}", f"v/{b:02d}"] for a, b in sorted(edges)]
+    reference = nx.DiGraph()
+    reference.add_edges_from(map(tuple, pairs))
+    return Graph.from_id_pairs(pairs), reference
+
+
+def by_id(graph, values):
+    return dict(zip(graph.ids, values))
+
+
+def test_from_id_pairs_sums_parallel_edges():
+    graph = Graph.from_id_pairs([["v/b", "v/a"], ["v/b", "v/a"], ["v/a", "v/c"]])
+    assert list(graph.ids) == ["v/a", "v/b", "v/c"]
+    assert graph.edge_count == 2 and graph.adjacency[1, 0] == 2.0
+
+
+def test_empty_graph():
+    graph = Graph.from_id_pairs([])
+    assert graph.vertex_count == 0
+    assert len(pagerank(graph)) == len(approximate_betweenness(graph)) == len(label_propagation(graph)) == 0
+
+
+def test_pagerank_matches_networkx(random_graph):
+    graph, reference = random_graph
+    ranks = pagerank(graph, tol=1e-10, max_iter=500)
+    assert ranks.sum() == pytest.approx(1.0)
+    expected = nx.pagerank(reference, tol=1e-12)
+    for vertex, rank in by_id(graph, ranks).items():
+        assert rank == pytest.approx(expected[vertex], abs=1e-6)
+
+
+def test_components_and_degrees():
+    graph = Graph.from_id_pairs([["v/a", "v/b"], ["v/c", "v/b"], ["v/d", "v/e"]])
+    labels = by_id(graph, weakly_connected_components(graph))
+    assert labels["v/a"] == labels["v/b"] == labels["v/c"] != labels["v/d"] == labels["v/e"]
+    degree = {kind: by_id(graph, values) for kind, values in degrees(graph).items()}
+    assert degree["in"]["v/b"] == 2 and degree["out"]["v/b"] == 0 and degree["total"]["v/a"] == 1
+
+
+def test_betweenness_is_exact_when_every_vertex_is_a_source(random_graph):
+    graph, reference = random_graph
+    scores = by_id(graph, approximate_betweenness(graph, samples=graph.vertex_count, block=7))
+    expected = nx.betweenness_centrality(reference, normalized=False)
+    for vertex, score in scores.items():
+        assert score == pytest.approx(expected[vertex], abs=1e-9)
+
+
+def test_betweenness_of_a_path():
+    graph = Graph.from_id_pairs([["v/a", "v/b"], ["v/b", "v/c"], ["v/c", "v/d"]])
+    assert list(approximate_betweenness(graph, samples=4)) == [0.0, 2.0, 2.0, 0.0]
+
+
+def test_label_propagation_separates_cliques():
+    left = [[f"v/l{i}", f"v/l{j}"] for i in range(5) for j in range(5) if i != j]
+    right = [[f"v/r{i}", f"v/r{j}"] for i in range(5) for j in range(5) if i != j]
+    graph = Graph.from_id_pairs(left + right + [["v/l0", "v/r0"]])
+    labels = by_id(graph, label_propagation(graph, seed=3))
+    assert len({labels[f"v/l{i}"] for i in range(5)}) == 1
+    assert len({labels[f"v/r{i}"] for i in range(5)}) == 1
+    assert labels["v/l1"] != labels["v/r1"]
+
+
+def test_batches_are_factorized_into_sorted_ids():
+    graph = Graph.from_batches([[["v/c", "v/a"]], [["v/b", "v/c"], ["v/c", "v/a"]]])
+    assert list(graph.ids) == ["v/a", "v/b", "v/c"]
+    assert graph.adjacency[2, 0] == 2.0 and graph.adjacency[1, 2] == 1.0 and graph.edge_count == 2
+
+
+def test_batched_groups_a_stream():
+    assert list(batched(iter([[1, 2]] * 5), 2)) == [[[1, 2]] * 2, [[1, 2]] * 2, [[1, 2]]]
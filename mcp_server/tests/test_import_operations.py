@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import threading
+from tools import import_operations
+from tools.import_operations import _convert, _read_csv, _read_jsonl
+
+
+def test_convert_gives_cells_their_json_type():
+    assert _convert("") is None
+    assert _convert("True") is True and _convert("false") is False
+    assert _convert("42") == 42 and isinstance(_convert("42"), int)
+    assert _convert("-1.5") == -1.5
+    assert _convert("hello") == "hello"
+
+
+def test_convert_keeps_non_finite_and_separated_numbers_as_text():
+    for value in ("nan", "NaN", "inf", "-Infinity", "1e999", "1_000"):
+        assert _convert(value) == value
+
+
+def test_read_csv_keeps_key_columns_as_text():
+    f = io.BytesIO(b"_key,_from,code,count\n007,v/01,007,3\n")
+    (end, doc, error), = _read_csv(f, 0, {"_key", "_from", "code"})
+    assert error is None and end == len(f.getvalue())
+    assert doc == {"_key": "007", "_from": "v/01", "code": "007", "count": 3}
+
+
+def test_read_csv_reports_offsets_for_multiline_cells_and_bad_rows():
+    data = b'name,note\na,"two\nlines"\nb\n'
+    rows = list(_read_csv(io.BytesIO(data), 0))
+    assert rows[0] == (len(b'name,note\na,"two\nlines"\n'), {"name": "a", "note": "two\nlines"}, None)
+    assert rows[1][1] is None and "expected 2 columns" in rows[1][2]
+
+
+def test_read_csv_resumes_from_an_offset():
+    data = b"n\n1\n2\n3\n"
+    assert [doc["n"] for _, doc, _ in _read_csv(io.BytesIO(data), 4)] == [2, 3]
+
+
+def test_read_jsonl_rejects_non_finite_numbers_and_non_objects():
+    data = b'{"a": NaN}\n[1]\n\n{"a": 1}\nnot json\n'
+    rows = list(_read_jsonl(io.BytesIO(data), 0))
+    assert [doc for _, doc, _ in rows] == [None, None, {"a": 1}, None]
+    assert "NaN" in rows[0][2] and "not a JSON object" in rows[1][2]
+
+
+def test_checkpoint_is_replaced_atomically(tmp_path):
+    source = tmp_path / "data.jsonl"
+    source.write_text('{"a": 1}\n')
+    job = import_operations.ImportJob.__new__(import_operations.ImportJob)
+    job.path, job.collection, job.committed_offset = str(source), "c", 9
+    job.checkpoint_path = str(tmp_path / "data.jsonl.import-progress.json")
+    job._checkpoint()
+    assert json.loads(open(job.checkpoint_path).read()) == {"path": str(source), "collection": "c", "offset": 9}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.jsonl", "data.jsonl.import-progress.json"]
+
+
+def make_job(tmp_path, lines, mode="insert", checkpoint=True, field_map=None):
+    source = tmp_path / "data.jsonl"
+    source.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    job = import_operations.ImportJob.__new__(import_operations.ImportJob)
+    job.path, job.collection, job.format, job.mode = str(source), "c", "jsonl", mode
+    job.field_map, job.start_offset = field_map or {}, 0
+    job.checkpoint_path = str(tmp_path / "state.json") if checkpoint else None
+    job.counters = {"read": 0, "rejected": 0}
+    job.rejected, job.lock = [], threading.Lock()
+    return job
+
+
+def test_update_modes_keep_creation_metadata(tmp_path):
+    for mode, created in (("insert", True), ("ignore", True), ("update", False), ("replace", False)):
+        [(_, chunk)] = make_job(tmp_path, [{"_key": "a"}], mode=mode)._chunks()
+        assert ("created_at" in chunk[0]) == created and ("valid_from" in chunk[0]) == created
+        assert "updated_at" in chunk[0]
+
+
+def test_resumable_imports_reject_records_without_a_key(tmp_path):
+    job = make_job(tmp_path, [{"_key": "a"}, {"name": "no key"}, {"id": 7}], field_map={"id": "_key"})
+    [(_, chunk)] = job._chunks()
+    assert [doc["_key"] for doc in chunk] == ["a", "7"]
+    assert job.counters["rejected"] == 1 and "_key" in job.rejected[0]["error"]
+    [(_, chunk)] = make_job(tmp_path, [{"name": "no key"}], checkpoint=False)._chunks()
+    assert chunk[0]["name"] == "no key"
+
+
+def test_checkpoints_live_in_the_state_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_operations, "IMPORT_STATE_DIR", str(tmp_path / "state"))
+    first = import_operations._checkpoint_path("/data/x.jsonl", "c")
+    assert first.startswith(str(tmp_path / "state")) and os.path.basename(first).startswith("x.jsonl.")
+    assert first != import_operations._checkpoint_path("/data/x.jsonl", "d")
+    assert first != import_operations._checkpoint_path("/other/x.jsonl", "c")
+
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    monkeypatch.setattr(import_operations, "_jobs", {})
+    monkeypatch.setattr(import_operations, "IMPORT_JOB_HISTORY", 2)
+    for i in range(5):
+        job = import_operations.ImportJob.__new__(import_operations.ImportJob)
+        job.id, job.finished_at = str(i), (float(i) if i != 1 else None)
+        import_operations._remember(job)
+    assert sorted(import_operations._jobs) == ["1", "3", "4"]
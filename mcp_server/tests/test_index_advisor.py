@@ -0,0 +1,71 @@
+import threading
+import pytest
+from tools import index_advisor
+from tools.index_advisor import IndexAdvisor
+
+
+PLAN = {"plan": {"nodes": [], "collections": []}}
+
+
+class FakeCollection:
+    def __init__(self, release):
+        self.release = release
+
+    def add_index(self, spec):
+        self.release.wait(5)
+        return {"id": "items/1", "name": spec["name"]}
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    release = threading.Event()
+
+    class Aql:
+        def explain(self, query, bind_vars=None):
+            return PLAN
+
+    class Db:
+        aql = Aql()
+
+        def collection(self, name):
+            return FakeCollection(release)
+
+    monkeypatch.setattr(index_advisor, "db", Db())
+    monkeypatch.setattr(index_advisor, "analyze_plan",
+                        lambda plan: {"candidates": [("items", "persistent", ("a",))], "used": [], "collections": ["items"]})
+    return release
+
+
+def test_evicted_shapes_drop_their_latencies(fake_db, monkeypatch):
+    monkeypatch.setattr(index_advisor, "INDEX_ADVISOR_MAX_SHAPES", 2)
+    advisor = IndexAdvisor()
+    for i in range(5):
+        advisor._record(f"FOR d IN items FILTER d.a == {i} RETURN d", {}, 0.01, {}, float(i))
+
+    assert len(advisor.shapes) == 2
+    assert set(advisor.latencies) == set(advisor.shapes)
+    candidate = advisor.candidates[("items", "persistent", ("a",))]
+    assert candidate.shapes == set(advisor.shapes)
+
+
+def test_applied_is_bounded_and_updated_under_the_lock(fake_db, monkeypatch):
+    monkeypatch.setattr(index_advisor, "INDEX_ADVISOR_MAX_APPLIED", 2)
+    advisor = IndexAdvisor()
+    recommendation = {"id": "abc", "collection": "items", "type": "persistent", "fields": ["a"]}
+
+    started = [advisor.apply({**recommendation, "id": str(i)}) for i in range(3)]
+    assert all(entry["status"] == "building" for entry in started)
+    assert [entry["id"] for entry in advisor.applied_report()] == ["1", "2"]
+
+    with advisor.lock:
+        fake_db.set()
+        threading.Event().wait(0.1)
+        assert all(entry["status"] == "building" for entry in advisor.applied)
+
+    for _ in range(50):
+        if all(entry["status"] == "created" for entry in advisor.applied_report()):
+            break
+        threading.Event().wait(0.05)
+    report = advisor.applied_report()
+    assert [entry["status"] for entry in report] == ["created", "created"]
+    assert started[0]["status"] == "building"
@@ -0,0 +1,119 @@
+import pytest
+from tools.response_limits import projection, pagination, collect_within_budget, fit_document, IDENTITY_FIELDS
+from tools.serialization import dumps_bytes
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = iter(docs)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.docs)
+
+    def close(self, ignore_missing=True):
+        self.closed = True
+
+
+def test_projection_keeps_identity_fields():
+    bind_vars = {}
+    assert projection("doc", bind_vars, fields=["name", "_key"]) == "KEEP(doc, @keep_fields)"
+    assert bind_vars["keep_fields"] == IDENTITY_FIELDS + ["name"]
+
+
+def test_projection_excludes_only_without_fields():
+    bind_vars = {}
+    assert projection("doc", bind_vars, exclude_fields=["blob"]) == "UNSET(doc, @unset_fields)"
+    assert bind_vars == {"unset_fields": ["blob"]}
+    assert projection("doc", {}, fields=["a"], exclude_fields=["b"]).startswith("KEEP")
+    assert projection("doc", {}) == "doc"
+
+
+def test_pagination_sorts_every_page():
+    bind_vars = {}
+    assert pagination(bind_vars, 0, "doc._key") == "SORT doc._key"
+    assert bind_vars == {}
+    assert pagination(bind_vars, 20, "doc._key") == "SORT doc._key LIMIT @page_offset, @page_count"
+    assert bind_vars["page_offset"] == 20
+
+
+def test_collect_within_budget_returns_everything_that_fits():
+    docs = [{"_key": str(i)} for i in range(5)]
+    assert collect_within_budget(FakeCursor(docs), 10_000) == docs
+
+
+def test_collect_within_budget_truncates_with_continuation():
+    docs = [{"_key": str(i), "text": "x" * 100} for i in range(50)]
+    cursor = FakeCursor(docs)
+    results = collect_within_budget(cursor, 1000, offset=10)
+    marker = results[-1]
+    assert marker["_truncated"] and marker["_next_offset"] == 10 + len(results) - 1
+    assert len(dumps_bytes(results[:-1])) <= 1000
+    assert cursor.closed
+
+
+def test_collect_within_budget_fits_an_oversized_first_document():
+    doc = {"_key": "big", "small": 1, "blob": "x" * 5000}
+    results = collect_within_budget(FakeCursor([doc]), 500)
+    assert results[0]["_truncated_fields"] == ["blob"]
+    assert results[0]["small"] == 1
+
+
+def test_collect_within_budget_zero_disables_the_guard():
+    docs = [{"text": "x" * 1000} for _ in range(10)]
+    assert collect_within_budget(FakeCursor(docs), 0) == docs
+
+
+def test_fit_document_drops_largest_attributes_first():
+    doc = {"_id": "c/1", "_key": "1", "a": "x" * 50, "b": "y" * 500, "c": "z" * 5}
+    fitted = fit_document(doc, 200)
+    assert fitted["_truncated_fields"] == ["b"]
+    assert fitted["_id"] == "c/1" and fitted["a"] == doc["a"]
+    assert "b" in doc
+
+
+def test_fit_document_leaves_fitting_documents_alone():
+    doc = {"_key": "1", "a": 1}
+    assert fit_document(doc, 1000) is doc
+    assert fit_document(None, 10) is None
+
+
+def test_nullable_projection_leaves_null_alone():
+    assert projection("CURRENT", {}, fields=["a"], nullable=True) == \
+        "(CURRENT == null ? null : KEEP(CURRENT, @keep_fields))"
+    assert projection("CURRENT", {}, nullable=True) == "CURRENT"
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    from tools import basic_operations
+    queries = []
+
+    def execute(query, bind_vars, **kwargs):
+        queries.append((query, bind_vars))
+        return FakeCursor([{"_key": str(i), "text": "x" * 100} for i in range(50)])
+
+    monkeypatch.setattr(basic_operations.admission, "execute", execute)
+    return basic_operations.arango_query, queries
+
+
+def test_query_offset_keeps_a_leading_with_clause(executed):
+    arango_query, queries = executed
+    arango_query("WITH users, groups FOR v IN 1..2 OUTBOUND 'users/1' memberOf SORT v._key RETURN v", offset=5)
+    query, bind_vars = queries[0]
+    assert query.startswith("WITH users, groups FOR page_row IN ( FOR v IN 1..2")
+    assert bind_vars["page_offset"] == 5
+
+
+def test_write_queries_are_not_paginated(executed):
+    arango_query, queries = executed
+    with pytest.raises(ValueError):
+        arango_query("FOR d IN c UPDATE d WITH {seen: true} IN c RETURN NEW", offset=5)
+    assert not queries
+    results = arango_query("FOR d IN c UPDATE d WITH {seen: true} IN c RETURN NEW", max_response_bytes=1000)
+    assert results[-1]["_truncated"] and "_next_offset" not in results[-1]
+    results = arango_query("FOR d IN c RETURN d", max_response_bytes=1000)
+    assert results[-1]["_unsorted"] and results[-1]["_next_offset"] == len(results) - 1
@@ -0,0 +1,103 @@
+import pytest
+from tools import retention
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def properties(self):
+        return {"edge": False}
+
+    def add_index(self, spec):
+        if spec["type"] == "ttl":
+            # Like ArangoDB, an identical index is returned instead of created again
+            if spec["expireAfter"] not in self.db.ttl_indexes:
+                self.db.ttl_indexes.append(spec["expireAfter"])
+            return {"id": str(self.db.ttl_indexes.index(spec["expireAfter"]) + 1)}
+        return {"id": "0"}
+
+    def delete_index(self, index_id, ignore_missing=False):
+        self.db.deleted_indexes.append(index_id)
+
+    def insert(self, doc, overwrite=False):
+        self.db.policies[doc["_key"]] = dict(doc)
+
+    def update(self, doc):
+        self.db.policies[doc["_key"]].update(doc)
+
+    def all(self):
+        return [dict(p) for p in self.db.policies.values()]
+
+
+class FakeDb:
+    def __init__(self):
+        self.policies = {}
+        self.ttl_indexes = []
+        self.deleted_indexes = []
+        self.aql = self
+
+    def has_collection(self, name):
+        return True
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def execute(self, query, bind_vars=None):
+        return iter([])
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDb()
+    monkeypatch.setattr(retention, "db", fake)
+    monkeypatch.setattr(retention, "policy_cache", retention.PolicyCache())
+    monkeypatch.setattr(retention, "_last_errors", {})
+    return fake
+
+
+def test_switching_from_delete_to_archive_drops_the_ttl_index(fake_db):
+    retention.arango_set_retention_policy("events", retain_days=1, mode="delete")
+    policy = retention.arango_set_retention_policy("events", retain_days=1, mode="archive")
+
+    assert fake_db.deleted_indexes == ["1"]
+    assert "ttl_index" not in policy
+    assert "ttl_index" not in fake_db.policies["events"]
+
+
+def test_changing_the_window_replaces_the_ttl_index(fake_db):
+    retention.arango_set_retention_policy("events", retain_days=1, mode="delete")
+    retention.arango_set_retention_policy("events", retain_days=1, mode="delete")
+    assert fake_db.deleted_indexes == []
+
+    policy = retention.arango_set_retention_policy("events", retain_days=2, mode="delete")
+    assert fake_db.deleted_indexes == ["1"]
+    assert fake_db.ttl_indexes[-1] == 2 * 86400
+    assert policy["ttl_index"] == str(len(fake_db.ttl_indexes))
+
+
+def test_run_policy_leaves_the_cached_policy_alone(fake_db):
+    retention.arango_set_retention_policy("events", retain_days=1, mode="archive")
+    cached = retention.policy_cache.get()["events"]
+    before = dict(cached)
+
+    run = retention.run_policy(cached)
+
+    assert cached == before
+    assert run["pending_cutoff"] == fake_db.policies["events"]["archived_before"]
+
+
+def test_failed_runs_are_logged_and_reported(fake_db, monkeypatch, caplog):
+    retention.arango_set_retention_policy("events", retain_days=1, mode="archive")
+
+    def fail(policy):
+        raise RuntimeError("archive is read-only")
+
+    monkeypatch.setattr(retention, "run_policy", fail)
+    retention._start(retention.policy_cache.get()["events"]).join()
+
+    assert "Retention run for events failed" in caplog.text
+    status = retention.arango_retention_status()
+    assert status[0]["last_error"] == "archive is read-only"
+    assert status[0]["last_run"]["error"] == "archive is read-only"
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+from tools import vector_operations
+from tools.vector_operations import VectorIndex
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(4000, 32)).astype(np.float32)
+
+
+def exact_top(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k])
+
+
+def test_brute_force_search_is_exact(vectors):
+    index = VectorIndex()
+    index.add_many([str(i) for i in range(len(vectors))], vectors)
+    query = vectors[17] + 0.1
+    hits = index.search(query, 5)
+    assert [int(hit["key"]) for hit in hits] == exact_top(vectors, query, 5)
+    assert hits[0]["score"] >= hits[-1]["score"]
+
+
+def test_dimension_mismatch_is_rejected(vectors):
+    index = VectorIndex()
+    index.add("a", vectors[0])
+    with pytest.raises(ValueError):
+        index.add("b", vectors[0][:8])
+    with pytest.raises(ValueError):
+        index.search(vectors[0][:8])
+
+
+def test_remove_and_replace(vectors):
+    index = VectorIndex()
+    index.add_many(["a", "b", "c"], vectors[:3])
+    index.remove("a")
+    assert len(index) == 2 and "a" not in index.rows
+    index.add("b", vectors[2])
+    assert {hit["key"] for hit in index.search(vectors[2], 2)} == {"b", "c"}
+
+
+def test_allowed_keys_restrict_the_search(vectors):
+    index = VectorIndex()
+    index.add_many([str(i) for i in range(100)], vectors[:100])
+    hits = index.search(vectors[5], 3, allowed_keys=["1", "2", "missing"])
+    assert {hit["key"] for hit in hits} == {"1", "2"}
+
+
+def test_ivf_recall(monkeypatch):
+    monkeypatch.setattr(vector_operations, "IVF_MIN_VECTORS", 1000)
+    monkeypatch.setattr(vector_operations, "IVF_NPROBE", 8)
+    # Embeddings cluster by topic; uniform noise is the worst case for an inverted file
+    rng = np.random.default_rng(2)
+    topics = rng.normal(size=(40, 32))
+    vectors = (topics[rng.integers(0, 40, size=4000)] + rng.normal(scale=0.4, size=(4000, 32))).astype(np.float32)
+    index = VectorIndex()
+    index.add_many([str(i) for i in range(len(vectors))], vectors)
+    index.build()
+    assert index.centroids is not None
+    queries = vectors[:100] + rng.normal(scale=0.2, size=(100, 32)).astype(np.float32)
+    found = 0
+    for query in queries:
+        expected = set(exact_top(vectors, query, 10))
+        found += len(expected & {int(hit["key"]) for hit in index.search(query, 10)})
+    assert found / 1000 >= 0.9
+
+
+def test_ivf_retrains_as_the_index_grows(vectors, monkeypatch):
+    monkeypatch.setattr(vector_operations, "IVF_MIN_VECTORS", 1000)
+    index = VectorIndex()
+    index.add_many([str(i) for i in range(1000)], vectors[:1000])
+    assert index.needs_build()
+    index.build()
+    assert index.trained_size == 1000 and not index.needs_build()
+    index.add_many([str(i) for i in range(1000, 2000)], vectors[1000:2000])
+    assert index.needs_build()
+    index.build()
+    assert index.trained_size == 2000 and len(index.centroids) == int(np.sqrt(2000))
+
+
+def test_save_and_load_round_trip(vectors, tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_operations, "IVF_MIN_VECTORS", 1000)
+    index = VectorIndex()
+    index.add_many([str(i) for i in range(2000)], vectors[:2000])
+    index.build()
+    index.tick, index.revision = "42", "rev-1"
+    path = str(tmp_path / "c.vectors.npz")
+    index.save(path)
+    loaded = VectorIndex.load(path)
+    assert (loaded.tick, loaded.revision, loaded.trained_size) == ("42", "rev-1", 2000)
+    assert loaded.search(vectors[3], 3) == index.search(vectors[3], 3)
+
+
+def test_catch_up_replays_the_wal(vectors, monkeypatch):
+    index = VectorIndex()
+    index.add_many(["a", "b"], vectors[:2])
+    index.tick = "10"
+
+    class Feed:
+        def fetch(self, lower, last_scanned=None):
+            assert lower == "10"
+            return {"from_present": True, "check_more": False, "last_included": "12", "changes": [
+                ({"op": "remove", "collection": "c", "key": "a", "tick": "11"}, None),
+                ({"op": "upsert", "collection": "c", "key": "z", "tick": "12"}, {"embedding": vectors[5].tolist()}),
+                ({"op": "upsert", "collection": "other", "key": "y", "tick": "12"}, {"embedding": vectors[6].tolist()}),
+            ]}
+
+    monkeypatch.setattr(vector_operations, "feed", Feed())
+    assert vector_operations._catch_up("c", index)
+    assert set(index.rows) == {"b", "z"} and index.tick == "12"
+
+
+def test_catch_up_fails_when_the_wal_is_gone(monkeypatch):
+    index = VectorIndex()
+    index.tick = "10"
+    fetch = lambda lower, last_scanned=None: {"from_present": False, "changes": []}
+    monkeypatch.setattr(vector_operations, "feed", type("Feed", (), {"fetch": staticmethod(fetch)})())
+    assert not vector_operations._catch_up("c", index)
+    index.tick = None
+    assert not vector_operations._catch_up("c", index)
+
+
+def test_catch_up_follows_last_scanned_and_gives_up_when_the_wal_stalls(monkeypatch):
+    index = VectorIndex()
+    index.tick = "10"
+    calls = []
+
+    def fetch(lower, last_scanned=None):
+        calls.append((lower, last_scanned))
+        return {"check_more": True, "last_included": "0", "last_scanned": "20", "changes": []}
+
+    monkeypatch.setattr(vector_operations, "feed", type("Feed", (), {"fetch": staticmethod(fetch)})())
+    assert not vector_operations._catch_up("c", index)
+    assert calls == [("10", None), ("10", "20")]
+
+
+def test_invalid_embeddings_are_skipped_after_a_committed_write(vectors, monkeypatch):
+    index = VectorIndex()
+    index.add_many(["a", "b"], vectors[:2])
+    monkeypatch.setitem(vector_operations._indexes, "c", index)
+    vector_operations._sync_document("c", "a", {"_key": "a", "embedding": [1.0, 2.0]})
+    vector_operations._sync_document("c", "b", {"_key": "b", "embedding": ["x"] * 32})
+    vector_operations._sync_document("c", "n", {"_key": "n", "embedding": vectors[9].tolist()})
+    assert set(index.rows) == {"n"}
+
+
+def test_bulk_load_skips_invalid_embeddings(vectors, monkeypatch):
+    rows = [["a", vectors[0].tolist()], ["bad", "text"], ["short", [1.0]], ["b", vectors[1].tolist()],
+            ["nan", [float("nan")] * 32]]
+
+    class Db:
+        aql = type("Aql", (), {"execute": staticmethod(lambda *args, **kwargs: iter(rows))})()
+
+    monkeypatch.setattr(vector_operations, "db", Db())
+    monkeypatch.setattr(vector_operations, "_position", lambda collection: ("1", "r"))
+    index = vector_operations._load_from_db("c")
+    assert sorted(index.rows) == ["a", "b"] and index.dim == 32
@@ -0,0 +1,189 @@
+import pytest
+from tools import version_history
+from tools.version_history import _replay, record_writes, versioned_delete, versioned_update
+
+
+def checkpoint(version, document, **extra):
+    return {"version": version, "kind": "checkpoint", "document": document, "since_checkpoint": 0, **extra}
+
+
+def delta(version, since, set_=None, unset=()):
+    return {"version": version, "kind": "delta", "delta": {"set": set_ or {}, "unset": list(unset)},
+            "since_checkpoint": since}
+
+
+def test_replay_applies_deltas_oldest_first():
+    entries = [
+        delta(3, 2, {"b": 3}, ["c"]),
+        delta(2, 1, {"a": 2, "b": 2}),
+        checkpoint(1, {"a": 1, "c": 1}),
+    ]
+    assert _replay(entries) == {"a": 2, "b": 3}
+    assert entries[-1]["document"] == {"a": 1, "c": 1}
+
+
+def test_replay_of_a_tombstone_is_none():
+    assert _replay([checkpoint(2, None, removed=True), checkpoint(1, {"a": 1})]) is None
+
+
+def test_replay_without_checkpoint_is_none():
+    assert _replay([delta(2, 1, {"a": 2})]) is None
+
+
+def test_replay_after_reinsert_uses_the_new_chain():
+    entries = [delta(4, 1, {"b": 2}), checkpoint(3, {"b": 1}), checkpoint(2, None, removed=True),
+               checkpoint(1, {"a": 1})]
+    assert _replay(entries) == {"b": 2}
+
+
+class FakeHistory:
+    name = "c_history"
+
+    def __init__(self):
+        self.entries = []
+        self.transactions = []
+
+    def insert_many(self, entries, silent=True):
+        self.entries.extend(entries)
+
+
+class FakeDocuments:
+    def __init__(self):
+        self.docs = {"k": {"_key": "k", "n": 0, "updated_at": "t0"}}
+
+    def update(self, key, update, return_old=False, return_new=False):
+        old = self.docs[key]
+        self.docs[key] = {**old, **update}
+        return {"_key": key, "old": old, "new": self.docs[key]}
+
+    def delete(self, key):
+        del self.docs[key]
+        return {"_key": key}
+
+
+class FakeTransaction:
+    name = FakeHistory.name
+
+    def __init__(self, store, documents, locks):
+        self.store = store
+        self.documents = documents
+        self.locks = locks
+        self.pending = []
+        self.state = "running"
+
+    def collection(self, name):
+        return self if name == self.store.name else self.documents
+
+    def insert_many(self, entries, silent=True):
+        self.pending.extend(entries)
+
+    def commit_transaction(self):
+        self.store.entries.extend(self.pending)
+        self.state = "committed"
+
+    def abort_transaction(self):
+        self.state = "aborted"
+
+
+@pytest.fixture
+def history(monkeypatch):
+    store = FakeHistory()
+    documents = FakeDocuments()
+
+    class FakeDB:
+        def begin_transaction(self, write=None, exclusive=None):
+            txn = FakeTransaction(store, documents, {"write": write, "exclusive": exclusive})
+            store.transactions.append(txn)
+            return txn
+
+    def last_entries(database, _, keys):
+        assert isinstance(database, FakeTransaction)
+        last = {}
+        for entry in store.entries:
+            last[entry["doc_key"]] = {k: entry.get(k, False) for k in ("version", "since_checkpoint", "removed")}
+        return {k: v for k, v in last.items() if k in keys}
+
+    monkeypatch.setattr(version_history, "db", FakeDB())
+    monkeypatch.setattr(version_history, "_last_entries", last_entries)
+    monkeypatch.setattr(version_history, "is_versioned", lambda collection: True)
+    store.documents = documents
+    return store
+
+
+def newest_first(store):
+    return list(reversed(store.entries))
+
+
+def test_record_writes_builds_a_replayable_chain(history, monkeypatch):
+    monkeypatch.setattr(version_history, "VERSION_CHECKPOINT_EVERY", 3)
+    versions = [{"_key": "k", "n": i, "updated_at": f"t{i}"} for i in range(5)]
+    record_writes("c", [("k", None, versions[0])])
+    for old, new in zip(versions, versions[1:]):
+        record_writes("c", [("k", old, new)])
+    assert [e["kind"] for e in history.entries] == ["checkpoint", "delta", "delta", "checkpoint", "delta"]
+    assert [e["version"] for e in history.entries] == [0, 1, 2, 3, 4]
+    for i in range(5):
+        assert _replay(newest_first(history)[4 - i:]) == versions[i]
+
+
+def test_first_update_records_the_replaced_version(history):
+    old, new = {"_key": "k", "n": 0, "created_at": "t0"}, {"_key": "k", "n": 1, "updated_at": "t1"}
+    record_writes("c", [("k", old, new)])
+    assert history.entries[0]["document"] == old and history.entries[0]["valid_from"] == "t0"
+    assert _replay(newest_first(history)) == new
+
+
+def test_reinsert_after_removal_starts_a_new_chain(history):
+    record_writes("c", [("k", None, {"_key": "k", "a": 1, "created_at": "t1"})])
+    record_writes("c", [("k", None, None)])
+    assert _replay(newest_first(history)) is None
+    record_writes("c", [("k", None, {"_key": "k", "b": 1, "created_at": "t3"})])
+    assert [e["version"] for e in history.entries] == [0, 1, 2]
+    assert _replay(newest_first(history)) == {"_key": "k", "b": 1, "created_at": "t3"}
+
+
+def test_writes_and_their_versions_commit_in_one_exclusive_transaction(history):
+    versioned_update("c", "k", {"n": 1, "updated_at": "t1"})
+    versioned_delete("c", "k")
+
+    assert [t.locks for t in history.transactions] == [{"write": ["c"], "exclusive": ["c_history"]}] * 2
+    assert [t.state for t in history.transactions] == ["committed", "committed"]
+    assert [e["version"] for e in history.entries] == [0, 1, 2]
+    assert _replay(newest_first(history)) is None
+
+
+def test_a_failed_write_records_nothing(history):
+    with pytest.raises(KeyError):
+        versioned_update("c", "missing", {"n": 1})
+    assert history.transactions[0].state == "aborted"
+    assert history.entries == []
+
+
+def test_as_of_falls_back_to_an_earlier_checkpoint(monkeypatch):
+    chain = [delta(3, 3, {"n": 3}), delta(2, 2, {"n": 2}), delta(1, 1, {"n": 1}), checkpoint(0, {"n": 0})]
+    for entry, at in zip(chain, ("t3", "t2", "t1", "t0")):
+        entry["valid_from"] = at
+
+    class Aql:
+        def execute(self, query, bind_vars=None):
+            return iter([{"entries": chain[:2], "recorded": True, "current": {"n": 3}}])
+
+    monkeypatch.setattr(version_history, "db", type("FakeDB", (), {"aql": Aql()})())
+    monkeypatch.setattr(version_history, "is_versioned", lambda collection: True)
+    monkeypatch.setattr(version_history, "_entries_since_checkpoint", lambda collection, key, timestamp: chain)
+
+    result = version_history.arango_get_document_as_of("c", "k", "t3")
+    assert result == {"document": {"n": 3}, "version": 3, "version_valid_from": "t3"}
+
+
+def test_as_of_without_any_checkpoint_raises(monkeypatch):
+    class Aql:
+        def execute(self, query, bind_vars=None):
+            return iter([{"entries": [delta(1, 1, {"n": 1})], "recorded": True, "current": None}])
+
+    monkeypatch.setattr(version_history, "db", type("FakeDB", (), {"aql": Aql()})())
+    monkeypatch.setattr(version_history, "is_versioned", lambda collection: True)
+    monkeypatch.setattr(version_history, "_entries_since_checkpoint", lambda collection, key, timestamp: [])
+
+    with pytest.raises(ValueError, match="no checkpoint"):
+        version_history.arango_get_document_as_of("c", "k", "t1")
@@ -1,70 +1,115 @@
-from .db_connection import add_temporal_metadata
-from .basic_operations import (
-    arango_query,
-    arango_insert,
-    arango_update,
-    arango_remove,
-    arango_get_document,
-    arango_truncate_collection,
-    arango_list_collections,
-    arango_create_collection
-)
-from .graph_operations import (
-    arango_create_edge,
-    arango_create_sequential_relationship,
-    arango_query_edges,
-    arango_traverse_graph,
-    arango_temporal_traverse
-)
-from .temporal_operations import (
-    arango_time_series_analysis,
-    arango_query_by_time_range,
-    arango_query_valid_at,
-    arango_set_validity_period
-)
-from .schema_operations import (
-    arango_create_index,
-    arango_list_indexes,
-    arango_create_temporal_indexes
-)
-from .utilities import arango_backup, arango_get_metadata
+"""ArangoDB tools, grouped by module.
 
-# Import asset operations - these are now decorated with @tool
-from .asset_operations import (
-    arango_upload_image,
-    arango_get_image,
-    arango_list_images,
-    arango_delete_image,
-    arango_update_image_metadata
-)
+Tool functions are imported on first attribute access, so importing the
+package itself is cheap. A server imports the module of every group it
+registers (all of them by default) at startup, and each module imports the
+shared helpers it builds on, e.g. graph_operations loads retention and
+cluster_layout. Only groups left out of MCP_TOOL_GROUPS are never imported.
+"""
+import importlib
 
-__all__ = [
-    'add_temporal_metadata',
-    'arango_query',
-    'arango_insert',
-    'arango_update',
-    'arango_remove',
-    'arango_get_document',
-    'arango_truncate_collection',
-    'arango_list_collections',
-    'arango_create_collection',
-    'arango_create_edge',
-    'arango_create_sequential_relationship',
-    'arango_query_edges',
-    'arango_traverse_graph',
-    'arango_temporal_traverse',
-    'arango_time_series_analysis',
-    'arango_query_by_time_range',
-    'arango_query_valid_at',
-    'arango_set_validity_period',
-    'arango_create_index',
-    'arango_list_indexes',
-    'arango_create_temporal_indexes',
-    'arango_backup',
-    'arango_upload_image',
-    'arango_get_image',
-    'arango_list_images',
-    'arango_delete_image',
-    'arango_update_image_metadata',
-    'arango_get_metadata',
-]
+# Tool group -> (module, tool names)
+TOOL_GROUPS = {
+    "basic": ("basic_operations", [
+        'add_temporal_metadata',
+        'arango_query',
+        'arango_insert',
+        'arango_update',
+        'arango_remove',
+        'arango_get_document',
+        'arango_truncate_collection',
+        'arango_list_collections',
+        'arango_create_collection',
+    ]),
+    "graph": ("graph_operations", [
+        'arango_create_edge',
+        'arango_create_sequential_relationship',
+        'arango_query_edges',
+        'arango_traverse_graph',
+        'arango_temporal_traverse',
+    ]),
+    "cluster": ("cluster_layout", [
+        'arango_co_shard_collections',
+        'arango_create_graph',
+    ]),
+    "analytics": ("graph_analytics", [
+        'arango_graph_analytics',
+    ]),
+    "temporal": ("temporal_operations", [
+        'arango_time_series_analysis',
+        'arango_query_by_time_range',
+        'arango_query_valid_at',
+        'arango_set_validity_period',
+    ]),
+    "versioning": ("version_history", [
+        'arango_enable_versioning',
+        'arango_get_document_as_of',
+    ]),
+    "retention": ("retention", [
+        'arango_set_retention_policy',
+        'arango_run_retention',
+        'arango_retention_status',
+        'arango_delete_retention_policy',
+    ]),
+    "schema": ("schema_operations", [
+        'arango_create_index',
+        'arango_list_indexes',
+        'arango_create_temporal_indexes',
+    ]),
+    "utilities": ("utilities", [
+        'arango_backup',
+        'arango_get_metadata',
+        'arango_connection_status',
+    ]),
+    "advisor": ("index_advisor", [
+        'arango_index_advice',
+        'arango_apply_index_advice',
+    ]),
+    "statistics": ("collection_statistics", [
+        'arango_collection_statistics',
+    ]),
+    "vector": ("vector_operations", [
+        'arango_vector_search',
+        'arango_build_vector_index',
+    ]),
+    "changes": ("change_feed", [
+        'arango_subscribe_changes',
+        'arango_change_feed_status',
+    ]),
+    "import": ("import_operations", [
+        'arango_import_file',
+        'arango_import_status',
+    ]),
+    "profiling": ("profiling", [
+        'arango_configure_profiling',
+        'arango_get_profiles',
+    ]),
+    "admission": ("admission", [
+        'arango_query_stats',
+    ]),
+    "startup": ("startup", [
+        'arango_startup_report',
+    ]),
+    # Image/Asset management tools
+    # Setting FASTMCP_ALLOW_ARBITRARY_TYPES=1 environment variable will be needed
+    "assets": ("asset_operations", [
+        'arango_upload_image',
+        'arango_get_image',
+        'arango_list_images',
+        'arango_delete_image',
+        'arango_update_image_metadata',
+    ]),
+}
+
+# add_temporal_metadata is defined next to the connection
+_TOOL_MODULES = {name: module for module, names in TOOL_GROUPS.values() for name in names}
+_TOOL_MODULES['add_temporal_metadata'] = "db_connection"
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    if name not in _TOOL_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_TOOL_MODULES[name]}", __name__)
+    return getattr(module, name)
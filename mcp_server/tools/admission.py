@@ -0,0 +1,303 @@
+from typing import Dict, Any, List, Optional, Callable
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from arango.exceptions import AQLQueryExecuteError
+from fastmcp.server.dependencies import get_context
+from .db_connection import db, mcp
+
+# Default limits applied to every query run on behalf of a tool
+QUERY_MAX_RUNTIME = float(os.environ.get("QUERY_MAX_RUNTIME", "30"))
+QUERY_MEMORY_LIMIT = int(os.environ.get("QUERY_MEMORY_LIMIT", "0"))
+QUERY_FAIL_ON_WARNING = os.environ.get("QUERY_FAIL_ON_WARNING", "false").lower() == "true"
+
+# Per-tool overrides, e.g. {"arango_traverse_graph": {"max_runtime": 10, "memory_limit": 268435456}}
+TOOL_QUERY_LIMITS: Dict[str, Dict[str, Any]] = json.loads(os.environ.get("TOOL_QUERY_LIMITS", "{}"))
+
+# Upper bound for the max_depth of traversal tools
+MAX_TRAVERSAL_DEPTH = int(os.environ.get("MAX_TRAVERSAL_DEPTH", "10"))
+
+# Concurrent queries per client and how long an extra query may wait for a slot
+MAX_CONCURRENT_QUERIES = int(os.environ.get("MAX_CONCURRENT_QUERIES", "4"))
+QUERY_QUEUE_TIMEOUT = float(os.environ.get("QUERY_QUEUE_TIMEOUT", "10"))
+
+# Extra time a query may run past max_runtime before it is killed server-side
+QUERY_KILL_GRACE = float(os.environ.get("QUERY_KILL_GRACE", "5"))
+
+# Threads running tool calls; FastMCP would otherwise run sync tools on its event loop
+TOOL_WORKER_THREADS = int(os.environ.get("TOOL_WORKER_THREADS", "32"))
+
+# Seconds after which the slot state of a client without queries is dropped
+QUERY_CLIENT_IDLE_TTL = float(os.environ.get("QUERY_CLIENT_IDLE_TTL", "600"))
+
+
+# Callbacks run after every admitted query, as observer(query, bind_vars, tool, seconds, cursor);
+# seconds is the time until the first batch arrived
+query_observers: List[Callable[[str, Dict[str, Any], Optional[str], float, Any], None]] = []
+
+
+_tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKER_THREADS, thread_name_prefix="arango-tool")
+
+
+def in_worker_thread(fn: Callable) -> Callable:
+    """Wrap a sync tool so FastMCP awaits it on a worker thread.
+
+    Waiting for an admission slot, HTTP round trips and cursor reads then
+    block only the calling tool, not every other request on the event loop.
+    The tool runs in a copy of the caller's context, so get_context() works.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(_tool_executor, call)
+
+    return wrapper
+
+
+class QueryRejectedError(Exception):
+    """Raised when a query is refused by admission control."""
+
+
+class _Stats:
+    """Counters and recent events for admission decisions."""
+
+    def __init__(self, history: int = 50):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.events = deque(maxlen=history)
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def record(self, event: str, tool: Optional[str], client: str, query: str, detail: str = ""):
+        with self.lock:
+            self.counters[event] += 1
+            self.events.append({
+                "event": event,
+                "tool": tool,
+                "client": client,
+                "query": query[:200],
+                "detail": detail,
+                "at": time.time()
+            })
+
+
+_stats = _Stats()
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+# Queries per client that are running or waiting for a slot, and when the client was last seen
+_in_flight: Dict[str, int] = defaultdict(int)
+_waiting: Dict[str, int] = defaultdict(int)
+_last_seen: Dict[str, float] = {}
+_last_pruned = time.time()
+_slots_lock = threading.Lock()
+
+
+def _client_id() -> str:
+    """Identify the MCP client issuing the current tool call."""
+    try:
+        ctx = get_context()
+    except RuntimeError:
+        return "local"
+    return ctx.client_id or f"session-{id(ctx.session):x}"
+
+
+def _prune_idle():
+    """Drop the slot state of clients that have had no queries for QUERY_CLIENT_IDLE_TTL. Caller holds _slots_lock."""
+    global _last_pruned
+    now = time.time()
+    if now - _last_pruned < min(60.0, QUERY_CLIENT_IDLE_TTL):
+        return
+    _last_pruned = now
+    for client in [c for c, seen in _last_seen.items() if now - seen > QUERY_CLIENT_IDLE_TTL]:
+        if not _in_flight.get(client) and not _waiting.get(client):
+            for table in (_slots, _in_flight, _waiting, _last_seen):
+                table.pop(client, None)
+
+
+def _slot(client: str) -> threading.BoundedSemaphore:
+    """Return the client's semaphore, counting the caller as waiting so it is not pruned meanwhile."""
+    with _slots_lock:
+        _prune_idle()
+        if client not in _slots:
+            _slots[client] = threading.BoundedSemaphore(MAX_CONCURRENT_QUERIES)
+        _waiting[client] += 1
+        _last_seen[client] = time.time()
+        return _slots[client]
+
+
+class AdmittedCursor:
+    """Cursor that holds its admission slot (and watchdog) until it is exhausted or closed.
+
+    Tools that stop reading early release the slot when the cursor is
+    garbage collected, which happens as soon as the tool call returns.
+    """
+
+    def __init__(self, cursor, release: Callable[[], None]):
+        self._cursor = cursor
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._cursor)
+        except Exception:
+            # StopIteration included: the slot is free once the last batch has arrived
+            self.close()
+            raise
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def close(self, ignore_missing: bool = True):
+        if self._release is None:
+            return
+        release, self._release = self._release, None
+        try:
+            if self._cursor.id is not None and self._cursor.has_more():
+                # Free the server-side cursor of a partially read result
+                self._cursor.close(ignore_missing=ignore_missing)
+        finally:
+            release()
+
+    def __del__(self):
+        self.close()
+
+
+def query_limits(tool: Optional[str] = None) -> Dict[str, Any]:
+    """Return the execute() limits for a tool, merging its overrides into the defaults."""
+    limits = {
+        "max_runtime": QUERY_MAX_RUNTIME,
+        "memory_limit": QUERY_MEMORY_LIMIT,
+        "fail_on_warning": QUERY_FAIL_ON_WARNING,
+    }
+    limits.update(TOOL_QUERY_LIMITS.get(tool, {}))
+    return limits
+
+
+def check_depth(max_depth: int) -> int:
+    """Reject traversals deeper than MAX_TRAVERSAL_DEPTH."""
+    if max_depth > MAX_TRAVERSAL_DEPTH:
+        _stats.record("rejected", None, _client_id(), "", f"max_depth {max_depth} > {MAX_TRAVERSAL_DEPTH}")
+        raise QueryRejectedError(f"max_depth {max_depth} exceeds the limit of {MAX_TRAVERSAL_DEPTH}")
+    return max_depth
+
+
+def _kill_overrunning(query: str, bind_vars: Dict[str, Any], max_runtime: float):
+    """Kill the server-side query with this text and these bind variables if it runs past its budget.
+
+    Failures to list or kill queries are recorded as kill_failed events.
+    """
+    try:
+        for running in db.aql.queries():
+            # runtime is in seconds; bind_vars are reported while query tracking keeps them (the default)
+            if (running.get("query") == query and running.get("bind_vars", bind_vars) == bind_vars
+                    and running.get("runtime", 0) >= max_runtime):
+                db.aql.kill(running["id"])
+                _stats.record("killed", None, "watchdog", query,
+                              f"query {running['id']} ran {running['runtime']:.1f}s")
+    except Exception as e:
+        _stats.record("kill_failed", None, "watchdog", query, f"{type(e).__name__}: {e}")
+
+
+def execute(query: str, bind_vars: Optional[Dict[str, Any]] = None, tool: Optional[str] = None, **kwargs):
+    """Run an AQL query under the admission rules.
+
+    Waits up to QUERY_QUEUE_TIMEOUT for one of the client's
+    MAX_CONCURRENT_QUERIES slots, applies the tool's runtime/memory limits
+    and kills the query server-side if it outlives max_runtime. The slot is
+    held until the returned cursor has been read to the end or closed.
+
+    Args:
+        query: The AQL query string
+        bind_vars: Optional bind variables
+        tool: Name of the calling tool, used for per-tool limits and stats
+        **kwargs: Further arguments for db.aql.execute
+
+    Returns:
+        The query cursor, wrapped in an AdmittedCursor
+    """
+    client = _client_id()
+    slot = _slot(client)
+    admitted = slot.acquire(timeout=QUERY_QUEUE_TIMEOUT)
+    with _slots_lock:
+        _waiting[client] -= 1
+        if admitted:
+            _in_flight[client] += 1
+    if not admitted:
+        _stats.record("rejected", tool, client, query, f"more than {MAX_CONCURRENT_QUERIES} concurrent queries")
+        raise QueryRejectedError(
+            f"Client {client} already has {MAX_CONCURRENT_QUERIES} queries running; retry later")
+
+    limits = query_limits(tool)
+    limits.update(kwargs)
+
+    watchdog = None
+    if limits.get("max_runtime"):
+        watchdog = threading.Timer(limits["max_runtime"] + QUERY_KILL_GRACE,
+                                   _kill_overrunning, args=(query, bind_vars or {}, limits["max_runtime"]))
+        watchdog.daemon = True
+        watchdog.start()
+
+    def release():
+        if watchdog is not None:
+            watchdog.cancel()
+        with _slots_lock:
+            _in_flight[client] -= 1
+            _last_seen[client] = time.time()
+        slot.release()
+
+    _stats.count("admitted")
+    try:
+        start = time.perf_counter()
+        cursor = db.aql.execute(query, bind_vars=bind_vars or {}, **limits)
+        elapsed = time.perf_counter() - start
+        for observer in query_observers:
+            observer(query, bind_vars or {}, tool, elapsed, cursor)
+    except AQLQueryExecuteError as e:
+        # 1500: query killed, 32: resource limit (memory) exceeded
+        if e.error_code in (1500, 32):
+            _stats.record("killed", tool, client, query, e.error_message or "")
+        else:
+            _stats.count("failed")
+        release()
+        raise
+    except Exception:
+        release()
+        raise
+    return AdmittedCursor(cursor, release)
+
+
+@mcp.tool()
+def arango_query_stats() -> Dict[str, Any]:
+    """Report query admission statistics.
+
+    Returns:
+        Dictionary with the active limits, admitted/rejected/killed counters,
+        queries currently running per client and the most recent rejections and kills
+    """
+    with _slots_lock:
+        in_flight = {client: n for client, n in _in_flight.items() if n}
+    with _stats.lock:
+        counters = dict(_stats.counters)
+        events = list(_stats.events)
+    return {
+        "limits": {
+            **query_limits(),
+            "tool_overrides": TOOL_QUERY_LIMITS,
+            "max_traversal_depth": MAX_TRAVERSAL_DEPTH,
+            "max_concurrent_queries_per_client": MAX_CONCURRENT_QUERIES,
+            "queue_timeout": QUERY_QUEUE_TIMEOUT
+        },
+        "counters": {name: counters.get(name, 0) for name in ("admitted", "rejected", "killed", "kill_failed", "failed")},
+        "in_flight": in_flight,
+        "recent_events": events
+    }
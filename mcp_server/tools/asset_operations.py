@@ -1,14 +1,37 @@
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional
 import base64
+import binascii
+import re
 import uuid
 from datetime import datetime
 from fastmcp import Image
-from pydantic import ConfigDict
+from mcp.types import ImageContent
 from .db_connection import db, add_temporal_metadata, mcp
+from .version_history import versioned_insert, versioned_update, versioned_delete
+from .response_limits import projection, pagination, collect_within_budget
+from .sections import section
+from . import admission
 
 # Define the collection name for assets
 ASSETS_COLLECTION = "assets"
 
+# Metadata attributes returned by arango_list_images
+_IMAGE_METADATA = ["name", "mime_type", "size_bytes", "tags", "description", "uploaded_at"]
+
+# Prefix of a data URI, e.g. data:image/png;base64,
+_DATA_URI = re.compile(r"^data:[^,]*;base64,", re.IGNORECASE)
+
+# Leading bytes of the image formats accepted for upload
+_IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+]
+
 # Wrapper class for Image to make it work with Pydantic validation
 class ImgData:
     def __init__(self, data, format=None):
@@ -37,26 +60,61 @@ def _ensure_assets_collection():
         db.collection(ASSETS_COLLECTION).add_hash_index(["asset_type"], unique=False)
         print(f"Created '{ASSETS_COLLECTION}' collection")
 
+def _base64_size(data: str) -> int:
+    """Return the decoded size of a base64 string without decoding it."""
+    return len(data) * 3 // 4 - data[-2:].count("=")
+
+def _image_format(data: bytes) -> str:
+    """Detect the image format from the leading bytes, rejecting anything that is not an image."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for signature, format in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return format
+    raise ValueError("Image data is not a PNG, JPEG, GIF, WebP, BMP or TIFF image")
+
+def _decode_base64(data: str) -> bytes:
+    """Strictly decode a base64 image, rejecting anything but the base64 alphabet."""
+    try:
+        return base64.b64decode(data, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"image_base64 is not valid base64: {e}")
+
 @mcp.tool()
-def arango_upload_image(image_data: bytes, format: str = "png", name: Optional[str] = None, 
+def arango_upload_image(image_data: Optional[bytes] = None, format: str = "png", name: Optional[str] = None, 
                         tags: Optional[List[str]] = None, 
-                        description: Optional[str] = None) -> Dict[str, Any]:
+                        description: Optional[str] = None,
+                        image_base64: Optional[str] = None) -> Dict[str, Any]:
     """Upload an image to ArangoDB.
     
     Args:
         image_data: The raw image data as bytes
-        format: The image format (e.g., 'png', 'jpeg', etc.)
+        format: The image format (e.g., 'png', 'jpeg', etc.); the format detected from the data takes precedence
         name: Optional name for the image
         tags: Optional list of tags to categorize the image
         description: Optional description of the image
+        image_base64: The image as a base64 string or data URI, validated and stored
+            without re-encoding (alternative to image_data)
         
     Returns:
         Dict with the result of the operation, including the document key
     """
+    if (image_data is None) == (image_base64 is None):
+        raise ValueError("Provide exactly one of image_data or image_base64")
+
     _ensure_assets_collection()
     
-    # Create an Image object
-    image = Image(data=image_data, format=format)
+    if image_base64 is not None:
+        encoded = _DATA_URI.sub("", image_base64.strip(), count=1)
+        with section("base64"):
+            decoded = _decode_base64(encoded)
+        format = _image_format(decoded[:16])
+        size_bytes = len(decoded)
+    else:
+        format = _image_format(image_data[:16])
+        with section("base64"):
+            encoded = base64.b64encode(image_data).decode('utf-8')
+        size_bytes = len(image_data)
     
     # Generate a unique ID if name is not provided
     if not name:
@@ -66,17 +124,17 @@ def arango_upload_image(image_data: bytes, format: str = "png", name: Optional[s
     asset_doc = {
         "name": name,
         "asset_type": "image",
-        "mime_type": f"image/{image.format.lower()}" if image.format else "image/unknown",
-        "size_bytes": len(image.data),
+        "mime_type": f"image/{format}",
+        "size_bytes": size_bytes,
         "tags": tags or [],
         "description": description or "",
-        "image_data": base64.b64encode(image.data).decode('utf-8'),
+        "image_data": encoded,
         "uploaded_at": datetime.utcnow().isoformat()
     }
     
     # Add temporal metadata and insert
     asset_doc = add_temporal_metadata(asset_doc)
-    result = db.collection(ASSETS_COLLECTION).insert(asset_doc)
+    result = versioned_insert(ASSETS_COLLECTION, asset_doc)
     
     # Return a clean result without the image data to avoid large responses
     return {
@@ -84,20 +142,23 @@ def arango_upload_image(image_data: bytes, format: str = "png", name: Optional[s
         "id": result["_id"],
         "name": name,
         "asset_type": "image",
-        "size_bytes": len(image.data),
+        "size_bytes": size_bytes,
         "mime_type": asset_doc["mime_type"],
         "status": "uploaded"
     }
 
 @mcp.tool()
-def arango_get_image(key: str) -> Dict[str, Any]:
+def arango_get_image(key: str) -> List[Any]:
     """Retrieve an image from ArangoDB by its key.
     
+    The stored base64 payload is handed to the client as MCP image content
+    directly, so the image is never decoded and re-encoded on the way out.
+    
     Args:
         key: The document key of the image to retrieve
         
     Returns:
-        Dict containing the image data and metadata
+        List with a metadata dict followed by the image content
     """
     _ensure_assets_collection()
     
@@ -109,53 +170,60 @@ def arango_get_image(key: str) -> Dict[str, Any]:
     if doc.get("asset_type") != "image":
         raise ValueError(f"Document with key {key} is not an image")
     
-    # Decode the image data
-    image_data = base64.b64decode(doc["image_data"])
-    
     # Get format from mime_type
     format = "png"  # Default format
     if "mime_type" in doc and "/" in doc["mime_type"]:
         format = doc["mime_type"].split("/")[1]
+    mime_type = doc.get("mime_type", f"image/{format}")
     
-    # Return the image and metadata
-    return {
+    # Return the metadata and the image
+    metadata = {
         "key": doc["_key"],
         "name": doc["name"],
         "asset_type": "image",
-        "mime_type": doc.get("mime_type", f"image/{format}"),
-        "image_data": image_data,
+        "mime_type": mime_type,
         "format": format,
-        "size_bytes": len(image_data),
+        "size_bytes": doc.get("size_bytes", _base64_size(doc["image_data"])),
         "tags": doc.get("tags", []),
         "description": doc.get("description", "")
     }
+    return [metadata, ImageContent(type="image", data=doc["image_data"], mimeType=mime_type)]
 
 @mcp.tool()
-def arango_list_images(tag: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+def arango_list_images(tag: Optional[str] = None, limit: int = 100,
+                       max_response_bytes: Optional[int] = None,
+                       offset: int = 0) -> List[Dict[str, Any]]:
     """List images stored in ArangoDB, optionally filtered by tag.
     
+    Only the metadata is returned; use arango_get_image for the image itself.
+    
     Args:
         tag: Optional tag to filter images
         limit: Maximum number of images to return (default: 100)
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of images to skip, e.g. the _next_offset of a truncated response
         
     Returns:
-        List of image metadata dictionaries
+        List of image metadata dictionaries, ending with a continuation marker if truncated
     """
     _ensure_assets_collection()
     
     # Build the query
-    query = "FOR doc IN assets FILTER doc.asset_type == 'image'"
+    bind_vars = {"@collection": ASSETS_COLLECTION, "limit": limit}
+    query = "FOR doc IN @@collection FILTER doc.asset_type == 'image'"
     
     # Add tag filter if provided
     if tag:
-        query += f" FILTER '{tag}' IN doc.tags"
+        query += " FILTER @tag IN doc.tags"
+        bind_vars["tag"] = tag
     
     # Complete the query
-    query += f" LIMIT {limit} RETURN {{ _key: doc._key, _id: doc._id, name: doc.name, mime_type: doc.mime_type, size_bytes: doc.size_bytes, tags: doc.tags, description: doc.description, uploaded_at: doc.uploaded_at }}"
+    query += f" {pagination(bind_vars, offset, sort='doc._key')} LIMIT @limit"
+    query += f" RETURN {projection('doc', bind_vars, fields=_IMAGE_METADATA)}"
     
     # Execute the query
-    cursor = db.aql.execute(query)
-    return [doc for doc in cursor]
+    cursor = admission.execute(query, bind_vars, tool="arango_list_images")
+    return collect_within_budget(cursor, max_response_bytes, offset)
 
 @mcp.tool()
 def arango_delete_image(key: str) -> Dict[str, Any]:
@@ -178,7 +246,7 @@ def arango_delete_image(key: str) -> Dict[str, Any]:
         raise ValueError(f"Document with key {key} is not an image")
     
     # Delete the document
-    result = db.collection(ASSETS_COLLECTION).delete(key)
+    versioned_delete(ASSETS_COLLECTION, key)
     return {
         "key": key,
         "status": "deleted"
@@ -226,7 +294,7 @@ def arango_update_image_metadata(key: str,
     update = add_temporal_metadata(update, is_update=True)
     
     # Update the document
-    result = db.collection(ASSETS_COLLECTION).update(key, update)
+    versioned_update(ASSETS_COLLECTION, key, update)
     
     return {
         "key": key,
@@ -1,19 +1,54 @@
 from typing import Dict, Any, List, Optional
-from .db_connection import db, add_temporal_metadata, mcp
+import re
+from .db_connection import db, add_temporal_metadata, notify_document_write, is_read_only_query, mcp
+from .response_limits import projection, pagination, collect_within_budget, fit_document
+from .serialization import encode_response
+from .cluster_layout import cluster_options, layout
+from .version_history import versioned_insert, versioned_update, versioned_delete
+from . import admission
+
+# Leading WITH clause of a query, which has to stay in front when the query is wrapped
+_WITH_CLAUSE = re.compile(r"^\s*WITH\s+[\w`-]+(?:\s*,\s*[\w`-]+)*", re.IGNORECASE)
 
 @mcp.tool()
-def arango_query(query: str, bind_vars: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+def arango_query(query: str, bind_vars: Optional[Dict[str, Any]] = None,
+                 max_response_bytes: Optional[int] = None,
+                 offset: int = 0,
+                 response_encoding: str = "json") -> List[Dict[str, Any]]:
     """Execute an AQL query against the ArangoDB database.
     
     Args:
         query: The AQL query string to execute
         bind_vars: Optional dictionary of bind variables for the query
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of results to skip, e.g. the _next_offset of a truncated response;
+            pages only line up if the query SORTs its results. Only read-only queries
+            are paginated, since a continuation runs the query again
+        response_encoding: Response encoding ('json', 'json+gzip', 'msgpack' or 'msgpack+gzip');
+            binary encodings are returned as an embedded resource blob
         
     Returns:
-        List of documents that match the query
+        List of documents that match the query, ending with a continuation marker if truncated
+        (without _next_offset for queries that write)
     """
-    cursor = db.aql.execute(query, bind_vars=bind_vars or {})
-    return [doc for doc in cursor]
+    bind_vars = dict(bind_vars or {})
+    read_only = is_read_only_query(query)
+    if offset:
+        if not read_only:
+            raise ValueError("offset is only supported for read-only queries; a write query would run again")
+        match = _WITH_CLAUSE.match(query)
+        prefix, body = (match.group(0), query[match.end():]) if match else ("", query)
+        query = f"{prefix} FOR page_row IN ({body}) {pagination(bind_vars, offset)} RETURN page_row"
+    cursor = admission.execute(query, bind_vars, tool="arango_query")
+    results = collect_within_budget(cursor, max_response_bytes, offset)
+    if results and isinstance(results[-1], dict) and results[-1].get("_truncated"):
+        if not read_only:
+            # The writes are done; the rest of their results cannot be fetched without repeating them
+            del results[-1]["_next_offset"]
+        elif not re.search(r"\bSORT\b", query, re.IGNORECASE):
+            # Without a SORT the next page may see the results in a different order
+            results[-1]["_unsorted"] = True
+    return encode_response(results, response_encoding)
 
 @mcp.tool()
 def arango_insert(collection: str, document: Dict[str, Any]) -> Dict[str, Any]:
@@ -26,9 +61,10 @@ def arango_insert(collection: str, document: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with the document metadata (_id, _key, etc.)
     """
-    coll = db.collection(collection)
     document = add_temporal_metadata(document)
-    return coll.insert(document)
+    result = versioned_insert(collection, document)
+    notify_document_write(collection, result["_key"], document)
+    return result
 
 @mcp.tool()
 def arango_update(collection: str, document_key: str, update: Dict[str, Any]) -> Dict[str, Any]:
@@ -42,9 +78,10 @@ def arango_update(collection: str, document_key: str, update: Dict[str, Any]) ->
     Returns:
         Dictionary with the update metadata
     """
-    coll = db.collection(collection)
     update = add_temporal_metadata(update, is_update=True)
-    return coll.update(document_key, update)
+    result = versioned_update(collection, document_key, update)
+    notify_document_write(collection, document_key, update)
+    return result
 
 @mcp.tool()
 def arango_remove(collection: str, document_key: str) -> Dict[str, Any]:
@@ -57,22 +94,36 @@ def arango_remove(collection: str, document_key: str) -> Dict[str, Any]:
     Returns:
         Dictionary with the deletion metadata
     """
-    coll = db.collection(collection)
-    return coll.delete(document_key)
+    result = versioned_delete(collection, document_key)
+    notify_document_write(collection, document_key, None)
+    return result
 
 @mcp.tool()
-def arango_get_document(collection: str, document_key: str) -> Dict[str, Any]:
+def arango_get_document(collection: str, document_key: str,
+                        fields: Optional[List[str]] = None,
+                        exclude_fields: Optional[List[str]] = None,
+                        max_response_bytes: Optional[int] = None) -> Dict[str, Any]:
     """Retrieve a document by its key from the specified collection.
     
     Args:
         collection: The name of the collection
         document_key: The key of the document to retrieve
+        fields: Optional attributes to return (_id and _key are always included)
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
         
     Returns:
-        The document data if found
+        The document data if found, with _truncated_fields listing attributes dropped to fit the budget
     """
-    coll = db.collection(collection)
-    return coll.get(document_key)
+    if not fields and not exclude_fields:
+        coll = db.collection(collection)
+        return fit_document(coll.get(document_key), max_response_bytes)
+
+    bind_vars = {"collection": collection, "key": document_key}
+    expr = projection("doc", bind_vars, fields, exclude_fields)
+    query = f"LET doc = DOCUMENT(@collection, @key) FILTER doc != null RETURN {expr}"
+    docs = [doc for doc in admission.execute(query, bind_vars, tool="arango_get_document")]
+    return fit_document(docs[0] if docs else None, max_response_bytes)
 
 @mcp.tool()
 def arango_truncate_collection(collection: str) -> Dict[str, Any]:
@@ -98,20 +149,37 @@ def arango_list_collections() -> List[Dict[str, Any]]:
     return db.collections()
 
 @mcp.tool()
-def arango_create_collection(name: str, collection_type: str = "document") -> Dict[str, Any]:
+def arango_create_collection(name: str, collection_type: str = "document",
+                             shard_count: Optional[int] = None,
+                             shard_keys: Optional[List[str]] = None,
+                             replication_factor: Optional[int] = None,
+                             write_concern: Optional[int] = None,
+                             smart_join_attribute: Optional[str] = None,
+                             distribute_shards_like: Optional[str] = None) -> Dict[str, Any]:
     """Create a new collection in the database.
     
+    The sharding options only take effect on a cluster; a single server ignores them.
+    
     Args:
         name: The name of the collection to create
         collection_type: The type of collection ("document" or "edge")
+        shard_count: Number of shards
+        shard_keys: Attributes that determine a document's shard (default: ["_key"])
+        replication_factor: Copies of each shard
+        write_concern: Copies that must acknowledge a write
+        smart_join_attribute: Attribute holding the _key prefix of the joined collection (Enterprise Edition)
+        distribute_shards_like: Collection whose shard distribution to follow
         
     Returns:
-        Dictionary with the collection creation status
+        Dictionary with the collection creation status and its cluster layout
     """
     edge = collection_type.lower() == "edge"
-    collection = db.create_collection(name, edge=edge)
+    options = cluster_options(shard_count, shard_keys, replication_factor, write_concern,
+                              smart_join_attribute, distribute_shards_like)
+    collection = db.create_collection(name, edge=edge, **options)
     return {
         "name": collection.name,
         "type": "edge" if edge else "document",
-        "status": "created"
+        "status": "created",
+        "layout": layout(collection.name)
     } 
\ No newline at end of file
@@ -0,0 +1,252 @@
+from typing import Dict, Any, List, Optional, Callable
+from collections import deque
+import os
+import random
+import threading
+import time
+from .db_connection import db, mcp
+
+# Number of change events kept in memory for subscribers
+CHANGE_FEED_BUFFER = int(os.environ.get("CHANGE_FEED_BUFFER", "10000"))
+
+# Seconds to wait before polling the WAL again once it has been drained
+CHANGE_FEED_POLL_INTERVAL = float(os.environ.get("CHANGE_FEED_POLL_INTERVAL", "0.5"))
+
+# Approximate maximum bytes per WAL tail response
+CHANGE_FEED_CHUNK_SIZE = int(os.environ.get("CHANGE_FEED_CHUNK_SIZE", str(1024 * 1024)))
+
+# Start tailing at import instead of on the first subscription (needed for cache invalidation)
+CHANGE_FEED_AUTOSTART = os.environ.get("CHANGE_FEED_AUTOSTART", "false").lower() == "true"
+
+# WAL marker types
+_DOCUMENT_MARKER = 2300
+_REMOVE_MARKER = 2302
+_TRUNCATE_MARKER = 2004
+
+# Callbacks run for every change seen in the WAL, including those made by other
+# server replicas, as listener(event, document); document is the full new
+# version for upserts and None otherwise
+change_listeners: List[Callable[[Dict[str, Any], Optional[Dict[str, Any]]], None]] = []
+
+
+def _tick(value: Optional[str]) -> int:
+    return int(value) if value else 0
+
+
+class ChangeFeed:
+    """Background WAL tailer that buffers document changes for subscribers."""
+
+    def __init__(self, buffer_size: int = CHANGE_FEED_BUFFER):
+        self.events = deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+        self.syncer_id = random.randint(1, 2 ** 31)
+        self.start_tick: Optional[str] = None
+        self.last_tick: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.evicted_tick: Optional[str] = None
+        self._collections: Dict[str, Optional[str]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    def start(self):
+        """Start tailing from the current WAL position; no-op if already running."""
+        with self.lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="arango-change-feed", daemon=True)
+            self._thread.start()
+
+    def wait_started(self, timeout: float = 10) -> bool:
+        return self._started.wait(timeout)
+
+    def _refresh_collections(self):
+        """Map collection ids and globally unique ids to names."""
+        names = {}
+        for c in db.collections():
+            names[str(c["id"])] = c["name"]
+            global_id = db.collection(c["name"]).properties().get("global_id")
+            if global_id:
+                names[global_id] = c["name"]
+        self._collections = names
+
+    def _collection_name(self, entry: Dict[str, Any]) -> Optional[str]:
+        if entry.get("cname"):
+            return entry["cname"]
+        ref = entry.get("cuid") or str(entry.get("cid", ""))
+        if ref not in self._collections:
+            self._refresh_collections()
+            # Remember unknown ids (e.g. dropped collections) so they don't trigger refreshes
+            self._collections.setdefault(ref, None)
+        return self._collections[ref]
+
+    def _to_event(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        marker = entry.get("type")
+        if marker not in (_DOCUMENT_MARKER, _REMOVE_MARKER, _TRUNCATE_MARKER):
+            return None
+        collection = self._collection_name(entry)
+        if collection is None or collection.startswith("_"):
+            return None
+        data = entry.get("data") or {}
+        event = {
+            "tick": entry.get("tick"),
+            "op": {_DOCUMENT_MARKER: "upsert", _REMOVE_MARKER: "remove", _TRUNCATE_MARKER: "truncate"}[marker],
+            "collection": collection
+        }
+        if marker != _TRUNCATE_MARKER:
+            event["key"] = data.get("_key")
+            event["rev"] = data.get("_rev")
+        return event
+
+    def fetch(self, lower: str, last_scanned: Optional[str] = None) -> Dict[str, Any]:
+        """Read one chunk of the WAL after tick lower and convert it to events."""
+        result = db.wal.tail(
+            lower=lower,
+            last_scanned=last_scanned,
+            chunk_size=CHANGE_FEED_CHUNK_SIZE,
+            syncer_id=self.syncer_id,
+            client_info="arango-mcp change feed",
+            deserialize=True,
+        )
+        changes = []
+        for entry in result["content"]:
+            event = self._to_event(entry)
+            if event is not None:
+                document = entry.get("data") if event["op"] == "upsert" else None
+                changes.append((event, document))
+        return {**result, "changes": changes}
+
+    def _run(self):
+        lower = None
+        last_scanned = None
+        while True:
+            try:
+                if lower is None:
+                    lower = db.wal.last_tick()["tick"]
+                    self.start_tick = self.last_tick = lower
+                    self._started.set()
+                result = self.fetch(lower, last_scanned)
+            except Exception as e:
+                self.last_error = str(e)
+                time.sleep(CHANGE_FEED_POLL_INTERVAL)
+                continue
+
+            self.last_error = None
+            for event, document in result["changes"]:
+                with self.lock:
+                    if len(self.events) == self.events.maxlen:
+                        self.evicted_tick = self.events[0]["tick"]
+                    self.events.append(event)
+                for listener in change_listeners:
+                    try:
+                        listener(event, document)
+                    except Exception as e:
+                        self.last_error = f"listener failed: {e}"
+
+            if _tick(result.get("last_included")) > 0:
+                lower = result["last_included"]
+            last_scanned = result.get("last_scanned")
+            with self.lock:
+                self.last_tick = max(lower, last_scanned or "0", key=_tick)
+            if not result.get("check_more"):
+                time.sleep(CHANGE_FEED_POLL_INTERVAL)
+
+    def since(self, tick: str, collections: Optional[List[str]], limit: int) -> Optional[Dict[str, Any]]:
+        """Return buffered events after tick with the next cursor, or None if the buffer no longer reaches back that far."""
+        wanted = set(collections) if collections else None
+        with self.lock:
+            if _tick(tick) < max(_tick(self.start_tick), _tick(self.evicted_tick)):
+                return None
+            events = [
+                e for e in self.events
+                if _tick(e["tick"]) > _tick(tick) and (wanted is None or e["collection"] in wanted)
+            ]
+            last_tick = self.last_tick
+        if len(events) >= limit:
+            events = events[:limit]
+            return {"events": events, "next_tick": events[-1]["tick"]}
+        return {"events": events, "next_tick": max(tick, last_tick, key=_tick)}
+
+
+feed = ChangeFeed()
+
+
+@mcp.tool()
+def arango_subscribe_changes(collections: Optional[List[str]] = None, since_tick: Optional[str] = None,
+                             limit: int = 1000, include_documents: bool = False) -> Dict[str, Any]:
+    """Read inserts, updates, removals and truncates from the database write-ahead log.
+
+    Call without since_tick to subscribe and get a starting cursor, then pass
+    the returned next_tick back on every following call.
+
+    Args:
+        collections: Optional collection names to include (all collections if not specified)
+        since_tick: Tick returned as next_tick by the previous call
+        limit: Maximum number of events to return
+        include_documents: Whether to attach the current version of upserted documents
+
+    Returns:
+        Dictionary with the events in tick order, the next_tick cursor, and resync_required
+        when since_tick is older than the retained history
+    """
+    feed.start()
+    if not feed.wait_started():
+        raise RuntimeError(f"Change feed could not start: {feed.last_error}")
+
+    if since_tick is None:
+        return {"events": [], "next_tick": feed.last_tick, "resync_required": False}
+
+    page = feed.since(since_tick, collections, limit)
+    if page is None:
+        # Older than the buffer: read straight from the WAL if the server still has it
+        result = feed.fetch(since_tick)
+        if not result.get("from_present", True):
+            return {"events": [], "next_tick": feed.last_tick, "resync_required": True}
+        wanted = set(collections) if collections else None
+        events = [e for e, _ in result["changes"] if wanted is None or e["collection"] in wanted][:limit]
+        if len(events) == limit:
+            next_tick = events[-1]["tick"]
+        else:
+            next_tick = result["last_included"] if _tick(result.get("last_included")) > 0 else since_tick
+    else:
+        events, next_tick = page["events"], page["next_tick"]
+
+    if include_documents:
+        upserts = [e for e in events if e["op"] == "upsert"]
+        if upserts:
+            cursor = db.aql.execute(
+                "FOR e IN @events RETURN DOCUMENT(e.collection, e.key)",
+                bind_vars={"events": [{"collection": e["collection"], "key": e["key"]} for e in upserts]},
+            )
+            events = [dict(e) for e in events]
+            documents = iter(list(cursor))
+            for event in events:
+                if event["op"] == "upsert":
+                    event["document"] = next(documents)
+
+    return {"events": events, "next_tick": next_tick, "resync_required": False}
+
+
+@mcp.tool()
+def arango_change_feed_status() -> Dict[str, Any]:
+    """Report the state of the background change feed.
+
+    Returns:
+        Dictionary with whether the feed is running, its start and current ticks,
+        the number of buffered events and the last error
+    """
+    with feed.lock:
+        buffered = len(feed.events)
+        oldest = feed.events[0]["tick"] if feed.events else None
+    return {
+        "running": feed._thread is not None,
+        "start_tick": feed.start_tick,
+        "last_tick": feed.last_tick,
+        "buffered_events": buffered,
+        "oldest_buffered_tick": oldest,
+        "listeners": len(change_listeners),
+        "last_error": feed.last_error
+    }
+
+
+if CHANGE_FEED_AUTOSTART:
+    feed.start()
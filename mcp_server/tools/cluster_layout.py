@@ -0,0 +1,213 @@
+from typing import Dict, Any, List, Optional
+import threading
+import time
+from .db_connection import db, mcp
+
+# Seconds the shard keys of a collection are cached for edge inserts
+_SHARD_KEYS_CACHE_TTL = 60
+
+# Collection properties reported as its cluster layout
+_LAYOUT_FIELDS = ("shard_count", "shard_fields", "replication_factor", "write_concern",
+                  "shard_like", "sharding_strategy", "smart_join_attribute")
+
+_shard_keys: Dict[str, tuple] = {}
+_shard_keys_lock = threading.Lock()
+
+
+def cluster_options(shard_count: Optional[int] = None, shard_keys: Optional[List[str]] = None,
+                    replication_factor: Optional[int] = None, write_concern: Optional[int] = None,
+                    smart_join_attribute: Optional[str] = None,
+                    distribute_shards_like: Optional[str] = None) -> Dict[str, Any]:
+    """Validate sharding options and map them to python-arango create_collection arguments.
+
+    Options left as None are omitted, so the server defaults apply; a single
+    server accepts and ignores them.
+    """
+    if shard_count is not None and shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+    if replication_factor is not None and replication_factor < 1:
+        raise ValueError("replication_factor must be at least 1")
+    if write_concern is not None and replication_factor is not None and write_concern > replication_factor:
+        raise ValueError(f"write_concern {write_concern} exceeds replication_factor {replication_factor}")
+    if smart_join_attribute is not None:
+        # SmartJoins need the _key prefix as the only shard key and a prototype collection
+        shard_keys = shard_keys or ["_key:"]
+        if shard_keys != ["_key:"]:
+            raise ValueError("smart_join_attribute requires shard_keys ['_key:']")
+        if distribute_shards_like is None:
+            raise ValueError("smart_join_attribute requires distribute_shards_like")
+
+    options = {
+        "shard_count": shard_count,
+        "shard_fields": shard_keys,
+        "replication_factor": replication_factor,
+        "write_concern": write_concern,
+        "smart_join_attribute": smart_join_attribute,
+        "shard_like": distribute_shards_like
+    }
+    return {k: v for k, v in options.items() if v is not None}
+
+
+def layout(collection: str) -> Dict[str, Any]:
+    """The sharding properties of a collection."""
+    properties = db.collection(collection).properties()
+    return {k: properties.get(k) for k in _LAYOUT_FIELDS if properties.get(k) is not None}
+
+
+def shard_keys(collection: str) -> List[str]:
+    """Shard keys of a collection, cached for a minute."""
+    with _shard_keys_lock:
+        cached = _shard_keys.get(collection)
+    if cached is not None and time.time() - cached[1] < _SHARD_KEYS_CACHE_TTL:
+        return cached[0]
+    keys = db.collection(collection).properties().get("shard_fields") or ["_key"]
+    with _shard_keys_lock:
+        _shard_keys[collection] = (keys, time.time())
+    return keys
+
+
+def with_shard_keys(edge_collection: str, edge: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the shard key attributes of the _from vertex onto an edge of a co-sharded collection.
+
+    Edges sharded by _key need nothing; for co-sharded edge collections the
+    vertex is read once per edge that does not carry the attributes itself.
+    """
+    missing = [k for k in shard_keys(edge_collection) if not k.startswith("_") and k not in edge]
+    if missing:
+        vertex = db.document(edge["_from"])
+        if vertex is None:
+            raise ValueError(f"Vertex {edge['_from']} not found")
+        for name in missing:
+            edge[name] = vertex.get(name)
+    return edge
+
+
+def _ensure_sharded(name: str, edge: bool, shard_key: str, like: Optional[str],
+                    options: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a collection sharded by shard_key (following like's shards), or check an existing one."""
+    if db.has_collection(name):
+        existing = layout(name)
+        # Single servers report no shard keys; on a cluster sharding is fixed at creation
+        fields = existing.get("shard_fields")
+        if fields is not None and (fields != [shard_key] or (like is not None and existing.get("shard_like") != like)):
+            raise ValueError(f"Collection {name} already exists with a different sharding: {existing}")
+        return existing
+    if like is None:
+        db.create_collection(name, edge=edge, shard_fields=[shard_key], **options)
+    else:
+        # Shard count and replication are inherited from the prototype collection
+        db.create_collection(name, edge=edge, shard_fields=[shard_key], shard_like=like)
+    with _shard_keys_lock:
+        _shard_keys.pop(name, None)
+    return layout(name)
+
+
+@mcp.tool()
+def arango_co_shard_collections(vertex_collection: str, edge_collections: List[str], shard_key: str,
+                                shard_count: Optional[int] = None, replication_factor: Optional[int] = None,
+                                write_concern: Optional[int] = None) -> Dict[str, Any]:
+    """Create edge collections whose shards sit on the same DB servers as their vertices.
+
+    The vertex collection is sharded by shard_key and every edge collection
+    by the same attribute with distributeShardsLike, so an edge lives on the
+    DB server of its _from vertex. Vertices must carry shard_key (e.g. a
+    tenant or region); arango_create_edge copies it from the _from vertex
+    onto new edges. This places data only: Community Edition traversals are
+    still driven step by step from the coordinator.
+
+    Args:
+        vertex_collection: The vertex collection (created if missing)
+        edge_collections: Edge collections to co-shard with it (created if missing)
+        shard_key: The attribute to shard vertices and edges by
+        shard_count: Number of shards of the vertex collection
+        replication_factor: Copies of each shard
+        write_concern: Copies that must acknowledge a write
+
+    Returns:
+        Dictionary with the layout of each collection and the server role
+    """
+    options = cluster_options(shard_count=shard_count, replication_factor=replication_factor,
+                              write_concern=write_concern)
+    result = {
+        "server_role": db.role(),
+        "vertex_collection": {vertex_collection: _ensure_sharded(vertex_collection, False, shard_key, None, options)},
+        "edge_collections": {}
+    }
+    for name in edge_collections:
+        result["edge_collections"][name] = _ensure_sharded(name, True, shard_key, vertex_collection, options)
+    return result
+
+
+@mcp.tool()
+def arango_create_graph(name: str, edge_definitions: List[Dict[str, Any]],
+                        orphan_collections: Optional[List[str]] = None,
+                        shard_count: Optional[int] = None, replication_factor: Optional[int] = None,
+                        write_concern: Optional[int] = None, co_shard_key: Optional[str] = None,
+                        smart_graph_attribute: Optional[str] = None,
+                        satellite_collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Create a named graph with cluster sharding options.
+
+    With co_shard_key all vertex and edge collections are sharded by that
+    attribute and follow the shards of the first vertex collection, which
+    aligns data placement but does not make Community Edition traversals
+    shard-local. smart_graph_attribute creates an Enterprise SmartGraph
+    instead, whose traversals the DB servers execute themselves.
+
+    Args:
+        name: The name of the graph
+        edge_definitions: Edge definitions, each with edge_collection,
+            from_vertex_collections and to_vertex_collections
+        orphan_collections: Vertex collections without edges
+        shard_count: Number of shards per collection
+        replication_factor: Copies of each shard
+        write_concern: Copies that must acknowledge a write
+        co_shard_key: Optional attribute to co-shard vertices and edges by
+        smart_graph_attribute: Optional SmartGraph sharding attribute (Enterprise Edition)
+        satellite_collections: Collections replicated to every DB server (Enterprise SmartGraphs only)
+
+    Returns:
+        Dictionary with the graph name, its edge definitions, the layout of each collection and the server role
+    """
+    if co_shard_key and smart_graph_attribute:
+        raise ValueError("Use either co_shard_key or smart_graph_attribute, not both")
+    if co_shard_key and satellite_collections:
+        raise ValueError("satellite_collections need a SmartGraph (smart_graph_attribute), not co_shard_key")
+    for definition in edge_definitions:
+        if not {"edge_collection", "from_vertex_collections", "to_vertex_collections"} <= set(definition):
+            raise ValueError("Each edge definition needs edge_collection, from_vertex_collections and to_vertex_collections")
+    options = cluster_options(shard_count=shard_count, replication_factor=replication_factor,
+                              write_concern=write_concern)
+
+    vertices = []
+    for definition in edge_definitions:
+        for collection in definition["from_vertex_collections"] + definition["to_vertex_collections"]:
+            if collection not in vertices:
+                vertices.append(collection)
+    vertices += [c for c in orphan_collections or [] if c not in vertices]
+    edges = [definition["edge_collection"] for definition in edge_definitions]
+
+    if co_shard_key:
+        if not vertices:
+            raise ValueError("co_shard_key needs at least one vertex collection")
+        prototype = vertices[0]
+        _ensure_sharded(prototype, False, co_shard_key, None, options)
+        for collection in vertices[1:]:
+            _ensure_sharded(collection, False, co_shard_key, prototype, options)
+        for collection in edges:
+            _ensure_sharded(collection, True, co_shard_key, prototype, options)
+        graph = db.create_graph(name, edge_definitions, orphan_collections)
+    else:
+        graph = db.create_graph(
+            name, edge_definitions, orphan_collections,
+            smart=True if smart_graph_attribute else None,
+            smart_field=smart_graph_attribute,
+            satellite_collections=satellite_collections,
+            **options
+        )
+
+    return {
+        "name": graph.name,
+        "edge_definitions": graph.edge_definitions(),
+        "layouts": {collection: layout(collection) for collection in vertices + edges},
+        "server_role": db.role()
+    }
@@ -0,0 +1,320 @@
+from typing import Dict, Any, List, Optional
+from collections import Counter
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+from .db_connection import db, mcp
+from .change_feed import change_listeners
+from .serialization import dumps_bytes
+from . import admission
+
+# Seconds a field profile is served from cache before it is sampled again
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "300"))
+
+# Documents sampled per collection profile
+STATS_SAMPLE_SIZE = int(os.environ.get("STATS_SAMPLE_SIZE", "1000"))
+
+# Nesting depth up to which object attributes are profiled as dotted paths
+STATS_MAX_DEPTH = 3
+
+# Upper bound on the number of distinct field paths profiled per collection
+STATS_MAX_FIELDS = 200
+
+# Strings longer than this are cut before being counted as top values
+_MAX_VALUE_LENGTH = 100
+
+
+class HyperLogLog:
+    """Distinct count estimator with 2^precision one-byte registers (about 1.6% error at precision 12)."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: Any):
+        digest = hashlib.blake2b(dumps_bytes(value), digest_size=8).digest()
+        x = int.from_bytes(digest, "big")
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class TopK:
+    """Space-saving heavy hitters over (type, value) pairs: keeps at most capacity counters."""
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self.counts: Counter = Counter()
+
+    def add(self, value: Any):
+        if value in self.counts or len(self.counts) < self.capacity:
+            self.counts[value] += 1
+            return
+        # Replace the smallest counter; the newcomer inherits its count as an upper bound
+        smallest, count = min(self.counts.items(), key=lambda item: item[1])
+        del self.counts[smallest]
+        self.counts[value] = count + 1
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        return [{"value": value, "count": count} for (_, value), count in self.counts.most_common(k)]
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+class FieldProfile:
+    """Running statistics for one attribute path."""
+
+    def __init__(self):
+        self.present = 0
+        self.nulls = 0
+        self.types: Counter = Counter()
+        self.distinct = HyperLogLog()
+        self.top_values = TopK()
+        self.ranges: Dict[str, List[Any]] = {}
+
+    def add(self, value: Any):
+        self.present += 1
+        kind = _type_name(value)
+        self.types[kind] += 1
+        if kind == "null":
+            self.nulls += 1
+            return
+        self.distinct.add(value)
+        if kind in ("number", "string"):
+            bounds = self.ranges.get(kind)
+            if bounds is None:
+                self.ranges[kind] = [value, value]
+            else:
+                bounds[0] = min(bounds[0], value)
+                bounds[1] = max(bounds[1], value)
+        if kind in ("bool", "number", "string"):
+            # Keyed by type too, so that True and 1 are counted apart
+            self.top_values.add((kind, value[:_MAX_VALUE_LENGTH] if kind == "string" else value))
+
+    def to_dict(self, sampled: int, top_k: int) -> Dict[str, Any]:
+        return {
+            "types": {kind: round(n / self.present, 4) for kind, n in self.types.most_common()},
+            "missing_ratio": round(1 - self.present / sampled, 4) if sampled else None,
+            "null_ratio": round(self.nulls / sampled, 4) if sampled else None,
+            # Distinct values within the sample, not scaled to the collection
+            "distinct_in_sample": self.distinct.estimate(),
+            "ranges": {kind: {"min": bounds[0], "max": bounds[1]} for kind, bounds in self.ranges.items()},
+            "top_values": self.top_values.top(top_k)
+        }
+
+
+class CollectionProfile:
+    """Field profiles of a document sample that later writes keep current.
+
+    The sampled documents are kept by key, so a write to a sampled document
+    replaces its old version instead of counting the document twice, and a
+    removal drops it. The sketches cannot forget values, so the field
+    profiles are rebuilt from the kept documents on the next read after a
+    change. New documents join the sample until it holds twice sample_size,
+    after which each one replaces a random member.
+    """
+
+    def __init__(self, collection: str, sample_size: int):
+        self.collection = collection
+        self.sample_size = sample_size
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.sampled = 0
+        self.fields: Dict[str, FieldProfile] = {}
+        self.dirty = False
+        self.computed_at = time.time()
+        self.lock = threading.Lock()
+
+    def add(self, document: Dict[str, Any]):
+        with self.lock:
+            key = document.get("_key", len(self.documents))
+            if key not in self.documents and len(self.documents) >= 2 * self.sample_size:
+                del self.documents[random.choice(list(self.documents))]
+            self.documents[key] = document
+            self.dirty = True
+
+    def remove(self, key: str):
+        with self.lock:
+            if self.documents.pop(key, None) is not None:
+                self.dirty = True
+
+    def _rebuild(self):
+        self.fields = {}
+        self.sampled = len(self.documents)
+        for document in self.documents.values():
+            self._add_object(document, "", 1)
+        self.dirty = False
+
+    def _add_object(self, document: Dict[str, Any], prefix: str, depth: int):
+        for name, value in document.items():
+            if not prefix and name in ("_id", "_rev"):
+                continue
+            path = prefix + name
+            profile = self.fields.get(path)
+            if profile is None:
+                if len(self.fields) >= STATS_MAX_FIELDS:
+                    continue
+                profile = self.fields[path] = FieldProfile()
+            profile.add(value)
+            if isinstance(value, dict) and depth < STATS_MAX_DEPTH:
+                self._add_object(value, path + ".", depth + 1)
+
+    def to_dict(self, top_k: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        with self.lock:
+            if self.dirty:
+                self._rebuild()
+            selected = {path: p for path, p in self.fields.items() if not fields or path in fields}
+            return {
+                "sampled_documents": self.sampled,
+                "computed_at": self.computed_at,
+                "age_seconds": round(time.time() - self.computed_at, 1),
+                "fields": {path: p.to_dict(self.sampled, top_k) for path, p in sorted(selected.items())}
+            }
+
+
+_profiles: Dict[str, CollectionProfile] = {}
+_profiles_lock = threading.Lock()
+
+
+def _sample(collection: str, count: int, sample_size: int) -> CollectionProfile:
+    """Profile a uniform random sample of at most sample_size documents, streamed in batches.
+
+    The server keeps each document with a slightly oversampled probability;
+    a LIMIT there would favour documents early in the collection's order,
+    so the cut to sample_size is made here by reservoir sampling.
+    """
+    profile = CollectionProfile(collection, sample_size)
+    if count == 0 or sample_size <= 0:
+        return profile
+    fraction = min(1.0, 1.2 * sample_size / count)
+    cursor = admission.execute(
+        "FOR doc IN @@collection FILTER RAND() < @fraction RETURN doc",
+        {"@collection": collection, "fraction": fraction},
+        tool="arango_collection_statistics",
+        stream=True,
+        batch_size=min(sample_size, 1000),
+    )
+    reservoir = []
+    for seen, document in enumerate(cursor):
+        if seen < sample_size:
+            reservoir.append(document)
+        else:
+            slot = random.randrange(seen + 1)
+            if slot < sample_size:
+                reservoir[slot] = document
+    for document in reservoir:
+        profile.add(document)
+    return profile
+
+
+def get_profile(collection: str, count: int, sample_size: int = STATS_SAMPLE_SIZE,
+                refresh: bool = False) -> CollectionProfile:
+    """Return the cached profile of a collection, sampling it again once it is older than STATS_CACHE_TTL."""
+    with _profiles_lock:
+        profile = _profiles.get(collection)
+    if (refresh or profile is None or time.time() - profile.computed_at > STATS_CACHE_TTL
+            or profile.sample_size < sample_size):
+        profile = _sample(collection, count, sample_size)
+        with _profiles_lock:
+            _profiles[collection] = profile
+    return profile
+
+
+def _on_change(event: Dict[str, Any], document: Optional[Dict[str, Any]]):
+    """Fold documents written or removed after the sample into the cached profile."""
+    if event["op"] == "truncate":
+        with _profiles_lock:
+            _profiles.pop(event["collection"], None)
+        return
+    with _profiles_lock:
+        profile = _profiles.get(event["collection"])
+    if profile is None:
+        return
+    if event["op"] == "remove":
+        profile.remove(event["key"])
+    elif document is not None:
+        profile.add(document)
+
+
+change_listeners.append(_on_change)
+
+
+def _index_summary(index: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {
+        "id": index.get("id"),
+        "type": index.get("type"),
+        "fields": index.get("fields"),
+        "unique": index.get("unique", False),
+        "sparse": index.get("sparse", False)
+    }
+    if "selectivity" in index:
+        summary["selectivity"] = index["selectivity"]
+    if "figures" in index:
+        summary["figures"] = index["figures"]
+    return summary
+
+
+@mcp.tool()
+def arango_collection_statistics(collection: str, profile: bool = True, fields: Optional[List[str]] = None,
+                                 sample_size: int = STATS_SAMPLE_SIZE, top_k: int = 5,
+                                 refresh: bool = False) -> Dict[str, Any]:
+    """Describe the size and data shape of a collection.
+
+    Counts, storage figures and index sizes come from the server's
+    collection metadata without reading documents. Field profiles are
+    computed from a uniform random sample, which takes one streamed scan of
+    the collection on the server (only the sampled documents are sent
+    back); it is cached for STATS_CACHE_TTL seconds and kept current with
+    documents written or removed since (when the change feed is running).
+
+    Args:
+        collection: The name of the collection
+        profile: Whether to include per-field profiles
+        fields: Optional attribute paths to report (all profiled paths if not specified)
+        sample_size: Number of documents to sample for the profiles
+        top_k: Number of most frequent values to report per field
+        refresh: Whether to resample even if a cached profile is still fresh
+
+    Returns:
+        Dictionary with the document count, figures, indexes and, if requested,
+        per-field type mix, missing/null ratios, distinct values in the sample, min/max and top values
+    """
+    coll = db.collection(collection)
+    properties = coll.properties()
+    count = coll.count()
+    result = {
+        "collection": collection,
+        "type": properties.get("type"),
+        "count": count,
+        "figures": coll.statistics(),
+        "indexes": [_index_summary(index) for index in coll.indexes(with_stats=True)]
+    }
+    if profile:
+        result["profile"] = get_profile(collection, count, sample_size, refresh).to_dict(top_k, fields)
+    return result
@@ -1,8 +1,18 @@
 from arango import ArangoClient
+from arango.http import DefaultHTTPClient, DefaultHTTPAdapter
+from arango.resolver import HostResolver
+from urllib3.util.retry import Retry
 import os
+import random
+import socket
+import threading
+import time
 import dotenv
 import datetime
-from typing import Dict, Any
+import json
+import re
+import requests
+from typing import Dict, Any, List, Optional, Set, Callable
 from fastmcp import FastMCP
 
 dotenv.load_dotenv()
@@ -11,14 +21,338 @@ dotenv.load_dotenv()
 mcp = FastMCP(name="arango-knowledge-base")
 
 # Get environment variables or use defaults
+# ARANGO_URL may list several coordinators separated by commas
 ARANGO_URL = os.environ.get("ARANGO_URL", "http://arangodb:8529")
-ARANGO_DB = os.environ.get("ARANGO_DB", "knowledge_db").lower() 
-ARANGO_USERNAME = os.environ.get("ARANGO_USERNAME") 
+ARANGO_DB = os.environ.get("ARANGO_DB", "knowledge_db").lower()
+ARANGO_USERNAME = os.environ.get("ARANGO_USERNAME")
 ARANGO_PASSWORD = os.environ.get("ARANGO_PASSWORD")
 
-# Initialize ArangoDB client
-client = ArangoClient(hosts=ARANGO_URL)
-db = client.db(ARANGO_DB, username=ARANGO_USERNAME, password=ARANGO_PASSWORD)
+# Connection tuning
+ARANGO_HOST_RESOLVER = os.environ.get("ARANGO_HOST_RESOLVER", "roundrobin")  # or "leastloaded", "fallback"
+ARANGO_POOL_SIZE = int(os.environ.get("ARANGO_POOL_SIZE", "10"))
+ARANGO_TCP_KEEPALIVE = os.environ.get("ARANGO_TCP_KEEPALIVE", "true").lower() == "true"
+ARANGO_CONNECT_TIMEOUT = float(os.environ.get("ARANGO_CONNECT_TIMEOUT", "5"))
+ARANGO_READ_TIMEOUT = float(os.environ.get("ARANGO_READ_TIMEOUT", "60"))
+ARANGO_RETRY_ATTEMPTS = int(os.environ.get("ARANGO_RETRY_ATTEMPTS", "3"))
+ARANGO_RETRY_BACKOFF = float(os.environ.get("ARANGO_RETRY_BACKOFF", "0.5"))
+ARANGO_RETRY_JITTER = float(os.environ.get("ARANGO_RETRY_JITTER", "0.5"))
+ARANGO_HEALTH_CHECK_INTERVAL = float(os.environ.get("ARANGO_HEALTH_CHECK_INTERVAL", "10"))
+ARANGO_EJECT_AFTER_FAILURES = int(os.environ.get("ARANGO_EJECT_AFTER_FAILURES", "2"))
+
+# Responses that are retried with backoff
+_RETRY_STATUSES = (429, 502, 503, 504)
+
+# AQL keywords that make a query a write, which is never retried
+_AQL_WRITE = re.compile(r"\b(INSERT|UPDATE|REPLACE|REMOVE|UPSERT)\b", re.IGNORECASE)
+
+
+class HostStats:
+    """Request and health counters for one coordinator, updated under its lock."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.lock = threading.Lock()
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.total_time / self.requests * 1000, 2) if self.requests else None,
+            "ejections": self.ejections,
+            "last_check": self.last_check,
+            "last_error": self.last_error
+        }
+
+
+class HealthAwareHostResolver(HostResolver):
+    """Pick a coordinator round-robin, by fewest in-flight requests or the first healthy one, skipping ejected hosts.
+
+    fallback sends everything to the first healthy host in ARANGO_URL order,
+    for standby servers that do not share data with the primary.
+    """
+
+    def __init__(self, hosts: List[HostStats], strategy: str = "roundrobin", max_tries: Optional[int] = None):
+        super().__init__(len(hosts), max_tries)
+        self._hosts = hosts
+        self._strategy = strategy
+        self._index = -1
+        self._lock = threading.Lock()
+
+    def get_host_index(self, indexes_to_filter: Optional[Set[int]] = None) -> int:
+        indexes_to_filter = indexes_to_filter or set()
+        candidates = [i for i, h in enumerate(self._hosts) if h.healthy and i not in indexes_to_filter]
+        if not candidates:
+            # Every host is ejected or already tried: fall back to anything untried
+            candidates = [i for i in range(self.host_count) if i not in indexes_to_filter] or list(range(self.host_count))
+
+        if self._strategy == "fallback":
+            return candidates[0]
+        if self._strategy == "leastloaded":
+            return min(candidates, key=lambda i: (self._hosts[i].in_flight, random.random()))
+
+        with self._lock:
+            for _ in range(self.host_count):
+                self._index = (self._index + 1) % self.host_count
+                if self._index in candidates:
+                    return self._index
+            return candidates[0]
+
+
+# Callbacks run after every request to a coordinator, as observer(method, url, seconds)
+request_observers: List[Callable[[str, str, float], None]] = []
+
+
+class _KeepAliveAdapter(DefaultHTTPAdapter):
+    """HTTP adapter that enables TCP keep-alive on pooled sockets."""
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if ARANGO_TCP_KEEPALIVE:
+            pool_kwargs["socket_options"] = [
+                (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+
+def is_read_only_query(query: str) -> bool:
+    """Whether an AQL query contains no data-modification operation."""
+    return not _AQL_WRITE.search(query)
+
+
+def _is_read_only_cursor(method: str, url: str, data) -> bool:
+    """Whether a request creates a cursor for a query without writes, which is safe to resend."""
+    if method != "post" or not url.endswith("/_api/cursor") or not isinstance(data, str):
+        return False
+    try:
+        query = json.loads(data).get("query", "")
+    except ValueError:
+        return False
+    return is_read_only_query(query)
+
+
+class ManagedHTTPClient(DefaultHTTPClient):
+    """HTTP client with split timeouts, jittered retries for idempotent reads and per-host metrics.
+
+    urllib3 retries GET, HEAD and OPTIONS. AQL reads are POSTs to
+    /_api/cursor, so cursors for queries without writes are retried here;
+    fetching further batches is not, as it advances the server cursor.
+    """
+
+    def __init__(self, hosts: List[HostStats]):
+        super().__init__(
+            request_timeout=(ARANGO_CONNECT_TIMEOUT, ARANGO_READ_TIMEOUT),
+            pool_connections=len(hosts),
+            pool_maxsize=ARANGO_POOL_SIZE,
+        )
+        self._hosts = hosts
+
+    def create_session(self, host: str) -> requests.Session:
+        retry_strategy = Retry(
+            total=ARANGO_RETRY_ATTEMPTS,
+            backoff_factor=ARANGO_RETRY_BACKOFF,
+            backoff_jitter=ARANGO_RETRY_JITTER,
+            status_forcelist=[429, 502, 503, 504],
+            # Only reads are idempotent; writes fail over through the host resolver instead
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+        )
+        http_adapter = _KeepAliveAdapter(
+            connection_timeout=ARANGO_CONNECT_TIMEOUT,
+            pool_connections=len(self._hosts),
+            pool_maxsize=ARANGO_POOL_SIZE,
+            max_retries=retry_strategy,
+        )
+        session = requests.Session()
+        session.mount("https://", http_adapter)
+        session.mount("http://", http_adapter)
+        return session
+
+    def _host_for(self, url: str) -> Optional[HostStats]:
+        for host in self._hosts:
+            if url.startswith(host.url):
+                return host
+        return None
+
+    def send_request(self, session, method, url, headers=None, params=None, data=None, auth=None):
+        host = self._host_for(url)
+        if host is None:
+            return super().send_request(session, method, url, headers, params, data, auth)
+
+        retries = ARANGO_RETRY_ATTEMPTS if _is_read_only_cursor(method, url, data) else 0
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(ARANGO_RETRY_BACKOFF * 2 ** (attempt - 1) + random.uniform(0, ARANGO_RETRY_JITTER))
+            try:
+                response = self._send_once(host, session, method, url, headers, params, data, auth)
+            except requests.exceptions.ConnectionError:
+                if attempt == retries:
+                    raise
+                continue
+            if attempt == retries or response.status_code not in _RETRY_STATUSES:
+                return response
+
+    def _send_once(self, host: HostStats, session, method, url, headers, params, data, auth):
+        with host.lock:
+            host.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return super().send_request(session, method, url, headers, params, data, auth)
+        except requests.exceptions.ConnectionError as e:
+            with host.lock:
+                host.errors += 1
+                host.last_error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with host.lock:
+                host.in_flight -= 1
+                host.requests += 1
+                host.total_time += elapsed
+            for observer in request_observers:
+                observer(method, url, elapsed)
+
+
+class ConnectionManager:
+    """Own the ArangoDB client for one or more coordinators.
+
+    The client and database handle are created on first use, so the server
+    can start while the database is still unavailable. A background thread
+    probes every host and ejects hosts after repeated failures until they
+    answer again.
+    """
+
+    def __init__(self, urls: str, db_name: str, username: Optional[str], password: Optional[str]):
+        self.hosts = [HostStats(url.strip().rstrip("/")) for url in urls.split(",") if url.strip()]
+        self.db_name = db_name
+        # python-arango's defaults, also used by the health probe
+        self.username = username or "root"
+        self.password = password or ""
+        self._client: Optional[ArangoClient] = None
+        self._db = None
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+        self.connected_at: Optional[float] = None
+
+    def client(self) -> ArangoClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = ArangoClient(
+                        hosts=[h.url for h in self.hosts],
+                        host_resolver=HealthAwareHostResolver(self.hosts, ARANGO_HOST_RESOLVER),
+                        http_client=ManagedHTTPClient(self.hosts),
+                    )
+                    self.connected_at = time.time()
+                    self._start_health_checks()
+        return self._client
+
+    def database(self):
+        if self._db is None:
+            client = self.client()
+            with self._lock:
+                if self._db is None:
+                    self._db = client.db(self.db_name, username=self.username, password=self.password)
+        return self._db
+
+    def _probe(self, host: HostStats) -> bool:
+        try:
+            response = requests.get(
+                f"{host.url}/_api/version",
+                auth=(self.username, self.password),
+                timeout=ARANGO_CONNECT_TIMEOUT,
+            )
+            error = None if response.status_code == 200 else f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        with host.lock:
+            host.last_error = error
+            host.last_check = time.time()
+        return error is None
+
+    def check_hosts(self):
+        """Probe every host once, ejecting failing hosts and re-admitting recovered ones."""
+        for host in self.hosts:
+            ok = self._probe(host)
+            with host.lock:
+                if ok:
+                    host.consecutive_failures = 0
+                    host.healthy = True
+                else:
+                    host.consecutive_failures += 1
+                    if host.healthy and host.consecutive_failures >= ARANGO_EJECT_AFTER_FAILURES:
+                        host.healthy = False
+                        host.ejections += 1
+
+    def _health_loop(self):
+        while True:
+            time.sleep(ARANGO_HEALTH_CHECK_INTERVAL)
+            self.check_hosts()
+
+    def _start_health_checks(self):
+        if ARANGO_HEALTH_CHECK_INTERVAL <= 0 or self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name="arango-health", daemon=True)
+        self._health_thread.start()
+
+    def ready(self) -> Dict[str, Any]:
+        """Readiness probe: connect if needed and ask the database for its version."""
+        try:
+            version = self.database().version()
+            return {"ready": True, "version": version}
+        except Exception as e:
+            return {"ready": False, "error": str(e)}
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "connected": self._client is not None,
+            "connected_at": self.connected_at,
+            "resolver": ARANGO_HOST_RESOLVER,
+            "pool_size": ARANGO_POOL_SIZE,
+            "timeouts": {"connect": ARANGO_CONNECT_TIMEOUT, "read": ARANGO_READ_TIMEOUT},
+            "hosts": [h.to_dict() for h in self.hosts]
+        }
+
+
+class _LazyHandle:
+    """Stand-in for a module-level handle that is resolved on first attribute access."""
+
+    def __init__(self, resolve):
+        object.__setattr__(self, "_resolve", resolve)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+
+connection_manager = ConnectionManager(ARANGO_URL, ARANGO_DB, ARANGO_USERNAME, ARANGO_PASSWORD)
+
+# Initialize ArangoDB client (connects lazily on first use)
+client = _LazyHandle(connection_manager.client)
+db = _LazyHandle(connection_manager.database)
+
+# Callbacks run after a tool writes a document, as hook(collection, key, document);
+# document is None when the document was removed
+document_write_hooks: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
+
+
+def notify_document_write(collection: str, key: str, document: Optional[Dict[str, Any]]):
+    """Run the registered write hooks for a changed document."""
+    for hook in document_write_hooks:
+        hook(collection, key, document)
 
 @mcp.tool()
 def add_temporal_metadata(document: Dict[str, Any], is_update: bool = False) -> Dict[str, Any]:
@@ -0,0 +1,351 @@
+from typing import Dict, Any, List, Optional, Iterable
+from collections import defaultdict
+import os
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from .db_connection import db, mcp
+from . import admission
+
+# Edges fetched per cursor batch when exporting an edge collection
+GRAPH_EXPORT_BATCH_SIZE = int(os.environ.get("GRAPH_EXPORT_BATCH_SIZE", "50000"))
+
+# Documents updated per AQL query when writing scores back
+GRAPH_WRITE_BATCH_SIZE = int(os.environ.get("GRAPH_WRITE_BATCH_SIZE", "10000"))
+
+ALGORITHMS = ("pagerank", "components", "degree", "betweenness", "label_propagation")
+
+
+class Graph:
+    """Directed graph with integer vertex ids and a CSR adjacency matrix.
+
+    Row i of adjacency holds the out-edges of vertex ids[i]; parallel edges
+    are summed into the edge weight.
+    """
+
+    def __init__(self, ids: np.ndarray, src: np.ndarray, dst: np.ndarray):
+        self.ids = ids
+        n = len(ids)
+        self.adjacency = sparse.csr_matrix(
+            (np.ones(len(src), dtype=np.float64), (src, dst)), shape=(n, n))
+        self.adjacency.sum_duplicates()
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return self.adjacency.nnz
+
+    @classmethod
+    def from_id_pairs(cls, pairs: List[List[str]]) -> "Graph":
+        """Build a graph from [from, to] document id pairs."""
+        return cls.from_batches([pairs])
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[List[List[str]]]) -> "Graph":
+        """Build a graph from batches of [from, to] document id pairs.
+
+        Ids are numbered as the batches arrive, so only the distinct ids are
+        held as strings and the edges as two int64 arrays. The numbers are
+        then remapped so ids come out sorted, independent of the export order.
+        """
+        codes: Dict[str, int] = {}
+        sources, targets = [], []
+        for batch in batches:
+            sources.append(np.fromiter((codes.setdefault(f, len(codes)) for f, _ in batch), np.int64, len(batch)))
+            targets.append(np.fromiter((codes.setdefault(t, len(codes)) for _, t in batch), np.int64, len(batch)))
+        ids = np.fromiter(codes, dtype=object, count=len(codes))
+        del codes
+        order = np.argsort(ids)
+        rank = np.empty(len(ids), dtype=np.int64)
+        rank[order] = np.arange(len(ids))
+        src = rank[np.concatenate(sources)] if sources else np.empty(0, dtype=np.int64)
+        dst = rank[np.concatenate(targets)] if targets else np.empty(0, dtype=np.int64)
+        return cls(ids[order], src, dst)
+
+    def undirected(self) -> sparse.csr_matrix:
+        return ((self.adjacency + self.adjacency.T) > 0).astype(np.float64).tocsr()
+
+
+def load_graph(edge_collection: str, valid_at: Optional[str] = None) -> Graph:
+    """Export an edge collection in streamed batches into a Graph.
+
+    The export runs under the admission rules of arango_graph_analytics, so
+    large graphs may need a higher max_runtime in TOOL_QUERY_LIMITS.
+
+    Args:
+        edge_collection: The edge collection to export
+        valid_at: Optional timestamp (ISO format); only edges valid at that time
+            whose endpoint vertices (where they exist) are valid then too are kept
+
+    Returns:
+        The graph
+    """
+    bind_vars: Dict[str, Any] = {"@collection": edge_collection}
+    query_parts = ["FOR e IN @@collection"]
+    if valid_at:
+        query_parts.append("FILTER e.valid_from <= @timestamp")
+        query_parts.append("FILTER e.valid_until == null OR e.valid_until >= @timestamp")
+        # Vertices without validity attributes count as always valid
+        for end in ("_from", "_to"):
+            query_parts.append(f"LET v{end} = DOCUMENT(e.{end})")
+            query_parts.append(f"FILTER v{end} == null OR (v{end}.valid_from <= @timestamp AND "
+                               f"(v{end}.valid_until == null OR v{end}.valid_until >= @timestamp))")
+        bind_vars["timestamp"] = valid_at
+    query_parts.append("RETURN [e._from, e._to]")
+
+    cursor = admission.execute(
+        "\n".join(query_parts),
+        bind_vars,
+        tool="arango_graph_analytics",
+        batch_size=GRAPH_EXPORT_BATCH_SIZE,
+        stream=True,
+    )
+    return Graph.from_batches(batched(cursor, GRAPH_EXPORT_BATCH_SIZE))
+
+
+def batched(pairs: Iterable[List[str]], size: int) -> Iterable[List[List[str]]]:
+    """Group streamed [from, to] pairs into lists of at most size pairs."""
+    batch = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def pagerank(graph: Graph, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+    """PageRank by power iteration; rank of dangling vertices is spread uniformly."""
+    n = graph.vertex_count
+    if n == 0:
+        return np.empty(0)
+    out_weight = np.asarray(graph.adjacency.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv_out = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition_t = graph.adjacency.T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = transition_t @ (rank * inv_out)
+        updated = damping * (spread + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(updated - rank).sum() < tol * n:
+            return updated
+        rank = updated
+    return rank
+
+
+def weakly_connected_components(graph: Graph) -> np.ndarray:
+    """Component label of every vertex, ignoring edge direction."""
+    _, labels = csgraph.connected_components(graph.adjacency, directed=True, connection="weak")
+    return labels
+
+
+def degrees(graph: Graph) -> Dict[str, np.ndarray]:
+    in_degree = np.diff(graph.adjacency.tocsc().indptr)
+    out_degree = np.diff(graph.adjacency.indptr)
+    return {"in": in_degree, "out": out_degree, "total": in_degree + out_degree}
+
+
+def approximate_betweenness(graph: Graph, samples: int = 32, seed: int = 0, block: int = 8) -> np.ndarray:
+    """Betweenness centrality estimated from Brandes' accumulation over sampled sources.
+
+    Sources are processed in blocks of columns. Each BFS level and each step
+    of the backward dependency pass multiplies only the adjacency rows of the
+    vertices on the current level, so one block touches every edge about
+    twice instead of once per level. Scores are scaled by n / samples to
+    estimate the exact (unnormalized) values.
+    """
+    n = graph.vertex_count
+    scores = np.zeros(n)
+    if n == 0:
+        return scores
+    adjacency = (graph.adjacency > 0).astype(np.float64).tocsr()
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(samples, n), replace=False)
+
+    for first in range(0, len(sources), block):
+        batch = sources[first:first + block]
+        columns = np.arange(len(batch))
+        sigma = np.zeros((n, len(batch)))
+        sigma[batch, columns] = 1.0
+        depth = np.full((n, len(batch)), -1, dtype=np.int32)
+        depth[batch, columns] = 0
+        levels = [np.unique(batch)]
+        while True:
+            active = levels[-1]
+            frontier = np.where(depth[active] == len(levels) - 1, sigma[active], 0.0)
+            reached = adjacency[active].T @ frontier
+            new = (reached > 0) & (depth < 0)
+            rows = np.flatnonzero(new.any(axis=1))
+            if len(rows) == 0:
+                break
+            depth[new] = len(levels)
+            sigma[new] = reached[new]
+            levels.append(rows)
+
+        delta = np.zeros((n, len(batch)))
+        for level in range(len(levels) - 1, 0, -1):
+            below = levels[level]
+            on_level = depth[below] == level
+            coeff = np.zeros((n, len(batch)))
+            coeff[below] = np.where(on_level, (1.0 + delta[below]) / np.where(on_level, sigma[below], 1.0), 0.0)
+            above = levels[level - 1]
+            dependency = sigma[above] * (adjacency[above] @ coeff)
+            delta[above] = np.where(depth[above] == level - 1, dependency, delta[above])
+        delta[batch, columns] = 0.0
+        scores += delta.sum(axis=1)
+
+    return scores * (n / len(sources))
+
+
+def label_propagation(graph: Graph, max_iter: int = 20, tol: float = 0.001, seed: int = 0) -> np.ndarray:
+    """Community label of every vertex by label propagation on the undirected graph.
+
+    All vertices adopt their neighbourhood's most frequent label at once (their
+    own label counts too, which damps oscillation) until fewer than a tol
+    fraction of them change. Labels start as a random permutation, so breaking
+    ties towards the smallest label is random per seed.
+    """
+    n = graph.vertex_count
+    labels = np.random.default_rng(seed).permutation(n)
+    if n == 0:
+        return labels
+    undirected = (graph.undirected() + sparse.identity(n, format="csr")).tocoo()
+    rows, cols = undirected.row.astype(np.int64), undirected.col
+
+    for _ in range(max_iter):
+        # Count (vertex, neighbour label) pairs with one sort of their combined key
+        keys = np.sort(rows * n + labels[cols])
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        pair_rows, pair_labels = keys[starts] // n, keys[starts] % n
+        row_starts = np.flatnonzero(np.r_[True, pair_rows[1:] != pair_rows[:-1]])
+        best = np.maximum.reduceat(counts, row_starts)
+        candidates = np.flatnonzero(counts == np.repeat(best, np.diff(np.r_[row_starts, len(counts)])))
+        first = candidates[np.r_[True, pair_rows[candidates][1:] != pair_rows[candidates][:-1]]]
+        updated = labels.copy()
+        updated[pair_rows[first]] = pair_labels[first]
+        changed = np.count_nonzero(updated != labels)
+        labels = updated
+        if changed <= tol * n:
+            break
+    return labels
+
+
+def _top(graph: Graph, scores: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return [{"_id": graph.ids[i], "score": float(scores[i])} for i in best]
+
+
+def _groups(labels: np.ndarray, top_k: int) -> Dict[str, Any]:
+    _, sizes = np.unique(labels, return_counts=True)
+    return {"count": int(len(sizes)), "largest_sizes": sorted(sizes.tolist(), reverse=True)[:top_k]}
+
+
+def write_back(graph: Graph, attribute: str, values: np.ndarray) -> int:
+    """Store one value per vertex in the given attribute of the vertex documents.
+
+    Vertices are grouped by collection and updated in batches of
+    GRAPH_WRITE_BATCH_SIZE; vertices whose document no longer exists are skipped.
+
+    Returns:
+        Number of documents updated
+    """
+    by_collection = defaultdict(list)
+    for vertex_id, value in zip(graph.ids, values.tolist()):
+        collection, key = vertex_id.split("/", 1)
+        by_collection[collection].append({"k": key, "v": value})
+
+    updated = 0
+    for collection, entries in by_collection.items():
+        for start in range(0, len(entries), GRAPH_WRITE_BATCH_SIZE):
+            cursor = db.aql.execute(
+                """
+                FOR s IN @scores
+                UPDATE {_key: s.k, [@attribute]: s.v} IN @@collection
+                OPTIONS {ignoreErrors: true, mergeObjects: false}
+                RETURN 1
+                """,
+                bind_vars={
+                    "scores": entries[start:start + GRAPH_WRITE_BATCH_SIZE],
+                    "attribute": attribute,
+                    "@collection": collection
+                },
+            )
+            updated += sum(1 for _ in cursor)
+    return updated
+
+
+@mcp.tool()
+def arango_graph_analytics(edge_collection: str, algorithms: Optional[List[str]] = None,
+                           valid_at: Optional[str] = None, top_k: int = 10,
+                           write_back_prefix: Optional[str] = None,
+                           damping: float = 0.85, betweenness_samples: int = 32) -> Dict[str, Any]:
+    """Run whole-graph analytics on an edge collection.
+
+    The edges are exported once into a sparse matrix and every algorithm
+    runs in memory, so this replaces many single-source traversal calls.
+
+    Args:
+        edge_collection: The edge collection to analyze
+        algorithms: Any of 'pagerank', 'components' (weakly connected), 'degree',
+            'betweenness' (sampled approximation) and 'label_propagation' (all if not specified)
+        valid_at: Optional timestamp (ISO format); only edges valid at that time, between
+            vertices valid at that time, are used
+        top_k: Number of top vertices or largest groups to return per algorithm
+        write_back_prefix: If set, store each result on the vertex documents as
+            <prefix><algorithm>, e.g. 'graph_' gives graph_pagerank
+        damping: PageRank damping factor
+        betweenness_samples: Number of BFS sources sampled for betweenness
+
+    Returns:
+        Dictionary with the counts of vertices (those with at least one edge) and
+        distinct edges, timings and a summary per algorithm
+    """
+    algorithms = list(algorithms or ALGORITHMS)
+    unknown = [a for a in algorithms if a not in ALGORITHMS]
+    if unknown:
+        raise ValueError(f"Unknown algorithms {unknown}, expected any of {', '.join(ALGORITHMS)}")
+
+    start = time.perf_counter()
+    graph = load_graph(edge_collection, valid_at)
+    result: Dict[str, Any] = {
+        "vertices": graph.vertex_count,
+        "edges": graph.edge_count,
+        "timings": {"export": round(time.perf_counter() - start, 3)}
+    }
+
+    for algorithm in algorithms:
+        start = time.perf_counter()
+        if algorithm == "pagerank":
+            values = pagerank(graph, damping=damping)
+            result[algorithm] = {"top": _top(graph, values, top_k)}
+        elif algorithm == "components":
+            values = weakly_connected_components(graph)
+            result[algorithm] = _groups(values, top_k)
+        elif algorithm == "degree":
+            degree = degrees(graph)
+            values = degree["total"]
+            result[algorithm] = {direction: _top(graph, d.astype(np.float64), top_k) for direction, d in degree.items()}
+        elif algorithm == "betweenness":
+            values = approximate_betweenness(graph, samples=betweenness_samples)
+            result[algorithm] = {"top": _top(graph, values, top_k), "samples": min(betweenness_samples, graph.vertex_count)}
+        else:
+            values = label_propagation(graph)
+            result[algorithm] = _groups(values, top_k)
+        result["timings"][algorithm] = round(time.perf_counter() - start, 3)
+
+        if write_back_prefix:
+            start = time.perf_counter()
+            result[algorithm]["written"] = write_back(graph, f"{write_back_prefix}{algorithm}", values)
+            result["timings"][f"write:{algorithm}"] = round(time.perf_counter() - start, 3)
+
+    return result
@@ -1,5 +1,10 @@
 from typing import Dict, Any, List, Optional
-from .db_connection import db, add_temporal_metadata, mcp
+from .db_connection import add_temporal_metadata, mcp
+from .response_limits import projection, pagination, collect_within_budget
+from .cluster_layout import with_shard_keys
+from .retention import archive_for, archives_needed, RETENTION_ARCHIVE_SUFFIX
+from .version_history import versioned_insert
+from . import admission
 
 @mcp.tool()
 def arango_create_edge(edge_collection: str, from_id: str, to_id: str, attributes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -14,12 +19,11 @@ def arango_create_edge(edge_collection: str, from_id: str, to_id: str, attribute
     Returns:
         Dictionary with the edge metadata (_id, _key, etc.)
     """
-    edge_coll = db.collection(edge_collection)
     edge_doc = attributes or {}
     edge_doc["_from"] = from_id
     edge_doc["_to"] = to_id
-    edge_doc = add_temporal_metadata(edge_doc)
-    return edge_coll.insert(edge_doc)
+    edge_doc = add_temporal_metadata(with_shard_keys(edge_collection, edge_doc))
+    return versioned_insert(edge_collection, edge_doc)
 
 @mcp.tool()
 def arango_create_sequential_relationship(edge_collection: str, items: List[str], 
@@ -46,14 +50,18 @@ def arango_create_sequential_relationship(edge_collection: str, items: List[str]
         edge_doc["_to"] = items[i + 1]
         edge_doc["relationship_type"] = relationship_type
         edge_doc["sequence_index"] = i
-        edge_doc = add_temporal_metadata(edge_doc)
-        result = db.collection(edge_collection).insert(edge_doc)
+        edge_doc = add_temporal_metadata(with_shard_keys(edge_collection, edge_doc))
+        result = versioned_insert(edge_collection, edge_doc)
         results.append(result)
     return results
 
 @mcp.tool()
 def arango_query_edges(edge_collection: str, from_id: Optional[str] = None, 
-                      to_id: Optional[str] = None, direction: str = "outbound") -> List[Dict[str, Any]]:
+                      to_id: Optional[str] = None, direction: str = "outbound",
+                      fields: Optional[List[str]] = None,
+                      exclude_fields: Optional[List[str]] = None,
+                      max_response_bytes: Optional[int] = None,
+                      offset: int = 0) -> List[Dict[str, Any]]:
     """Query edges in an edge collection with optional filtering.
     
     Args:
@@ -61,9 +69,13 @@ def arango_query_edges(edge_collection: str, from_id: Optional[str] = None,
         from_id: Optional ID of the source document to filter by
         to_id: Optional ID of the target document to filter by
         direction: Direction of traversal ('outbound', 'inbound', or 'any')
+        fields: Optional edge attributes to return (_id, _key, _from and _to are always included)
+        exclude_fields: Optional edge attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of edges to skip, e.g. the _next_offset of a truncated response
         
     Returns:
-        List of edges matching the query criteria
+        List of edges matching the query criteria, ending with a continuation marker if truncated
     """
     query_parts = [f"FOR edge IN {edge_collection}"]
     bind_vars = {}
@@ -80,41 +92,67 @@ def arango_query_edges(edge_collection: str, from_id: Optional[str] = None,
     if filters:
         query_parts.append("FILTER " + " AND ".join(filters))
     
-    query_parts.append("RETURN edge")
+    query_parts.append(pagination(bind_vars, offset, sort="edge._key"))
+    query_parts.append("RETURN " + projection("edge", bind_vars, fields, exclude_fields))
     query = " ".join(query_parts)
-    cursor = db.aql.execute(query, bind_vars=bind_vars)
-    return [doc for doc in cursor]
+    cursor = admission.execute(query, bind_vars, tool="arango_query_edges")
+    return collect_within_budget(cursor, max_response_bytes, offset)
+
+def _traversal_result(bind_vars: Dict[str, Any], fields: Optional[List[str]],
+                      exclude_fields: Optional[List[str]], vertex: str = "v") -> str:
+    """Build the projected RETURN object shared by the traversal tools.
+
+    Path vertices are null where a vertex is missing, so every projection is null-safe.
+    """
+    return f"""{{
+            "vertex": {projection(vertex, bind_vars, fields, exclude_fields, nullable=True)},
+            "edge": {projection("e", bind_vars, fields, exclude_fields, nullable=True)},
+            "path": p.vertices[* RETURN {projection("CURRENT", bind_vars, fields, exclude_fields, nullable=True)}]
+        }}"""
 
 @mcp.tool()
 def arango_traverse_graph(start_vertex: str, edge_collection: str, min_depth: int = 1, 
-                         max_depth: int = 1, direction: str = "outbound") -> List[Dict[str, Any]]:
+                         max_depth: int = 1, direction: str = "outbound",
+                         fields: Optional[List[str]] = None,
+                         exclude_fields: Optional[List[str]] = None,
+                         max_response_bytes: Optional[int] = None,
+                         offset: int = 0) -> List[Dict[str, Any]]:
     """Traverse a graph starting from a vertex.
     
     Args:
         start_vertex: The ID of the starting vertex
         edge_collection: The name of the edge collection to traverse
         min_depth: Minimum traversal depth
-        max_depth: Maximum traversal depth
+        max_depth: Maximum traversal depth; deeper than MAX_TRAVERSAL_DEPTH is rejected
         direction: Direction of traversal ('outbound', 'inbound', or 'any')
+        fields: Optional attributes to return for vertices, edges and path vertices
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of results to skip, e.g. the _next_offset of a truncated response;
+            pages follow the traversal order, which is the same while the graph is unchanged
         
     Returns:
         List of traversal results including vertices, edges, and paths
     """
+    admission.check_depth(max_depth)
+    bind_vars = {"start_vertex": start_vertex}
     query = f"""
     FOR v, e, p IN {min_depth}..{max_depth} {direction} @start_vertex {edge_collection}
-        RETURN {{
-            "vertex": v,
-            "edge": e,
-            "path": p.vertices
-        }}
+        {pagination(bind_vars, offset)}
+        RETURN {_traversal_result(bind_vars, fields, exclude_fields)}
     """
-    cursor = db.aql.execute(query, bind_vars={"start_vertex": start_vertex})
-    return [doc for doc in cursor]
+    # Streamed, so the traversal stops once the response budget is spent
+    cursor = admission.execute(query, bind_vars, tool="arango_traverse_graph", stream=True)
+    return collect_within_budget(cursor, max_response_bytes, offset)
 
 @mcp.tool()
 def arango_temporal_traverse(start_vertex: str, edge_collection: str, timestamp: str,
                            min_depth: int = 1, max_depth: int = 1, 
-                           direction: str = "outbound") -> List[Dict[str, Any]]:
+                           direction: str = "outbound",
+                           fields: Optional[List[str]] = None,
+                           exclude_fields: Optional[List[str]] = None,
+                           max_response_bytes: Optional[int] = None,
+                           offset: int = 0) -> List[Dict[str, Any]]:
     """Traverse a graph considering the temporal validity of vertices and edges.
     
     Args:
@@ -122,26 +160,55 @@ def arango_temporal_traverse(start_vertex: str, edge_collection: str, timestamp:
         edge_collection: The name of the edge collection to traverse
         timestamp: The timestamp for which edges and vertices should be valid
         min_depth: Minimum traversal depth
-        max_depth: Maximum traversal depth 
+        max_depth: Maximum traversal depth; deeper than MAX_TRAVERSAL_DEPTH is rejected
         direction: Direction of traversal ('outbound', 'inbound', or 'any')
+        fields: Optional attributes to return for vertices, edges and path vertices
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of results to skip, e.g. the _next_offset of a truncated response;
+            pages follow the traversal order, which is the same while the graph is unchanged
         
     Returns:
         List of temporally valid traversal results including vertices, edges, and paths
     """
+    admission.check_depth(max_depth)
+    bind_vars = {
+        "start_vertex": start_vertex,
+        "timestamp": timestamp
+    }
+    edge_archive = archive_for(edge_collection, timestamp)
+    if edge_archive is not None or archives_needed(timestamp):
+        # Archived vertices are looked up by key in <collection>_archive when the hot copy is gone
+        # With direction any, the endpoint is the end of e that is not the previous vertex; if
+        # that vertex is archived (null in p.vertices) it is the end e shares with the previous edge
+        previous = """NOT_NULL(p.vertices[-2]._id, LENGTH(p.edges) == 1 ? @start_vertex :
+            (e._from IN [p.edges[-2]._from, p.edges[-2]._to] ? e._from : e._to))"""
+        endpoint = {"outbound": "e._to", "inbound": "e._from"}.get(
+            direction.lower(), f"(e._from == {previous} ? e._to : e._from)")
+        bind_vars["archive_suffix"] = RETENTION_ARCHIVE_SUFFIX
+        edge_collections = ", ".join(filter(None, [edge_collection, edge_archive]))
+        query = f"""
+    FOR v, e, p IN {min_depth}..{max_depth} {direction} @start_vertex {edge_collections}
+        LET endpoint = PARSE_IDENTIFIER({endpoint})
+        LET vertex = v != null ? v : DOCUMENT(CONCAT(endpoint.collection, @archive_suffix, "/", endpoint.key))
+        FILTER e.valid_from <= @timestamp
+        FILTER e.valid_until == null OR e.valid_until >= @timestamp
+        FILTER vertex.valid_from <= @timestamp
+        FILTER vertex.valid_until == null OR vertex.valid_until >= @timestamp
+        {pagination(bind_vars, offset)}
+        RETURN {_traversal_result(bind_vars, fields, exclude_fields, vertex="vertex")}
+    """
+        cursor = admission.execute(query, bind_vars, tool="arango_temporal_traverse", stream=True)
+        return collect_within_budget(cursor, max_response_bytes, offset)
+
     query = f"""
     FOR v, e, p IN {min_depth}..{max_depth} {direction} @start_vertex {edge_collection}
         FILTER e.valid_from <= @timestamp
         FILTER e.valid_until == null OR e.valid_until >= @timestamp
         FILTER v.valid_from <= @timestamp
         FILTER v.valid_until == null OR v.valid_until >= @timestamp
-        RETURN {{
-            "vertex": v,
-            "edge": e,
-            "path": p.vertices
-        }}
+        {pagination(bind_vars, offset)}
+        RETURN {_traversal_result(bind_vars, fields, exclude_fields)}
     """
-    cursor = db.aql.execute(query, bind_vars={
-        "start_vertex": start_vertex,
-        "timestamp": timestamp
-    })
-    return [doc for doc in cursor] 
\ No newline at end of file
+    cursor = admission.execute(query, bind_vars, tool="arango_temporal_traverse", stream=True)
+    return collect_within_budget(cursor, max_response_bytes, offset)
@@ -0,0 +1,404 @@
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import csv
+import functools
+import gzip
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from .db_connection import db, add_temporal_metadata, mcp
+from .version_history import is_versioned, versioned_write
+
+# Documents sent per /_api/import request
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "5000"))
+
+# Parallel import requests per job
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", "4"))
+
+# Directory holding the progress checkpoints of resumable imports
+IMPORT_STATE_DIR = os.environ.get("IMPORT_STATE_DIR", os.path.join(tempfile.gettempdir(), "arango-mcp-imports"))
+
+# Finished jobs kept for arango_import_status
+IMPORT_JOB_HISTORY = int(os.environ.get("IMPORT_JOB_HISTORY", "50"))
+
+# Rejected rows kept per job for reporting
+IMPORT_MAX_REJECTED_SAMPLES = 100
+
+# Tool modes mapped to the onDuplicate behaviour of /_api/import
+_ON_DUPLICATE = {"insert": "error", "update": "update", "replace": "replace", "ignore": "ignore"}
+
+# Tool modes mapped to the overwriteMode of the document API, used for versioned collections
+_OVERWRITE_MODE = {"insert": None, "update": "update", "replace": "replace", "ignore": "ignore"}
+
+# Document attributes that are always strings, so their CSV cells are never converted
+_KEY_FIELDS = ("_key", "_from", "_to")
+
+# Modes that may write to existing documents, which keep their creation metadata
+_UPDATE_MODES = ("update", "replace")
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _checkpoint_path(path: str, collection: str) -> str:
+    """Checkpoint file of an import of path into collection, inside IMPORT_STATE_DIR."""
+    digest = hashlib.sha1(f"{os.path.abspath(path)}\0{collection}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(IMPORT_STATE_DIR, f"{os.path.basename(path)}.{digest}.json")
+
+
+def _convert(value: str) -> Any:
+    """Give CSV cells their natural JSON type.
+
+    Cells that Python would read as nan, inf or with digit separators
+    (1_000) stay strings, as JSON has no such numbers.
+    """
+    if value == "":
+        return None
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if "_" in value:
+        return value
+    for cast in (int, float):
+        try:
+            number = cast(value)
+        except ValueError:
+            continue
+        return number if math.isfinite(number) else value
+    return value
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} is not a JSON number")
+
+
+def _read_jsonl(f, offset: int) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (end offset, document, error) for every non-empty line after offset."""
+    f.seek(offset)
+    position = offset
+    for line in f:
+        position += len(line)
+        if not line.strip():
+            continue
+        try:
+            doc = json.loads(line, parse_constant=_reject_constant)
+        except ValueError as e:
+            yield position, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(doc, dict):
+            yield position, None, "line is not a JSON object"
+            continue
+        yield position, doc, None
+
+
+def _read_csv(f, offset: int, text_columns=_KEY_FIELDS) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (end offset, document, error) for every CSV record after offset.
+
+    Lines are fed to the csv reader one at a time so the byte offset after
+    each record is known even when quoted cells span several lines. Cells
+    of text_columns are kept as strings, so a _key of 007 stays "007".
+    """
+    header_line = f.readline()
+    header = next(csv.reader([header_line.decode("utf-8")]))
+    f.seek(max(offset, len(header_line)))
+    consumed = [max(offset, len(header_line))]
+
+    def lines():
+        for line in f:
+            consumed[0] += len(line)
+            yield line.decode("utf-8")
+
+    for row in csv.reader(lines()):
+        if not row:
+            continue
+        if len(row) != len(header):
+            yield consumed[0], None, f"expected {len(header)} columns, got {len(row)}"
+            continue
+        yield consumed[0], {
+            name: (value if name in text_columns else _convert(value)) for name, value in zip(header, row)
+        }, None
+
+
+class ImportJob:
+    """One streaming import, run on a background thread."""
+
+    def __init__(self, path: str, collection: str, format: str, mode: str,
+                 field_map: Dict[str, str], from_prefix: Optional[str], to_prefix: Optional[str],
+                 start_offset: int, checkpoint_path: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.collection = collection
+        self.format = format
+        self.mode = mode
+        self.field_map = field_map
+        self.from_prefix = from_prefix
+        self.to_prefix = to_prefix
+        self.start_offset = start_offset
+        # Jobs without a checkpoint are not resumable
+        self.checkpoint_path = checkpoint_path
+        self.versioned = is_versioned(collection)
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.committed_offset = start_offset
+        self.total_bytes = os.path.getsize(path) if not path.endswith(".gz") else None
+        self.counters = {"read": 0, "created": 0, "updated": 0, "ignored": 0, "rejected": 0}
+        self.rejected: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"arango-import-{self.id}", daemon=True)
+
+    def _sample(self, offset: int, reason: str):
+        if len(self.rejected) < IMPORT_MAX_REJECTED_SAMPLES:
+            self.rejected.append({"offset": offset, "error": reason})
+
+    def _prepare(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        for source, target in self.field_map.items():
+            if source in doc:
+                value = doc.pop(source)
+                doc[target] = str(value) if target in _KEY_FIELDS and value is not None else value
+        # Update and replace only set updated_at, so existing documents keep created_at and valid_from
+        return add_temporal_metadata(doc, is_update=self.mode in _UPDATE_MODES)
+
+    def _chunks(self) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        if self.format == "csv":
+            # Columns mapped onto _key, _from or _to are kept as text as well
+            text_columns = set(_KEY_FIELDS) | {s for s, t in self.field_map.items() if t in _KEY_FIELDS}
+            reader = functools.partial(_read_csv, text_columns=text_columns)
+        else:
+            reader = _read_jsonl
+        with _open(self.path) as f:
+            chunk = []
+            end = self.start_offset
+            for end, doc, error in reader(f, self.start_offset):
+                if error is None:
+                    doc = self._prepare(doc)
+                    if self.checkpoint_path is not None and doc.get("_key") is None:
+                        # A resumed run re-sends the chunks after the checkpoint, which would insert these twice
+                        error = "resumable imports need a _key on every record (map one with field_map or pass resumable=False)"
+                with self.lock:
+                    self.counters["read"] += 1
+                    if error is not None:
+                        self.counters["rejected"] += 1
+                        self._sample(end, error)
+                        continue
+                chunk.append(doc)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    yield end, chunk
+                    chunk = []
+            if chunk:
+                yield end, chunk
+
+    def _send(self, end: int, chunk: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        if self.versioned:
+            return end, self._send_versioned(chunk)
+        result = db.collection(self.collection).import_bulk(
+            chunk,
+            halt_on_error=False,
+            details=True,
+            from_prefix=self.from_prefix,
+            to_prefix=self.to_prefix,
+            on_duplicate=_ON_DUPLICATE[self.mode],
+        )
+        return end, result
+
+    def _send_versioned(self, chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Write a chunk through the document API, which returns the old and new versions to record."""
+        for doc in chunk:
+            # /_api/import applies the prefixes server-side
+            for attribute, prefix in (("_from", self.from_prefix), ("_to", self.to_prefix)):
+                if prefix and isinstance(doc.get(attribute), str) and "/" not in doc[attribute]:
+                    doc[attribute] = f"{prefix}/{doc[attribute]}"
+
+        def write(coll):
+            results = coll.insert_many(chunk, return_new=True, return_old=True,
+                                       overwrite_mode=_OVERWRITE_MODE[self.mode])
+            result = {"created": 0, "updated": 0, "ignored": 0, "errors": 0, "details": []}
+            writes = []
+            for item in results:
+                if not isinstance(item, dict):
+                    result["errors"] += 1
+                    result["details"].append(str(item))
+                elif "new" not in item:
+                    result["ignored"] += 1
+                else:
+                    result["updated" if "old" in item else "created"] += 1
+                    writes.append((item["_key"], item.get("old"), item["new"]))
+            return result, writes
+
+        return versioned_write(self.collection, write)
+
+    def _record(self, end: int, result: Dict[str, Any]):
+        with self.lock:
+            self.counters["created"] += result.get("created", 0)
+            self.counters["updated"] += result.get("updated", 0)
+            self.counters["ignored"] += result.get("ignored", 0)
+            self.counters["rejected"] += result.get("errors", 0)
+            # Server-side details refer to positions within the chunk ending at end
+            for detail in result.get("details", []):
+                self._sample(end, detail)
+
+    def _checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        # Replace the checkpoint atomically so a crash never leaves a truncated file behind
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"path": self.path, "collection": self.collection, "offset": self.committed_offset}, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _run(self):
+        # Chunks can finish out of order; only the end of the longest finished
+        # prefix of chunks is safe to resume from
+        pending = {}
+        finished = set()
+        order: List[int] = []
+        try:
+            with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as pool:
+                for end, chunk in self._chunks():
+                    # Bound in-flight chunks to keep memory constant
+                    while len(pending) >= IMPORT_WORKERS * 2:
+                        self._collect(pending, finished, order, wait(pending, return_when=FIRST_COMPLETED).done)
+                    order.append(end)
+                    pending[pool.submit(self._send, end, chunk)] = end
+                while pending:
+                    self._collect(pending, finished, order, wait(pending, return_when=FIRST_COMPLETED).done)
+            self.status = "completed"
+            if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    def _collect(self, pending, finished, order, done):
+        for future in done:
+            end = pending.pop(future)
+            self._record(*future.result())
+            finished.add(end)
+        while order and order[0] in finished:
+            self.committed_offset = order.pop(0)
+            finished.discard(self.committed_offset)
+        self._checkpoint()
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        with self.lock:
+            counters = dict(self.counters)
+            rejected = list(self.rejected)
+        written = counters["created"] + counters["updated"] + counters["ignored"]
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "path": self.path,
+            "collection": self.collection,
+            **counters,
+            "docs_per_second": round(written / elapsed, 1) if elapsed > 0 else None,
+            "elapsed_seconds": round(elapsed, 2),
+            "resume_offset": self.committed_offset,
+            "total_bytes": self.total_bytes,
+            "rejected_samples": rejected
+        }
+
+
+_jobs: Dict[str, ImportJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def _remember(job: ImportJob):
+    """Register a job, evicting the jobs that finished longest ago beyond IMPORT_JOB_HISTORY."""
+    with _jobs_lock:
+        _jobs[job.id] = job
+        finished = sorted((j for j in _jobs.values() if j.finished_at is not None), key=lambda j: j.finished_at)
+        for old in finished[:max(0, len(finished) - IMPORT_JOB_HISTORY)]:
+            del _jobs[old.id]
+
+
+@mcp.tool()
+def arango_import_file(path: str, collection: str, format: Optional[str] = None, mode: str = "insert",
+                       field_map: Optional[Dict[str, str]] = None,
+                       from_prefix: Optional[str] = None, to_prefix: Optional[str] = None,
+                       start_offset: Optional[int] = None, wait_for_completion: bool = False,
+                       resumable: bool = True) -> Dict[str, Any]:
+    """Stream a JSONL or CSV file (optionally gzipped) into a collection in the background.
+
+    Records get temporal metadata and are sent in chunks of IMPORT_CHUNK_SIZE
+    through /_api/import by IMPORT_WORKERS parallel workers; chunks for a
+    versioned collection go through the document API instead, so every
+    created or changed document is recorded in its history. Progress of
+    resumable imports is checkpointed in IMPORT_STATE_DIR, so a crashed
+    import resumes where it stopped; their records need a _key, and mode
+    'replace' or 'ignore' makes resumed chunks idempotent. In 'update' and
+    'replace' mode records only get updated_at, not created_at or valid_from.
+
+    Args:
+        path: Path of the file on the server (.jsonl, .json, .csv, optionally .gz)
+        collection: The name of the target document or edge collection
+        format: 'jsonl' or 'csv' (detected from the file name if not specified)
+        mode: What to do with existing keys: 'insert' (reject), 'update', 'replace' or 'ignore'
+        field_map: Optional renames from file fields to document attributes, e.g. {"id": "_key", "src": "_from"}
+        from_prefix: Optional collection name prefixed to _from values that are plain keys
+        to_prefix: Optional collection name prefixed to _to values that are plain keys
+        start_offset: Byte offset to start from (defaults to the checkpoint of a previous run, else 0)
+        wait_for_completion: Whether to block until the import has finished
+        resumable: Whether to checkpoint progress; records without a _key are rejected
+            unless this is False, as resuming would insert them twice
+
+    Returns:
+        Import report with the job_id, status, counters, docs/s and resume_offset
+    """
+    if mode not in _ON_DUPLICATE:
+        raise ValueError(f"Unsupported mode '{mode}', expected one of {', '.join(_ON_DUPLICATE)}")
+    name = path[:-3] if path.endswith(".gz") else path
+    format = (format or ("csv" if name.endswith(".csv") else "jsonl")).lower()
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"Unsupported format '{format}', expected 'jsonl' or 'csv'")
+    if not os.path.exists(path):
+        raise ValueError(f"File {path} not found")
+
+    checkpoint_path = None
+    if resumable:
+        os.makedirs(IMPORT_STATE_DIR, exist_ok=True)
+        checkpoint_path = _checkpoint_path(path, collection)
+    if start_offset is None:
+        start_offset = 0
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("path") == path and checkpoint.get("collection") == collection:
+                start_offset = checkpoint["offset"]
+
+    job = ImportJob(path, collection, format, mode, field_map or {}, from_prefix, to_prefix,
+                    start_offset, checkpoint_path)
+    _remember(job)
+    job.thread.start()
+    if wait_for_completion:
+        job.thread.join()
+    return job.report()
+
+
+@mcp.tool()
+def arango_import_status(job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Report the progress of file imports.
+
+    Args:
+        job_id: Optional job to report on (all jobs of this server process if not specified)
+
+    Returns:
+        List of import reports
+    """
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    if job_id is not None:
+        jobs = [job for job in jobs if job.id == job_id]
+        if not jobs:
+            raise ValueError(f"Import job {job_id} not found; only the last {IMPORT_JOB_HISTORY} finished jobs are kept")
+    return [job.report() for job in jobs]
@@ -0,0 +1,466 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict, defaultdict, deque
+import hashlib
+import os
+import queue
+import threading
+import time
+from .db_connection import db, mcp
+from . import admission
+
+# Watch tool queries and explain them in the background
+INDEX_ADVISOR_ENABLED = os.environ.get("INDEX_ADVISOR_ENABLED", "true").lower() == "true"
+
+# Distinct query shapes whose explain results are kept
+INDEX_ADVISOR_MAX_SHAPES = int(os.environ.get("INDEX_ADVISOR_MAX_SHAPES", "1000"))
+
+# Indexes applied by the advisor that are kept for the latency report
+INDEX_ADVISOR_MAX_APPLIED = int(os.environ.get("INDEX_ADVISOR_MAX_APPLIED", "100"))
+
+# Queries observed on a collection before its indexes may be reported as unused
+INDEX_ADVISOR_MIN_QUERIES = int(os.environ.get("INDEX_ADVISOR_MIN_QUERIES", "50"))
+
+# Fraction of the full-scan time an index lookup is assumed to keep at best
+_MIN_SELECTIVITY = 0.01
+
+# TRI_EDGE_IN / TRI_EDGE_OUT in traversal plan nodes
+_INBOUND, _OUTBOUND = 1, 2
+
+_EQUALITY_OPERATORS = ("compare ==", "compare in")
+_RANGE_OPERATORS = ("compare <", "compare <=", "compare >", "compare >=")
+
+
+def _attribute_path(node: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    """Return (variable id, index field path) for an attribute access chain, e.g. (0, 'tags[*].name')."""
+    kind = node.get("type")
+    if kind == "reference":
+        return node.get("id"), ""
+    if kind == "attribute access":
+        inner = _attribute_path(node["subNodes"][0])
+        if inner is None:
+            return None
+        return inner[0], f"{inner[1]}.{node['name']}" if inner[1] else node["name"]
+    if kind == "indexed access":
+        # p.edges[0].x is treated like p.edges[*].x
+        inner = _attribute_path(node["subNodes"][0])
+        return None if inner is None else (inner[0], inner[1] + "[*]")
+    if kind == "expansion":
+        iterator = node["subNodes"][0]
+        inner = _attribute_path(iterator["subNodes"][1])
+        if inner is None:
+            return None
+        path = inner[1] + "[*]"
+        projection = node["subNodes"][1] if len(node["subNodes"]) > 1 else None
+        if projection is not None and projection.get("type") == "attribute access":
+            projected = _attribute_path(projection)
+            if projected is not None and projected[1]:
+                path = f"{path}.{projected[1]}"
+        return inner[0], path
+    return None
+
+
+def _comparisons(node: Dict[str, Any], found: List[Tuple[str, int, str]]):
+    """Collect (operator class, variable id, path) for every comparison in an expression tree."""
+    kind = node.get("type", "")
+    sub_nodes = node.get("subNodes", [])
+    if kind.startswith("compare") or kind.startswith("array compare"):
+        operator = kind.replace("array ", "")
+        left = _attribute_path(sub_nodes[0]) if sub_nodes else None
+        right = _attribute_path(sub_nodes[1]) if len(sub_nodes) > 1 else None
+        if operator == "compare in" and left is None and right is not None:
+            # "value IN doc.tags" is served by an array index on tags[*]
+            found.append(("array", right[0], right[1] + "[*]"))
+        elif left is not None and right is None:
+            found.append(("eq" if operator in _EQUALITY_OPERATORS else
+                          "range" if operator in _RANGE_OPERATORS else "other", left[0], left[1]))
+        elif right is not None and left is None:
+            found.append(("eq" if operator in _EQUALITY_OPERATORS else
+                          "range" if operator in _RANGE_OPERATORS else "other", right[0], right[1]))
+    for sub_node in sub_nodes:
+        _comparisons(sub_node, found)
+
+
+def _plan_indexes(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    indexes = node.get("indexes", [])
+    if isinstance(indexes, dict):
+        indexes = indexes.get("base", []) + [i for level in indexes.get("levels", {}).values() for i in level]
+    return indexes
+
+
+def analyze_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract index candidates and used indexes from an explain plan.
+
+    Returns:
+        Dictionary with 'candidates' as (collection, type, fields) tuples for
+        full scans and unindexed traversal filters, the ids of 'used' indexes
+        and the 'collections' the query reads
+    """
+    nodes = plan.get("nodes", [])
+    scans: Dict[int, str] = {}
+    edges: Dict[int, Tuple[List[str], List[int]]] = {}
+    paths: Dict[int, Tuple[List[str], List[int]]] = {}
+    calculations: Dict[int, Dict[str, Any]] = {}
+    used = set()
+    touched = set()
+    conditions: List[Tuple[str, int, str]] = []
+    sorts: List[Tuple[int, str]] = []
+
+    for node in nodes:
+        kind = node.get("type")
+        if kind == "EnumerateCollectionNode":
+            scans[node["outVariable"]["id"]] = node["collection"]
+            touched.add(node["collection"])
+            if node.get("filter"):
+                _comparisons(node["filter"], conditions)
+        elif kind == "CalculationNode":
+            calculations[node["outVariable"]["id"]] = node["expression"]
+            _comparisons(node["expression"], conditions)
+        elif kind == "SortNode":
+            for element in node.get("elements", []):
+                expression = calculations.get(element["inVariable"]["id"])
+                path = _attribute_path(expression) if expression else None
+                if path is not None:
+                    sorts.append(path)
+        elif kind == "TraversalNode":
+            collections = node.get("edgeCollections", [])
+            touched.update(collections)
+            directions = node.get("directions", [])
+            if node.get("edgeOutVariable"):
+                edges[node["edgeOutVariable"]["id"]] = (collections, directions)
+            if node.get("pathOutVariable"):
+                paths[node["pathOutVariable"]["id"]] = (collections, directions)
+            for key in ("condition", "expression"):
+                if isinstance(node.get(key), dict):
+                    _comparisons(node[key], conditions)
+        if kind == "IndexNode":
+            touched.add(node["collection"])
+        if kind in ("IndexNode", "TraversalNode"):
+            # Plans name indexes by their bare id, collection.indexes() by collection/id
+            used.update(str(index.get("id")).split("/")[-1] for index in _plan_indexes(node))
+
+    candidates = set()
+    equality: Dict[int, List[str]] = defaultdict(list)
+    ranges: Dict[int, List[str]] = defaultdict(list)
+    for operator, var, path in conditions:
+        if var in scans and path and not path.startswith("_"):
+            if operator == "array" or "[*]" in path:
+                candidates.add((scans[var], "array", (path,)))
+            elif operator == "eq":
+                equality[var].append(path)
+            elif operator == "range":
+                ranges[var].append(path)
+        elif operator in ("eq", "range") and (var in edges or var in paths):
+            collections, directions = edges.get(var) or paths[var]
+            if var in paths:
+                if not path.startswith("edges[*]."):
+                    continue
+                path = path[len("edges[*]."):]
+            if path.startswith("_") or "[*]" in path:
+                continue
+            for collection in collections:
+                for direction in set(directions) or {_OUTBOUND}:
+                    sides = ["_to"] if direction == _INBOUND else ["_from"] if direction == _OUTBOUND else ["_from", "_to"]
+                    for side in sides:
+                        candidates.add((collection, "vertex-centric", (side, path)))
+
+    for var, collection in scans.items():
+        fields = sorted(set(equality[var]))
+        if ranges[var]:
+            fields.append(ranges[var][0])
+        else:
+            fields += [path for sort_var, path in sorts[:1] if sort_var == var and path not in fields]
+        if fields:
+            candidates.add((collection, "persistent", tuple(fields)))
+
+    return {"candidates": sorted(candidates), "used": sorted(used), "collections": sorted(touched)}
+
+
+class _Candidate:
+    def __init__(self, collection: str, kind: str, fields: Tuple[str, ...]):
+        self.collection = collection
+        self.kind = kind
+        self.fields = fields
+        self.id = hashlib.sha1(f"{collection}|{kind}|{fields}".encode()).hexdigest()[:10]
+        self.queries = 0
+        self.total_seconds = 0.0
+        self.scanned = 0
+        self.returned = 0
+        self.shapes = set()
+
+    def selectivity(self) -> float:
+        if not self.scanned:
+            return 1.0
+        return min(1.0, max(_MIN_SELECTIVITY, self.returned / self.scanned))
+
+    def to_dict(self) -> Dict[str, Any]:
+        avg = self.total_seconds / self.queries if self.queries else 0.0
+        expected = avg * self.selectivity()
+        return {
+            "id": self.id,
+            "collection": self.collection,
+            "type": self.kind,
+            "fields": list(self.fields),
+            "queries": self.queries,
+            "avg_ms": round(avg * 1000, 2),
+            "expected_ms": round(expected * 1000, 2),
+            "estimated_savings_ms": round((avg - expected) * self.queries * 1000, 1)
+        }
+
+
+class IndexAdvisor:
+    """Collect index candidates from explain plans of the queries tools run.
+
+    Observed queries are queued and explained once per query shape on a
+    background thread, so watching adds only a queue put to each tool call.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue: "queue.Queue" = queue.Queue(maxsize=1000)
+        self.shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.candidates: Dict[Tuple, _Candidate] = {}
+        self.index_uses: Dict[str, int] = defaultdict(int)
+        self.collection_queries: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+        self.applied: "deque[Dict[str, Any]]" = deque(maxlen=INDEX_ADVISOR_MAX_APPLIED)
+        self.observed = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self.started_at = time.time()
+        self._thread: Optional[threading.Thread] = None
+
+    def observe(self, query: str, bind_vars: Dict[str, Any], tool: Optional[str], seconds: float, cursor):
+        stats = cursor.statistics() if hasattr(cursor, "statistics") else None
+        try:
+            self.queue.put_nowait((query, dict(bind_vars), seconds, stats or {}, time.time()))
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            with self.lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="arango-index-advisor", daemon=True)
+                    self._thread.start()
+
+    @staticmethod
+    def _shape(query: str, bind_vars: Dict[str, Any]) -> str:
+        # Collection bind parameters change the plan, value bind parameters don't
+        collections = sorted((k, v) for k, v in bind_vars.items() if k.startswith("@"))
+        return hashlib.sha1(f"{query}|{collections}".encode()).hexdigest()
+
+    def _analysis(self, shape: str, query: str, bind_vars: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            if shape in self.shapes:
+                self.shapes.move_to_end(shape)
+                return self.shapes[shape]
+        analysis = analyze_plan(db.aql.explain(query, bind_vars=bind_vars))
+        with self.lock:
+            self.shapes[shape] = analysis
+            while len(self.shapes) > INDEX_ADVISOR_MAX_SHAPES:
+                evicted, _ = self.shapes.popitem(last=False)
+                self.latencies.pop(evicted, None)
+                for candidate in self.candidates.values():
+                    candidate.shapes.discard(evicted)
+        return analysis
+
+    def _record(self, query: str, bind_vars: Dict[str, Any], seconds: float, stats: Dict[str, Any], at: float):
+        shape = self._shape(query, bind_vars)
+        analysis = self._analysis(shape, query, bind_vars)
+        seconds = stats.get("execution_time", seconds)
+        with self.lock:
+            self.observed += 1
+            self.latencies[shape].append((at, seconds))
+            for index_id in analysis["used"]:
+                self.index_uses[index_id] += 1
+            for collection in analysis["collections"]:
+                self.collection_queries[collection] += 1
+            for key in analysis["candidates"]:
+                candidate = self.candidates.get(key)
+                if candidate is None:
+                    candidate = self.candidates[key] = _Candidate(*key)
+                candidate.queries += 1
+                candidate.total_seconds += seconds
+                candidate.scanned += stats.get("scanned_full", 0)
+                candidate.returned += max(0, stats.get("scanned_full", 0) - stats.get("filtered", 0))
+                candidate.shapes.add(shape)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                self._record(*item)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def _covered(self, candidate: _Candidate, indexes: List[Dict[str, Any]]) -> bool:
+        """Whether an existing index already starts with the candidate's fields."""
+        for index in indexes:
+            fields = tuple(index.get("fields", []))
+            if fields[:len(candidate.fields)] == candidate.fields:
+                return True
+        return False
+
+    def recommendations(self, collection: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        with self.lock:
+            candidates = [c for c in self.candidates.values() if collection is None or c.collection == collection]
+        indexes = {}
+        result = []
+        for candidate in sorted(candidates, key=lambda c: -c.to_dict()["estimated_savings_ms"]):
+            if candidate.collection not in indexes:
+                indexes[candidate.collection] = db.collection(candidate.collection).indexes()
+            if not self._covered(candidate, indexes[candidate.collection]):
+                result.append(candidate.to_dict())
+            if len(result) >= limit:
+                break
+        return result
+
+    def unused_indexes(self, collections: List[str]) -> List[Dict[str, Any]]:
+        result = []
+        for name in collections:
+            with self.lock:
+                queries = self.collection_queries.get(name, 0)
+            if queries < INDEX_ADVISOR_MIN_QUERIES:
+                continue
+            for index in db.collection(name).indexes():
+                if index["type"] in ("primary", "edge"):
+                    continue
+                index_id = str(index["id"])
+                with self.lock:
+                    uses = self.index_uses.get(index_id.split("/")[-1], 0)
+                if uses == 0:
+                    result.append({"collection": name, "id": index_id, "type": index["type"],
+                                   "fields": index.get("fields"), "observed_queries": queries})
+        return result
+
+    def _latency_since(self, shapes: List[str], since: float, after: bool) -> Optional[float]:
+        with self.lock:
+            samples = [s for shape in shapes for at, s in self.latencies.get(shape, ()) if (at > since) == after]
+        return sum(samples) / len(samples) if samples else None
+
+    def apply(self, recommendation: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a recommended index in the background and remember it for the latency report."""
+        with self.lock:
+            candidate = next((c for c in self.candidates.values() if c.id == recommendation["id"]), None)
+        entry = {
+            **recommendation,
+            "status": "building",
+            "requested_at": time.time(),
+            "shapes": sorted(candidate.shapes) if candidate else []
+        }
+        started = dict(entry)
+        with self.lock:
+            self.applied.append(entry)
+
+        def build():
+            try:
+                index = db.collection(recommendation["collection"]).add_index({
+                    "type": "persistent",
+                    "fields": recommendation["fields"],
+                    "inBackground": True,
+                    "name": f"advisor_{recommendation['id']}"
+                })
+                outcome = {"index": index, "status": "created"}
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e)}
+            outcome["created_at"] = time.time()
+            with self.lock:
+                entry.update(outcome)
+
+        threading.Thread(target=build, name=f"arango-index-build-{recommendation['id']}", daemon=True).start()
+        return started
+
+    def applied_report(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            entries = [dict(entry) for entry in self.applied]
+        report = []
+        for entry in entries:
+            item = {k: v for k, v in entry.items() if k != "shapes"}
+            if entry.get("created_at"):
+                before = self._latency_since(entry["shapes"], entry["requested_at"], after=False)
+                after = self._latency_since(entry["shapes"], entry["created_at"], after=True)
+                item["baseline_ms"] = round(before * 1000, 2) if before is not None else None
+                item["measured_ms"] = round(after * 1000, 2) if after is not None else None
+            report.append(item)
+        return report
+
+
+def duplicate_indexes(collection: str) -> List[Dict[str, Any]]:
+    """Find persistent indexes that are identical to, or a prefix of, another index of the same collection."""
+    indexes = [i for i in db.collection(collection).indexes() if i["type"] in ("persistent", "hash", "skiplist")]
+    result = []
+    for index in indexes:
+        if index.get("unique"):
+            continue
+        fields = list(index.get("fields", []))
+        for other in indexes:
+            if other is index or other.get("sparse", False) != index.get("sparse", False):
+                continue
+            other_fields = list(other.get("fields", []))
+            if other_fields[:len(fields)] == fields and (len(other_fields) > len(fields) or str(other["id"]) < str(index["id"])):
+                result.append({"collection": collection, "id": str(index["id"]), "fields": fields,
+                               "covered_by": str(other["id"]), "covered_by_fields": other_fields})
+                break
+    return result
+
+
+advisor = IndexAdvisor()
+
+if INDEX_ADVISOR_ENABLED:
+    admission.query_observers.append(advisor.observe)
+
+
+@mcp.tool()
+def arango_index_advice(collection: Optional[str] = None, limit: int = 10) -> Dict[str, Any]:
+    """Recommend indexes from the filters, sorts and traversals of the queries tools have run.
+
+    Candidates come from the explain plans of observed queries: persistent
+    indexes for filtered or sorted full scans, array indexes for IN and [*]
+    filters and vertex-centric indexes for traversal edge filters. They are
+    ranked by observed time that an index lookup would save.
+
+    Args:
+        collection: Optional collection to limit the report to
+        limit: Maximum number of recommendations
+
+    Returns:
+        Dictionary with ranked recommendations, unused and duplicate indexes,
+        and expected versus measured latency of indexes applied by the advisor
+    """
+    with advisor.lock:
+        watched = sorted(advisor.collection_queries)
+    collections = [collection] if collection else watched
+    return {
+        "enabled": INDEX_ADVISOR_ENABLED,
+        "observed_queries": advisor.observed,
+        "pending_queries": advisor.queue.qsize(),
+        "dropped_queries": advisor.dropped,
+        "last_error": advisor.last_error,
+        "recommendations": advisor.recommendations(collection, limit),
+        "unused_indexes": advisor.unused_indexes(collections),
+        "duplicate_indexes": [d for name in collections for d in duplicate_indexes(name)],
+        "applied": advisor.applied_report()
+    }
+
+
+@mcp.tool()
+def arango_apply_index_advice(recommendation_ids: Optional[List[str]] = None, top_n: int = 1) -> List[Dict[str, Any]]:
+    """Build recommended indexes in the background.
+
+    Args:
+        recommendation_ids: Ids from arango_index_advice to apply (the top_n recommendations if not specified)
+        top_n: Number of top recommendations to apply when no ids are given
+
+    Returns:
+        List of the index builds that were started; their progress and measured
+        latency appear under 'applied' in arango_index_advice
+    """
+    recommendations = advisor.recommendations(limit=len(advisor.candidates) or 1)
+    if recommendation_ids:
+        selected = [r for r in recommendations if r["id"] in recommendation_ids]
+        missing = set(recommendation_ids) - {r["id"] for r in selected}
+        if missing:
+            raise ValueError(f"Unknown or already covered recommendations: {', '.join(sorted(missing))}")
+    else:
+        selected = recommendations[:top_n]
+    return [{k: v for k, v in advisor.apply(r).items() if k != "shapes"} for r in selected]
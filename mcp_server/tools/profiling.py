@@ -0,0 +1,241 @@
+from typing import Dict, Any, List, Optional, Callable, Annotated
+from collections import deque, defaultdict
+import contextlib
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+from mcp.types import TextContent, ImageContent, EmbeddedResource
+from pydantic import Field
+from .db_connection import mcp, request_observers
+from .sections import current_profile
+from .serialization import dumps
+from . import admission
+
+# Profile one in every PROFILE_SAMPLE_EVERY tool calls (0 profiles only calls made with profile_call=True)
+PROFILE_SAMPLE_EVERY = int(os.environ.get("PROFILE_SAMPLE_EVERY", "0"))
+
+# Whether profiled calls also run under cProfile
+PROFILE_CPROFILE = os.environ.get("PROFILE_CPROFILE", "false").lower() == "true"
+
+# Number of recent call profiles kept for arango_get_profiles
+PROFILE_HISTORY = int(os.environ.get("PROFILE_HISTORY", "50"))
+
+_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+_MCP_CONTENT = (TextContent, ImageContent, EmbeddedResource)
+
+_calls = itertools.count(1)
+_ids = itertools.count(1)
+_profiles = deque(maxlen=PROFILE_HISTORY)
+_profiles_lock = threading.Lock()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class CallProfile:
+    """Wall-clock breakdown of one tool call."""
+
+    def __init__(self, tool: str, sampled: bool):
+        self.id = next(_ids)
+        self.tool = tool
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.total = 0.0
+        self.http = 0.0
+        self.http_requests = 0
+        self.db = 0.0
+        self.sections: Dict[str, float] = defaultdict(float)
+        self.queries: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+    @contextlib.contextmanager
+    def section(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] += time.perf_counter() - start
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Time inside the tool call not spent in requests or named sections; FastMCP argument
+        # validation and the MCP transport run outside the call and are not part of total_ms
+        accounted = self.http + sum(self.sections.values())
+        return {
+            "id": self.id,
+            "tool": self.tool,
+            "sampled": self.sampled,
+            "started_at": self.started_at,
+            "total_ms": _ms(self.total),
+            "http_ms": _ms(self.http),
+            "http_requests": self.http_requests,
+            "db_ms": _ms(self.db),
+            "sections_ms": {name: _ms(seconds) for name, seconds in self.sections.items()},
+            "unattributed_ms": _ms(max(0.0, self.total - accounted)),
+            "queries": self.queries,
+            "error": self.error,
+            "cprofile": self.profiler is not None
+        }
+
+
+def _on_request(method: str, url: str, seconds: float):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.http += seconds
+        profile.http_requests += 1
+
+
+def _on_query(query: str, bind_vars: Dict[str, Any], tool: Optional[str], seconds: float, cursor):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    # Streaming cursors only report the statistics of the batches fetched so far
+    stats = cursor.statistics() or {}
+    profile.db += stats.get("execution_time") or 0.0
+    profile.queries.append({
+        "query": query[:200],
+        "db_ms": _ms(stats.get("execution_time") or 0.0),
+        "first_batch_ms": _ms(seconds),
+        "scanned_full": stats.get("scanned_full"),
+        "scanned_index": stats.get("scanned_index"),
+        "filtered": stats.get("filtered")
+    })
+
+
+request_observers.append(_on_request)
+admission.query_observers.append(_on_query)
+
+
+def _serialize(result: Any) -> Any:
+    """Serialize a result the way the tool serializer would, returning it as text content.
+
+    Results that already hold MCP content are left to FastMCP.
+    """
+    if isinstance(result, list) and any(isinstance(item, _MCP_CONTENT) for item in result):
+        return result
+    if not isinstance(result, (dict, list)):
+        return result
+    return [TextContent(type="text", text=dumps(result))]
+
+
+def _run_profiled(fn: Callable, args, kwargs, sampled: bool) -> Any:
+    profile = CallProfile(fn.__name__, sampled)
+    token = current_profile.set(profile)
+    profiler = cProfile.Profile() if PROFILE_CPROFILE else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            profiler = None
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+        # Serialized here rather than by the tool serializer after the call, so it is timed once
+        with profile.section("serialization"):
+            return _serialize(result)
+    except Exception as e:
+        profile.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        profile.total = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            profile.profiler = profiler
+        current_profile.reset(token)
+        with _profiles_lock:
+            _profiles.append(profile)
+
+
+def profiled(fn: Callable) -> Callable:
+    """Wrap a tool so a call is profiled when it passes profile_call=True or is sampled.
+
+    Unprofiled calls only pay the flag and sample-counter check.
+    """
+    if fn.__module__ == __name__:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, profile_call: bool = False, **kwargs):
+        sampled = not profile_call and PROFILE_SAMPLE_EVERY > 0 and next(_calls) % PROFILE_SAMPLE_EVERY == 0
+        if not profile_call and not sampled:
+            return fn(*args, **kwargs)
+        return _run_profiled(fn, args, kwargs, sampled)
+
+    flag = Annotated[bool, Field(description="Record a timing breakdown of this call, see arango_get_profiles")]
+    signature = inspect.signature(fn)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("profile_call", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=flag)
+    ])
+    wrapper.__annotations__ = {**fn.__annotations__, "profile_call": flag}
+    return wrapper
+
+
+@mcp.tool()
+def arango_configure_profiling(sample_every: Optional[int] = None, cprofile: Optional[bool] = None) -> Dict[str, Any]:
+    """Change tool call profiling at runtime.
+
+    Args:
+        sample_every: Profile one in every sample_every tool calls (0 disables sampling)
+        cprofile: Whether profiled calls also record a cProfile dump
+
+    Returns:
+        Dictionary with the active profiling settings
+    """
+    global PROFILE_SAMPLE_EVERY, PROFILE_CPROFILE
+    if sample_every is not None:
+        if sample_every < 0:
+            raise ValueError("sample_every must not be negative")
+        PROFILE_SAMPLE_EVERY = sample_every
+    if cprofile is not None:
+        PROFILE_CPROFILE = cprofile
+    return {"sample_every": PROFILE_SAMPLE_EVERY, "cprofile": PROFILE_CPROFILE, "history": PROFILE_HISTORY}
+
+
+@mcp.tool()
+def arango_get_profiles(profile_id: Optional[int] = None, tool: Optional[str] = None, limit: int = 10,
+                        sort: str = "cumulative", cprofile_lines: int = 30) -> List[Dict[str, Any]]:
+    """Retrieve the timing breakdowns of recently profiled tool calls.
+
+    Each breakdown splits the wall-clock time into HTTP time spent on
+    requests to ArangoDB (db_ms of which the server reported as query
+    execution time), named sections such as serialization and base64, and
+    unattributed_ms, the rest of the time spent inside the tool call.
+    FastMCP argument validation and the transport are not included.
+
+    Args:
+        profile_id: Optional profile to return, including its cProfile dump if one was recorded
+        tool: Optional tool name to filter by
+        limit: Maximum number of profiles to return, newest first
+        sort: cProfile sort order ('cumulative', 'tottime' or 'calls')
+        cprofile_lines: Number of functions listed in a cProfile dump
+
+    Returns:
+        List of call profiles, newest first
+    """
+    if sort not in _SORT_KEYS:
+        raise ValueError(f"Unsupported sort '{sort}', expected one of {', '.join(_SORT_KEYS)}")
+    with _profiles_lock:
+        profiles = list(reversed(_profiles))
+
+    if profile_id is not None:
+        profile = next((p for p in profiles if p.id == profile_id), None)
+        if profile is None:
+            raise ValueError(f"Profile {profile_id} not found; only the last {PROFILE_HISTORY} are kept")
+        result = profile.to_dict()
+        if profile.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(profile.profiler, stream=stream).strip_dirs().sort_stats(sort).print_stats(cprofile_lines)
+            result["cprofile"] = stream.getvalue()
+        return [result]
+
+    return [p.to_dict() for p in profiles if tool is None or p.tool == tool][:limit]
@@ -0,0 +1,121 @@
+from typing import Dict, Any, List, Optional, Iterable
+import os
+from .serialization import dumps_bytes
+
+# Default size budget for a single tool response (0 disables the guard)
+MAX_RESPONSE_BYTES = int(os.environ.get("MAX_RESPONSE_BYTES", "1000000"))
+
+# Attributes kept by every projection so results can still be referenced
+IDENTITY_FIELDS = ["_id", "_key", "_from", "_to"]
+
+# AQL has no open-ended LIMIT, so an offset is paired with this count
+_NO_LIMIT = 2 ** 53 - 1
+
+
+def projection(var: str, bind_vars: Dict[str, Any], fields: Optional[List[str]] = None,
+               exclude_fields: Optional[List[str]] = None, nullable: bool = False) -> str:
+    """Return an AQL expression that projects var so the server never serializes dropped attributes.
+
+    Args:
+        var: The AQL expression to project, e.g. 'doc' or 'CURRENT'
+        bind_vars: Bind variables of the query, extended in place
+        fields: Attributes to keep (identity attributes are always kept)
+        exclude_fields: Attributes to drop, ignored when fields is given
+        nullable: Whether var can be null (e.g. a deleted vertex on a path), which is
+            then returned as is, since KEEP/UNSET on null raise a query warning
+
+    Returns:
+        The projected AQL expression
+    """
+    if fields:
+        bind_vars["keep_fields"] = list(dict.fromkeys(IDENTITY_FIELDS + list(fields)))
+        expr = f"KEEP({var}, @keep_fields)"
+    elif exclude_fields:
+        bind_vars["unset_fields"] = list(exclude_fields)
+        expr = f"UNSET({var}, @unset_fields)"
+    else:
+        return var
+    return f"({var} == null ? null : {expr})" if nullable else expr
+
+
+def pagination(bind_vars: Dict[str, Any], offset: int = 0, sort: Optional[str] = None) -> str:
+    """Return the SORT and LIMIT clauses of a query whose truncated responses can be continued.
+
+    A continuation repeats the query with a later offset, so every page,
+    including the first, must see the results in the same order.
+
+    Args:
+        bind_vars: Bind variables of the query, extended in place
+        offset: Number of results to skip
+        sort: AQL sort expression that orders the results deterministically
+    """
+    clauses = [f"SORT {sort}"] if sort else []
+    if offset:
+        bind_vars["page_offset"] = offset
+        bind_vars["page_count"] = _NO_LIMIT
+        clauses.append("LIMIT @page_offset, @page_count")
+    return " ".join(clauses)
+
+
+def _size(value: Any) -> int:
+    return len(dumps_bytes(value))
+
+
+def _budget(max_response_bytes: Optional[int]) -> int:
+    return MAX_RESPONSE_BYTES if max_response_bytes is None else max_response_bytes
+
+
+def collect_within_budget(cursor: Iterable[Any], max_response_bytes: Optional[int] = None,
+                          offset: int = 0) -> List[Any]:
+    """Drain a cursor until the response budget is spent.
+
+    Stops fetching further cursor batches once the budget is exceeded and
+    appends a continuation marker whose _next_offset can be passed back as
+    the offset of the same tool call. A first result that alone exceeds the
+    budget is cut down with fit_document.
+    """
+    budget = _budget(max_response_bytes)
+    results = []
+    used = 2
+    for doc in cursor:
+        size = _size(doc)
+        if budget > 0 and not results and size + 4 > budget and isinstance(doc, dict):
+            doc = fit_document(doc, budget - 4)
+            size = _size(doc)
+        used += size + 2
+        if budget > 0 and used > budget and results:
+            results.append({
+                "_truncated": True,
+                "_next_offset": offset + len(results),
+                "_max_response_bytes": budget
+            })
+            if hasattr(cursor, "close"):
+                cursor.close(ignore_missing=True)
+            break
+        results.append(doc)
+    return results
+
+
+def fit_document(doc: Optional[Dict[str, Any]], max_response_bytes: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Drop the largest attributes of a single document until it fits the budget.
+
+    The dropped attribute names are listed in _truncated_fields so they can be
+    requested explicitly through the fields option.
+    """
+    budget = _budget(max_response_bytes)
+    if doc is None or budget <= 0 or _size(doc) <= budget:
+        return doc
+
+    doc = dict(doc)
+    dropped = []
+    sizes = sorted(
+        ((_size(value), name) for name, value in doc.items() if name not in IDENTITY_FIELDS),
+        reverse=True,
+    )
+    for _, name in sizes:
+        del doc[name]
+        dropped.append(name)
+        if _size(doc) + _size(dropped) + 40 <= budget:
+            break
+    doc["_truncated_fields"] = dropped
+    return doc
@@ -0,0 +1,333 @@
+from typing import Dict, Any, List, Optional
+import datetime
+import logging
+import os
+import threading
+import time
+from .db_connection import db, mcp
+
+# Collection holding one retention policy per collection
+RETENTION_POLICY_COLLECTION = os.environ.get("RETENTION_POLICY_COLLECTION", "retention_policies")
+
+# Suffix of the archive collection created for a collection
+RETENTION_ARCHIVE_SUFFIX = os.environ.get("RETENTION_ARCHIVE_SUFFIX", "_archive")
+
+# Seconds between checks for due retention jobs (0 disables the background scheduler)
+RETENTION_CHECK_INTERVAL = float(os.environ.get("RETENTION_CHECK_INTERVAL", "60"))
+
+# Seconds policies are cached by the temporal tools
+_POLICY_CACHE_TTL = 10
+
+_MODES = ("archive", "delete")
+
+logger = logging.getLogger(__name__)
+
+
+class PolicyCache:
+    """Retention policies keyed by collection, reloaded from the database every few seconds."""
+
+    def __init__(self):
+        self.policies: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        if refresh or time.time() - self.loaded_at > _POLICY_CACHE_TTL:
+            policies = {}
+            if db.has_collection(RETENTION_POLICY_COLLECTION):
+                policies = {p["collection"]: p for p in db.collection(RETENTION_POLICY_COLLECTION).all()}
+            with self.lock:
+                self.policies = policies
+                self.loaded_at = time.time()
+        return self.policies
+
+
+policy_cache = PolicyCache()
+_running: Dict[str, threading.Thread] = {}
+_running_lock = threading.Lock()
+# Last scheduler or background run failure per collection, cleared by the next successful run
+_last_errors: Dict[str, str] = {}
+
+
+def archive_for(collection: str, timestamp: Optional[str] = None) -> Optional[str]:
+    """Return the archive collection a temporal read of collection must include, if any.
+
+    Archived documents all stopped being valid before the policy's
+    archived_before watermark, so the archive is only needed for
+    timestamps before it (or when no timestamp bounds the read).
+    """
+    policy = policy_cache.get().get(collection)
+    if not policy or policy["mode"] != "archive" or not policy.get("archived_before"):
+        return None
+    if timestamp is not None and timestamp >= policy["archived_before"]:
+        return None
+    return policy["archive_collection"]
+
+
+def archives_needed(timestamp: Optional[str] = None) -> bool:
+    """Whether any collection has archived documents a read at timestamp must include."""
+    return any(archive_for(collection, timestamp) for collection in policy_cache.get())
+
+
+def _cutoff(policy: Dict[str, Any]) -> str:
+    return (datetime.datetime.utcnow() - datetime.timedelta(days=policy["retain_days"])).isoformat()
+
+
+def run_policy(policy: Dict[str, Any]) -> Dict[str, Any]:
+    """Move documents whose validity ended before the policy cutoff into the archive, batch by batch.
+
+    Each batch is one AQL query that inserts into the archive and removes from
+    the source, so a document is never in neither collection. A run publishes
+    the current cutoff as the archived_before watermark but only moves
+    documents older than a watermark published at least one policy cache
+    lifetime ago, so temporal reads never miss a document that is being
+    archived and no run waits for caches to expire. Documents therefore
+    reach the archive one run after they pass the cutoff.
+    """
+    # The cached policy is shared with readers; only the stored copy is updated
+    policy = dict(policy)
+    cutoff = _cutoff(policy)
+    started = time.time()
+    watermarks = policy.get("watermarks")
+    if watermarks is None:
+        # Policies from before watermark history was kept have long been cached
+        watermarks = [{"before": policy["archived_before"], "at": 0}] if policy.get("archived_before") else []
+    if cutoff > (policy.get("archived_before") or ""):
+        watermarks = watermarks + [{"before": cutoff, "at": started}]
+        policy["archived_before"] = cutoff
+    ripe = [w for w in watermarks if started - w["at"] >= _POLICY_CACHE_TTL]
+    newest_ripe = max(ripe, key=lambda w: w["before"]) if ripe else None
+    policy["watermarks"] = [w for w in watermarks if w is newest_ripe or w not in ripe]
+    db.collection(RETENTION_POLICY_COLLECTION).update(
+        {"_key": policy["_key"], "archived_before": policy["archived_before"], "watermarks": policy["watermarks"]})
+    policy_cache.get(refresh=True)
+
+    if newest_ripe is None:
+        run = {"at": started, "cutoff": None, "pending_cutoff": cutoff, "moved": 0, "seconds": 0.0}
+        db.collection(RETENTION_POLICY_COLLECTION).update({"_key": policy["_key"], "last_run": run})
+        policy_cache.get(refresh=True)
+        return run
+
+    moved = 0
+    bind_vars = {
+        "@collection": policy["collection"],
+        "@archive": policy["archive_collection"],
+        "cutoff": newest_ripe["before"],
+        "batch_size": policy["batch_size"]
+    }
+    while True:
+        cursor = db.aql.execute(
+            """
+            FOR doc IN @@collection
+                FILTER doc.valid_until != null AND doc.valid_until < @cutoff
+                LIMIT @batch_size
+                INSERT doc INTO @@archive OPTIONS {overwriteMode: "replace"}
+                REMOVE doc IN @@collection
+                RETURN 1
+            """,
+            bind_vars=bind_vars,
+        )
+        batch = sum(1 for _ in cursor)
+        moved += batch
+        if batch < policy["batch_size"]:
+            break
+
+    run = {"at": started, "cutoff": newest_ripe["before"], "pending_cutoff": cutoff, "moved": moved, "seconds": round(time.time() - started, 3)}
+    db.collection(RETENTION_POLICY_COLLECTION).update({"_key": policy["_key"], "last_run": run})
+    policy_cache.get(refresh=True)
+    return run
+
+
+def _start(policy: Dict[str, Any]) -> Optional[threading.Thread]:
+    """Run a policy on a background thread unless a run for its collection is in progress."""
+    collection = policy["collection"]
+    with _running_lock:
+        if collection in _running and _running[collection].is_alive():
+            return None
+
+        def job():
+            try:
+                run_policy(policy)
+                _last_errors.pop(collection, None)
+            except Exception as e:
+                logger.exception("Retention run for %s failed", collection)
+                _last_errors[collection] = str(e)
+                try:
+                    db.collection(RETENTION_POLICY_COLLECTION).update(
+                        {"_key": policy["_key"], "last_run": {"at": time.time(), "error": str(e)}})
+                except Exception:
+                    logger.exception("Recording the failed retention run for %s failed", collection)
+
+        thread = threading.Thread(target=job, name=f"arango-retention-{collection}", daemon=True)
+        _running[collection] = thread
+        thread.start()
+        return thread
+
+
+def _scheduler():
+    while True:
+        time.sleep(RETENTION_CHECK_INTERVAL)
+        try:
+            policies = policy_cache.get(refresh=True)
+        except Exception:
+            logger.exception("Loading retention policies failed")
+            continue
+        for collection, policy in policies.items():
+            try:
+                interval = policy.get("interval_seconds") or 0
+                last = (policy.get("last_run") or {}).get("at", 0)
+                if policy["mode"] == "archive" and interval > 0 and time.time() - last >= interval:
+                    _start(policy)
+            except Exception as e:
+                logger.exception("Scheduling the retention policy of %s failed", collection)
+                _last_errors[collection] = str(e)
+
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread: Optional[threading.Thread] = None
+
+
+def start_scheduler() -> bool:
+    """Start the background thread that runs due archive policies; called once the server starts.
+
+    Returns:
+        Whether a scheduler thread was started
+    """
+    global _scheduler_thread
+    with _scheduler_lock:
+        if RETENTION_CHECK_INTERVAL <= 0 or _scheduler_thread is not None:
+            return False
+        _scheduler_thread = threading.Thread(target=_scheduler, name="arango-retention-scheduler", daemon=True)
+        _scheduler_thread.start()
+        return True
+
+
+@mcp.tool()
+def arango_set_retention_policy(collection: str, retain_days: float = 30, mode: str = "archive",
+                                interval_seconds: int = 3600, batch_size: int = 1000) -> Dict[str, Any]:
+    """Create or replace the retention policy of a collection.
+
+    Documents and edges whose valid_until lies more than retain_days in the
+    past are either moved to <collection>_archive by batched background jobs
+    (mode 'archive') or deleted by a TTL index on valid_until (mode 'delete').
+    Temporal tools read the archive only for timestamps before the archived range.
+
+    Args:
+        collection: The name of the document or edge collection
+        retain_days: Days a closed-out document stays in the collection after its valid_until
+        mode: 'archive' to move expired documents, 'delete' to let a TTL index remove them
+        interval_seconds: Seconds between background archive runs (0 runs only on request)
+        batch_size: Documents moved per archive query
+
+    Returns:
+        The stored policy
+    """
+    if mode not in _MODES:
+        raise ValueError(f"Unsupported mode '{mode}', expected one of {', '.join(_MODES)}")
+    if not db.has_collection(RETENTION_POLICY_COLLECTION):
+        db.create_collection(RETENTION_POLICY_COLLECTION)
+
+    coll = db.collection(collection)
+    policy = {
+        "_key": collection,
+        "collection": collection,
+        "mode": mode,
+        "retain_days": retain_days,
+        "interval_seconds": interval_seconds,
+        "batch_size": batch_size
+    }
+    previous = policy_cache.get(refresh=True).get(collection) or {}
+    if previous.get("ttl_index") and (mode != "delete" or previous.get("retain_days") != retain_days):
+        # A collection has at most one TTL index, and a stale one would keep deleting
+        coll.delete_index(previous["ttl_index"], ignore_missing=True)
+
+    if mode == "archive":
+        archive = f"{collection}{RETENTION_ARCHIVE_SUFFIX}"
+        if not db.has_collection(archive):
+            db.create_collection(archive, edge=coll.properties().get("edge", False))
+        db.collection(archive).add_index({"type": "persistent", "fields": ["valid_from", "valid_until"]})
+        policy["archive_collection"] = archive
+        policy["archived_before"] = previous.get("archived_before")
+        policy["watermarks"] = previous.get("watermarks")
+    else:
+        # TTL indexes expire documents expireAfter seconds after the date in valid_until
+        policy["ttl_index"] = coll.add_index({
+            "type": "ttl",
+            "fields": ["valid_until"],
+            "expireAfter": int(retain_days * 86400)
+        })["id"]
+
+    db.collection(RETENTION_POLICY_COLLECTION).insert(policy, overwrite=True)
+    policy_cache.get(refresh=True)
+    return policy
+
+
+@mcp.tool()
+def arango_run_retention(collection: Optional[str] = None, wait: bool = False) -> Dict[str, Any]:
+    """Run archive policies now instead of waiting for their interval.
+
+    Args:
+        collection: Optional collection whose policy to run (all archive policies if not specified)
+        wait: Whether to block until the runs have finished
+
+    Returns:
+        Dictionary with the collections whose runs were started and those already running
+    """
+    policies = policy_cache.get(refresh=True)
+    if collection is not None and collection not in policies:
+        raise ValueError(f"No retention policy for collection {collection}")
+    selected = [policies[collection]] if collection else list(policies.values())
+
+    started, busy = [], []
+    for policy in selected:
+        if policy["mode"] != "archive":
+            continue
+        thread = _start(policy)
+        if thread is None:
+            busy.append(policy["collection"])
+        else:
+            started.append(policy["collection"])
+            if wait:
+                thread.join()
+    return {"started": started, "already_running": busy}
+
+
+@mcp.tool()
+def arango_retention_status() -> List[Dict[str, Any]]:
+    """List retention policies with their archive watermark and last run.
+
+    Returns:
+        List of policies, each with the archived_before watermark, the last run
+        (cutoff, documents moved, duration or error), the last scheduling or run
+        error and whether a run is in progress
+    """
+    with _running_lock:
+        running = {name for name, thread in _running.items() if thread.is_alive()}
+    return [
+        {**{k: v for k, v in policy.items() if not k.startswith("_")}, "running": name in running,
+         "last_error": _last_errors.get(name)}
+        for name, policy in sorted(policy_cache.get(refresh=True).items())
+    ]
+
+
+@mcp.tool()
+def arango_delete_retention_policy(collection: str) -> Dict[str, Any]:
+    """Remove the retention policy of a collection.
+
+    The archive collection and its documents are kept, and temporal tools
+    stop reading it; a TTL index created by a 'delete' policy is dropped.
+
+    Args:
+        collection: The name of the collection
+
+    Returns:
+        The removed policy
+    """
+    policy = policy_cache.get(refresh=True).get(collection)
+    if policy is None:
+        raise ValueError(f"No retention policy for collection {collection}")
+    if policy.get("ttl_index"):
+        db.collection(collection).delete_index(policy["ttl_index"], ignore_missing=True)
+    db.collection(RETENTION_POLICY_COLLECTION).delete(policy["_key"])
+    policy_cache.get(refresh=True)
+    return policy
@@ -0,0 +1,18 @@
+from typing import Any
+from contextvars import ContextVar
+import contextlib
+
+# Profile of the tool call running in this context, set by the profiling module while a call is profiled
+current_profile: ContextVar[Any] = ContextVar("arango_call_profile", default=None)
+
+_no_section = contextlib.nullcontext()
+
+
+def section(name: str):
+    """Time the enclosed block in the current call's profile; a shared no-op when the call is not profiled.
+
+    Kept apart from the profiling module so low-level helpers such as
+    serialization can mark sections without importing it.
+    """
+    profile = current_profile.get()
+    return _no_section if profile is None else profile.section(name)
@@ -0,0 +1,86 @@
+from typing import Any
+import base64
+import gzip
+import json
+from mcp.types import EmbeddedResource, BlobResourceContents
+from .sections import section
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Encodings a client can request from the bulk read tools
+RESPONSE_ENCODINGS = ("json", "json+gzip", "msgpack", "msgpack+gzip")
+
+# Compression level trading a little ratio for much faster encoding
+GZIP_LEVEL = 5
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for values JSON has no type for."""
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode("ascii")
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize obj to a compact JSON string.
+
+    Used as the FastMCP tool serializer so large document lists skip the
+    default pretty-printed pydantic path.
+    """
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def encode_response(result: Any, encoding: str = "json") -> Any:
+    """Encode a tool result in the encoding negotiated by the client.
+
+    Plain "json" returns the result unchanged for the tool serializer. The
+    other encodings return an embedded binary resource whose blob holds the
+    encoded (and optionally gzip-compressed) payload.
+    """
+    if encoding == "json":
+        return result
+    if encoding not in RESPONSE_ENCODINGS:
+        raise ValueError(f"Unsupported encoding '{encoding}', expected one of {', '.join(RESPONSE_ENCODINGS)}")
+
+    if encoding.startswith("msgpack") and msgpack is None:
+        raise ValueError("msgpack encoding requires the 'msgpack' package")
+
+    with section("serialization"):
+        if encoding.startswith("msgpack"):
+            payload = msgpack.packb(result, default=_default, use_bin_type=True)
+            mime_type = "application/msgpack"
+        else:
+            payload = dumps_bytes(result)
+            mime_type = "application/json"
+
+        if encoding.endswith("+gzip"):
+            payload = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+            mime_type += "+gzip"
+
+        blob = base64.b64encode(payload).decode("ascii")
+
+    return EmbeddedResource(
+        type="resource",
+        resource=BlobResourceContents(
+            uri=f"arango://response/{encoding}",
+            mimeType=mime_type,
+            blob=blob,
+        ),
+    )
@@ -0,0 +1,42 @@
+from typing import Dict, Any, Optional
+from contextlib import contextmanager
+import time
+from .db_connection import connection_manager, mcp
+
+# Phase name -> seconds, in the order the phases ran
+timings: Dict[str, float] = {}
+
+# perf_counter() value when the server process started importing, set by server.py
+started_at: Optional[float] = None
+ready_at: Optional[float] = None
+
+
+@contextmanager
+def timed(phase: str):
+    """Record how long the enclosed startup phase takes."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+
+def mark_ready():
+    """Record the moment the server is about to start serving."""
+    global ready_at
+    ready_at = time.perf_counter()
+
+
+@mcp.tool()
+def arango_startup_report() -> Dict[str, Any]:
+    """Report where server startup time went.
+
+    Returns:
+        Dictionary with the duration of each startup phase in milliseconds, the total time
+        until the server was ready, and whether the database connection has been opened yet
+    """
+    return {
+        "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()},
+        "total_ms": round((ready_at - started_at) * 1000, 2) if started_at and ready_at else None,
+        "database_connected": connection_manager.metrics()["connected"]
+    }
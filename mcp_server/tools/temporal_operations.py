@@ -1,10 +1,27 @@
 from typing import Dict, Any, List, Optional
 import datetime
-from .db_connection import db, mcp
+from .db_connection import notify_document_write, mcp
+from .response_limits import projection, pagination, collect_within_budget
+from .serialization import encode_response
+from .retention import archive_for
+from .version_history import versioned_update
+from . import admission
+
+def _scan(collection: str, archive: Optional[str], condition: str) -> str:
+    """Loop over the documents of collection matching condition, including its archive if given."""
+    if archive is None:
+        return f"""FOR doc IN {collection}
+        FILTER {condition}"""
+    return f"""FOR doc IN UNION(
+            (FOR doc IN {collection} FILTER {condition} RETURN doc),
+            (FOR doc IN {archive} FILTER {condition} RETURN doc)
+        )"""
 
 @mcp.tool()
 def arango_time_series_analysis(collection: str, time_field: str = "created_at", 
-                              interval: str = "day", grouping_field: Optional[str] = None) -> List[Dict[str, Any]]:
+                              interval: str = "day", grouping_field: Optional[str] = None,
+                              max_response_bytes: Optional[int] = None,
+                              offset: int = 0) -> List[Dict[str, Any]]:
     """Perform time series analysis on documents in a collection.
     
     Args:
@@ -12,9 +29,12 @@ def arango_time_series_analysis(collection: str, time_field: str = "created_at",
         time_field: The document field containing the timestamp
         interval: Time interval for grouping ('hour', 'day', 'week', 'month', 'year')
         grouping_field: Optional field to further group results by
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of data points to skip, e.g. the _next_offset of a truncated response
         
     Returns:
-        List of time series data points grouped by the selected interval
+        List of time series data points grouped by the selected interval,
+        ending with a continuation marker if truncated
     """
     date_function = {
         "hour": "DATE_HOUR",
@@ -25,34 +45,47 @@ def arango_time_series_analysis(collection: str, time_field: str = "created_at",
     }.get(interval.lower(), "DATE_DAY")
     
     if grouping_field:
+        collect = f"COLLECT time_unit = {date_function}(doc.{time_field}), group_key = doc.{grouping_field}"
+        row = '{"time_unit": time_unit, "group_key": group_key, "count": COUNT(1)}'
+        sort = "time_unit, group_key"
+    else:
+        collect = f"COLLECT time_unit = {date_function}(doc.{time_field})"
+        row = '{"time_unit": time_unit, "count": COUNT(1)}'
+        sort = "time_unit"
+    
+    bind_vars = {}
+    archive = archive_for(collection)
+    if archive is None:
         query = f"""
         FOR doc IN {collection}
-            COLLECT time_unit = {date_function}(doc.{time_field}), 
-                    group_key = doc.{grouping_field}
-            SORT time_unit
-            RETURN {{
-                "time_unit": time_unit,
-                "group_key": group_key,
-                "count": COUNT(1)
-            }}
+            {collect}
+            {pagination(bind_vars, offset, sort=sort)}
+            RETURN {row}
         """
     else:
+        # Aggregate each collection separately and merge the (small) aggregates
         query = f"""
-        FOR doc IN {collection}
-            COLLECT time_unit = {date_function}(doc.{time_field})
-            SORT time_unit
-            RETURN {{
-                "time_unit": time_unit,
-                "count": COUNT(1)
-            }}
+        FOR row IN UNION(
+                (FOR doc IN {collection} {collect} RETURN {row}),
+                (FOR doc IN {archive} {collect} RETURN {row})
+            )
+            COLLECT time_unit = row.time_unit, group_key = row.group_key
+            AGGREGATE count = SUM(row.count)
+            {pagination(bind_vars, offset, sort=sort)}
+            RETURN {"{time_unit, group_key, count}" if grouping_field else "{time_unit, count}"}
         """
     
-    cursor = db.aql.execute(query)
-    return [doc for doc in cursor]
+    cursor = admission.execute(query, bind_vars, tool="arango_time_series_analysis")
+    return collect_within_budget(cursor, max_response_bytes, offset)
 
 @mcp.tool()
 def arango_query_by_time_range(collection: str, start_time: str, end_time: str, 
-                             field: str = "created_at") -> List[Dict[str, Any]]:
+                             field: str = "created_at",
+                             fields: Optional[List[str]] = None,
+                             exclude_fields: Optional[List[str]] = None,
+                             max_response_bytes: Optional[int] = None,
+                             offset: int = 0,
+                             response_encoding: str = "json") -> List[Dict[str, Any]]:
     """Query documents within a specific time range.
     
     Args:
@@ -60,37 +93,59 @@ def arango_query_by_time_range(collection: str, start_time: str, end_time: str,
         start_time: The start time of the range (ISO format)
         end_time: The end time of the range (ISO format)
         field: The document field containing the timestamp
+        fields: Optional attributes to return (_id and _key are always included)
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of documents to skip, e.g. the _next_offset of a truncated response
+        response_encoding: Response encoding ('json', 'json+gzip', 'msgpack' or 'msgpack+gzip');
+            binary encodings are returned as an embedded resource blob
         
     Returns:
         List of documents that fall within the specified time range
     """
+    bind_vars = {"start_time": start_time, "end_time": end_time}
+    # Archived documents all have valid_from <= valid_until < the archive watermark, so the
+    # watermark only rules the archive out for ranges over those fields
+    archive = archive_for(collection, start_time if field in ("valid_from", "valid_until") else None)
     query = f"""
-    FOR doc IN {collection}
-        FILTER doc.{field} >= @start_time AND doc.{field} <= @end_time
-        RETURN doc
+    {_scan(collection, archive, f"doc.{field} >= @start_time AND doc.{field} <= @end_time")}
+        {pagination(bind_vars, offset, sort=f"doc.{field}, doc._key")}
+        RETURN {projection("doc", bind_vars, fields, exclude_fields)}
     """
-    cursor = db.aql.execute(query, bind_vars={"start_time": start_time, "end_time": end_time})
-    return [doc for doc in cursor]
+    cursor = admission.execute(query, bind_vars, tool="arango_query_by_time_range")
+    return encode_response(collect_within_budget(cursor, max_response_bytes, offset), response_encoding)
 
 @mcp.tool()
-def arango_query_valid_at(collection: str, timestamp: str) -> List[Dict[str, Any]]:
+def arango_query_valid_at(collection: str, timestamp: str,
+                          fields: Optional[List[str]] = None,
+                          exclude_fields: Optional[List[str]] = None,
+                          max_response_bytes: Optional[int] = None,
+                          offset: int = 0,
+                          response_encoding: str = "json") -> List[Dict[str, Any]]:
     """Query documents that were valid at a specific point in time.
     
     Args:
         collection: The name of the collection to query
         timestamp: The timestamp (ISO format) for which to check validity
+        fields: Optional attributes to return (_id and _key are always included)
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+        offset: Number of documents to skip, e.g. the _next_offset of a truncated response
+        response_encoding: Response encoding ('json', 'json+gzip', 'msgpack' or 'msgpack+gzip');
+            binary encodings are returned as an embedded resource blob
         
     Returns:
         List of documents that were valid at the specified timestamp
     """
+    bind_vars = {"timestamp": timestamp}
     query = f"""
-    FOR doc IN {collection}
-        FILTER doc.valid_from <= @timestamp
-        FILTER doc.valid_until == null OR doc.valid_until >= @timestamp
-        RETURN doc
+    {_scan(collection, archive_for(collection, timestamp),
+           "doc.valid_from <= @timestamp AND (doc.valid_until == null OR doc.valid_until >= @timestamp)")}
+        {pagination(bind_vars, offset, sort="doc._key")}
+        RETURN {projection("doc", bind_vars, fields, exclude_fields)}
     """
-    cursor = db.aql.execute(query, bind_vars={"timestamp": timestamp})
-    return [doc for doc in cursor]
+    cursor = admission.execute(query, bind_vars, tool="arango_query_valid_at")
+    return encode_response(collect_within_budget(cursor, max_response_bytes, offset), response_encoding)
 
 @mcp.tool()
 def arango_set_validity_period(collection: str, document_key: str, 
@@ -107,7 +162,6 @@ def arango_set_validity_period(collection: str, document_key: str,
     Returns:
         Dictionary with the update metadata
     """
-    coll = db.collection(collection)
     update = {"updated_at": datetime.datetime.utcnow().isoformat()}
     
     if valid_from is not None:
@@ -116,5 +170,6 @@ def arango_set_validity_period(collection: str, document_key: str,
     if valid_until is not None:
         update["valid_until"] = valid_until
     
-    result = coll.update(document_key, update)
+    result = versioned_update(collection, document_key, update)
+    notify_document_write(collection, document_key, update)
     return result 
\ No newline at end of file
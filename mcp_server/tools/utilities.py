@@ -1,7 +1,7 @@
 import os
 import json
-from typing import Dict, Any, List, Optional
-from .db_connection import db, client, ARANGO_URL, ARANGO_DB, ARANGO_USERNAME, mcp
+from typing import Dict, Any, Optional
+from .db_connection import db, client, connection_manager, ARANGO_URL, ARANGO_DB, ARANGO_USERNAME, mcp
 
 @mcp.tool()
 def arango_backup(output_dir: str, collection: Optional[str] = None, doc_limit: int = 1000) -> Dict[str, Any]:
@@ -60,6 +60,11 @@ def arango_get_metadata(random_string: str) -> Dict[str, Any]:
     """
     # Get ArangoDB version information
     version_info = {"version": "Unknown", "server": "Unknown"}
+    try:
+        version_info = db.version(details=True)
+        version_info["engine"] = db.engine().get("name", "Unknown")
+    except:
+        pass
     
     # Get database info
     system_db = client.db("_system", username=ARANGO_USERNAME, password=os.environ.get("ARANGO_PASSWORD", ""))
@@ -93,10 +98,30 @@ def arango_get_metadata(random_string: str) -> Dict[str, Any]:
             "url": ARANGO_URL,
             "version": version_info.get("version", "Unknown"),
             "server": version_info.get("server", "Unknown"),
+            "license": version_info.get("license", "Unknown"),
+            "engine": version_info.get("engine", "Unknown"),
         },
         "database": db_info,
         "collections": {
             "count": len(collections),
             "items": collections
         }
-    }
\ No newline at end of file
+    }
+
+@mcp.tool()
+def arango_connection_status(check_now: bool = False) -> Dict[str, Any]:
+    """Report readiness and per-host connection metrics.
+    
+    Args:
+        check_now: Whether to probe every host immediately instead of reporting the last health check
+        
+    Returns:
+        Dictionary with the readiness probe result, resolver and pool settings, and per-host
+        health, request counts, errors and average latency
+    """
+    if check_now:
+        connection_manager.check_hosts()
+    return {
+        "readiness": connection_manager.ready(),
+        **connection_manager.metrics()
+    }
@@ -0,0 +1,554 @@
+from typing import Dict, Any, List, Optional
+import logging
+import os
+import threading
+import numpy as np
+from .db_connection import db, document_write_hooks, mcp
+from .change_feed import change_listeners, feed
+from .response_limits import projection, collect_within_budget
+from . import admission
+
+# Document attribute holding the embedding vector
+EMBEDDING_FIELD = os.environ.get("VECTOR_EMBEDDING_FIELD", "embedding")
+
+# Directory used to persist indexes between restarts (disabled when empty)
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "")
+
+# Collections with at least this many vectors get an IVF index instead of brute force
+IVF_MIN_VECTORS = int(os.environ.get("VECTOR_IVF_MIN_VECTORS", "50000"))
+
+# Number of IVF lists probed per query
+IVF_NPROBE = int(os.environ.get("VECTOR_IVF_NPROBE", "8"))
+
+# IVF centroids are retrained in the background once the index has grown by this factor since training
+IVF_RETRAIN_GROWTH = float(os.environ.get("VECTOR_IVF_RETRAIN_GROWTH", "2"))
+
+# Comma-separated collections whose indexes are loaded in the background at startup
+VECTOR_PRELOAD_COLLECTIONS = [c.strip() for c in os.environ.get("VECTOR_PRELOAD_COLLECTIONS", "").split(",") if c.strip()]
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length so that a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """In-process cosine similarity index over the embeddings of one collection.
+
+    Small collections are searched by brute force. Once the index holds
+    IVF_MIN_VECTORS vectors, build() clusters them into inverted lists and
+    queries only scan the IVF_NPROBE lists closest to the query vector.
+    tick and revision record the WAL tick and collection revision the
+    contents correspond to, so a persisted index can be caught up.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dim or 0), dtype=np.float32)
+        self._lists = np.empty(0, dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self.building = False
+        self.tick: Optional[str] = None
+        self.revision: Optional[str] = None
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.keys)]
+
+    def _check_dim(self, dim: int):
+        if self.dim is None:
+            self.dim = dim
+            self._vectors = np.empty((0, dim), dtype=np.float32)
+        elif dim != self.dim:
+            raise ValueError(f"Vector has dimension {dim}, index expects {self.dim}")
+
+    def _reserve(self, size: int):
+        """Grow the backing arrays geometrically so single inserts stay amortized O(1)."""
+        capacity = self._vectors.shape[0]
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self.keys)] = self.vectors
+        lists = np.zeros(capacity, dtype=np.int32)
+        lists[:len(self.keys)] = self._lists[:len(self.keys)]
+        self._vectors, self._lists = vectors, lists
+
+    def _assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Return the nearest centroid for every row of vectors."""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            assignments[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def add_many(self, keys: List[str], vectors: Any):
+        """Insert or replace the vectors stored for the given document keys."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(keys):
+            raise ValueError("Expected one vector per key")
+        if not keys:
+            return
+        with self.lock:
+            self._check_dim(vectors.shape[1])
+            vectors = _normalize(vectors)
+            lists = self._assign(vectors) if self.centroids is not None else None
+            self._reserve(len(self.keys) + len(keys))
+            for i, key in enumerate(keys):
+                row = self.rows.get(key)
+                if row is None:
+                    row = len(self.keys)
+                    self.keys.append(key)
+                    self.rows[key] = row
+                self._vectors[row] = vectors[i]
+                if lists is not None:
+                    self._lists[row] = lists[i]
+
+    def add(self, key: str, vector: List[float]):
+        self.add_many([key], [vector])
+
+    def remove(self, key: str):
+        """Remove a key by moving the last row into its slot."""
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is None:
+                return
+            last = len(self.keys) - 1
+            if row != last:
+                moved = self.keys[last]
+                self.keys[row] = moved
+                self.rows[moved] = row
+                self._vectors[row] = self._vectors[last]
+                self._lists[row] = self._lists[last]
+            self.keys.pop()
+
+    def needs_build(self) -> bool:
+        """Whether the index has crossed IVF_MIN_VECTORS or outgrown its centroids by IVF_RETRAIN_GROWTH."""
+        with self.lock:
+            if self.building or len(self.keys) < IVF_MIN_VECTORS:
+                return False
+            return self.centroids is None or len(self.keys) >= IVF_RETRAIN_GROWTH * self.trained_size
+
+    def build(self, iterations: int = 10, sample_size: int = 256, seed: int = 0):
+        """Cluster the stored vectors into IVF lists, or drop them for small indexes.
+
+        k-means runs on a copied sample without holding the lock, so searches
+        and writes continue while centroids are trained.
+        """
+        with self.lock:
+            n = len(self.keys)
+            if n < IVF_MIN_VECTORS:
+                self.centroids = None
+                self.trained_size = n
+                return
+            nlist = max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            sample = self.vectors[rng.choice(n, size=min(n, nlist * sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        # Spherical k-means on the sample
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        with self.lock:
+            self.centroids = centroids.astype(np.float32)
+            self._lists[:len(self.keys)] = self._assign(self.vectors)
+            self.trained_size = len(self.keys)
+
+    def search(self, query: List[float], top_k: int = 10,
+               allowed_keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Return the top_k most similar keys with their cosine similarity.
+
+        When allowed_keys is given the search is exact over those keys only,
+        which keeps pre-filtered queries precise regardless of IVF clustering.
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        with self.lock:
+            if not self.keys:
+                return []
+            if query.shape != (self.dim,):
+                raise ValueError(f"Query has dimension {query.shape[-1]}, index expects {self.dim}")
+            if allowed_keys is not None:
+                candidates = np.fromiter(
+                    (self.rows[k] for k in allowed_keys if k in self.rows), dtype=np.int64)
+            elif self.centroids is not None:
+                probe = np.argsort(-(self.centroids @ query))[:IVF_NPROBE]
+                candidates = np.flatnonzero(np.isin(self._lists[:len(self.keys)], probe))
+            else:
+                candidates = None
+
+            if candidates is None:
+                scores = self.vectors @ query
+                rows = np.arange(len(scores))
+            else:
+                if len(candidates) == 0:
+                    return []
+                scores = self._vectors[candidates] @ query
+                rows = candidates
+
+            k = min(top_k, len(scores))
+            if k <= 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [{"key": self.keys[rows[i]], "score": float(scores[i])} for i in best]
+
+    def save(self, path: str):
+        with self.lock:
+            np.savez(
+                path,
+                keys=np.array(self.keys, dtype=str),
+                vectors=self.vectors,
+                lists=self._lists[:len(self.keys)],
+                centroids=self.centroids if self.centroids is not None else np.empty((0, 0), dtype=np.float32),
+                trained_size=self.trained_size,
+                tick=np.array(self.tick or "", dtype=str),
+                revision=np.array(self.revision or "", dtype=str),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        data = np.load(path, allow_pickle=False)
+        vectors = data["vectors"]
+        index = cls(vectors.shape[1] if vectors.size else None)
+        keys = data["keys"].tolist()
+        if keys:
+            index._reserve(len(keys))
+            index.keys = keys
+            index.rows = {key: row for row, key in enumerate(keys)}
+            index._vectors[:len(keys)] = vectors
+            index._lists[:len(keys)] = data["lists"]
+        if data["centroids"].size:
+            index.centroids = data["centroids"]
+        # Indexes saved before these were stored are rebuilt, having no tick to catch up from
+        if "tick" in data.files:
+            index.trained_size = int(data["trained_size"])
+            index.tick = str(data["tick"]) or None
+            index.revision = str(data["revision"]) or None
+        return index
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+_loading_locks: Dict[str, threading.Lock] = {}
+
+
+def _index_path(collection: str) -> str:
+    return os.path.join(VECTOR_INDEX_DIR, f"{collection}.vectors.npz")
+
+
+def _position(collection: str):
+    """The current WAL tick (None where the WAL cannot be read, e.g. on a coordinator) and collection revision."""
+    try:
+        tick = db.wal.last_tick()["tick"]
+    except Exception:
+        tick = None
+    return tick, db.collection(collection).revision()
+
+
+def _checked(collection: str, key: str, vector: Any, dim: Optional[int]) -> Optional[np.ndarray]:
+    """The embedding as a float32 vector, or None (logged) when it cannot be indexed."""
+    try:
+        array = np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError):
+        array = None
+    if array is None or array.ndim != 1 or array.size == 0 or not np.isfinite(array).all():
+        logger.warning("Skipping %s/%s: %s is not a numeric vector", collection, key, EMBEDDING_FIELD)
+        return None
+    if dim is not None and array.shape[0] != dim:
+        logger.warning("Skipping %s/%s: %s has dimension %d, index expects %d",
+                       collection, key, EMBEDDING_FIELD, array.shape[0], dim)
+        return None
+    return array
+
+
+def _upsert(collection: str, index: VectorIndex, key: str, vector: Any):
+    """Index a document's embedding; one that cannot be indexed replaces its old vector with nothing."""
+    array = _checked(collection, key, vector, index.dim)
+    if array is None:
+        index.remove(key)
+    else:
+        index.add(key, array)
+
+
+def _load_from_db(collection: str, batch_size: int = 10000) -> VectorIndex:
+    """Bulk load every embedding of a collection in streamed batches, skipping invalid ones."""
+    index = VectorIndex()
+    # Taken before the scan, so catching up replays writes made during it
+    index.tick, index.revision = _position(collection)
+    cursor = db.aql.execute(
+        "FOR doc IN @@collection FILTER IS_ARRAY(doc.@field) RETURN [doc._key, doc.@field]",
+        bind_vars={"@collection": collection, "field": EMBEDDING_FIELD},
+        batch_size=batch_size,
+        stream=True,
+    )
+    keys, vectors = [], []
+    for key, vector in cursor:
+        dim = index.dim if index.dim is not None else (len(vectors[0]) if vectors else None)
+        vector = _checked(collection, key, vector, dim)
+        if vector is None:
+            continue
+        keys.append(key)
+        vectors.append(vector)
+        if len(keys) >= batch_size:
+            index.add_many(keys, vectors)
+            keys, vectors = [], []
+    index.add_many(keys, vectors)
+    index.build()
+    return index
+
+
+def _apply(index: VectorIndex, event: Dict[str, Any], document: Optional[Dict[str, Any]]):
+    if event["op"] == "remove" or document is None or document.get(EMBEDDING_FIELD) is None:
+        index.remove(event["key"])
+    else:
+        _upsert(event["collection"], index, event["key"], document[EMBEDDING_FIELD])
+
+
+def _catch_up(collection: str, index: VectorIndex) -> bool:
+    """Replay the WAL since the index's tick onto it.
+
+    Returns:
+        False when the index must be rebuilt instead: no tick was recorded,
+        the WAL no longer reaches back that far, the collection was truncated,
+        or the WAL stopped advancing while reporting more to read
+    """
+    if index.tick is None:
+        return False
+    try:
+        tick, last_scanned = index.tick, None
+        while True:
+            result = feed.fetch(tick, last_scanned)
+            if not result.get("from_present", True):
+                return False
+            for event, document in result["changes"]:
+                if event["collection"] != collection:
+                    continue
+                if event["op"] == "truncate":
+                    return False
+                _apply(index, event, document)
+            position = (tick, last_scanned)
+            if int(result.get("last_included") or 0) > 0:
+                tick = result["last_included"]
+            last_scanned = result.get("last_scanned") or last_scanned
+            if not result.get("check_more"):
+                break
+            if (tick, last_scanned) == position:
+                return False
+    except Exception:
+        return False
+    index.tick = tick
+    return True
+
+
+def _load(collection: str) -> VectorIndex:
+    """Load a persisted index if it is current or can be caught up from the WAL, else bulk load from ArangoDB."""
+    if VECTOR_INDEX_DIR and os.path.exists(_index_path(collection)):
+        index = VectorIndex.load(_index_path(collection))
+        revision = db.collection(collection).revision()
+        if index.revision is not None and index.revision == revision:
+            return index
+        if _catch_up(collection, index):
+            index.revision = revision
+            return index
+    index = _load_from_db(collection)
+    # Writes made during the scan are not in the index yet
+    _catch_up(collection, index)
+    return index
+
+
+def get_vector_index(collection: str) -> VectorIndex:
+    """Return the index for a collection, loading it from disk or ArangoDB on first use.
+
+    Loads hold a per-collection lock only, so other collections stay searchable meanwhile.
+    """
+    index = _indexes.get(collection)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        loading = _loading_locks.setdefault(collection, threading.Lock())
+    with loading:
+        index = _indexes.get(collection)
+        if index is None:
+            index = _load(collection)
+            with _indexes_lock:
+                _indexes[collection] = index
+        return index
+
+
+def preload():
+    """Load the indexes of VECTOR_PRELOAD_COLLECTIONS on a background thread, so startup does not wait for them."""
+    def load():
+        for collection in VECTOR_PRELOAD_COLLECTIONS:
+            try:
+                get_vector_index(collection)
+            except Exception:
+                logger.exception("Preloading the vector index of %s failed", collection)
+
+    if VECTOR_PRELOAD_COLLECTIONS:
+        threading.Thread(target=load, name="arango-vector-preload", daemon=True).start()
+
+
+def _maybe_build(index: VectorIndex):
+    """Train or retrain the IVF centroids on a background thread once the index has grown enough."""
+    if not index.needs_build():
+        return
+    with index.lock:
+        if index.building:
+            return
+        index.building = True
+
+    def build():
+        try:
+            index.build()
+        finally:
+            index.building = False
+
+    threading.Thread(target=build, name="arango-vector-build", daemon=True).start()
+
+
+def _sync_document(collection: str, key: str, document: Optional[Dict[str, Any]]):
+    """Keep a loaded index in sync after an insert, update or removal.
+
+    Collections whose index has not been loaded yet are skipped; they pick
+    up the change on their first bulk load. This runs after the write has
+    committed, so an embedding that cannot be indexed is logged and skipped
+    rather than failing the tool call.
+    """
+    index = _indexes.get(collection)
+    if index is None:
+        return
+    if document is None:
+        index.remove(key)
+    elif EMBEDDING_FIELD in document:
+        vector = document[EMBEDDING_FIELD]
+        if vector is None:
+            index.remove(key)
+        else:
+            _upsert(collection, index, key, vector)
+            _maybe_build(index)
+
+
+def _on_change(event: Dict[str, Any], document: Optional[Dict[str, Any]]):
+    """Apply changes seen in the WAL, including those made through other server replicas."""
+    index = _indexes.get(event["collection"])
+    if index is None:
+        return
+    if event["op"] == "truncate":
+        with _indexes_lock:
+            _indexes.pop(event["collection"], None)
+        return
+    _apply(index, event, document)
+    index.tick = event["tick"]
+    _maybe_build(index)
+
+
+document_write_hooks.append(_sync_document)
+change_listeners.append(_on_change)
+
+
+def _filtered_keys(collection: str, filters: Optional[Dict[str, Any]],
+                   valid_at: Optional[str]) -> List[str]:
+    """Resolve metadata and temporal pre-filters to the matching document keys."""
+    query_parts = ["FOR doc IN @@collection"]
+    bind_vars: Dict[str, Any] = {"@collection": collection}
+
+    for i, (field, value) in enumerate((filters or {}).items()):
+        query_parts.append(f"FILTER doc.@f{i} == @v{i}")
+        bind_vars[f"f{i}"] = field
+        bind_vars[f"v{i}"] = value
+
+    if valid_at:
+        query_parts.append("FILTER doc.valid_from <= @timestamp")
+        query_parts.append("FILTER doc.valid_until == null OR doc.valid_until >= @timestamp")
+        bind_vars["timestamp"] = valid_at
+
+    query_parts.append("RETURN doc._key")
+    cursor = admission.execute(" ".join(query_parts), bind_vars, tool="arango_vector_search")
+    return [key for key in cursor]
+
+
+@mcp.tool()
+def arango_vector_search(collection: str, query_vector: List[float], top_k: int = 10,
+                         filters: Optional[Dict[str, Any]] = None,
+                         valid_at: Optional[str] = None,
+                         fields: Optional[List[str]] = None,
+                         exclude_fields: Optional[List[str]] = None,
+                         max_response_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Find the documents whose embeddings are most similar to a query vector.
+
+    Args:
+        collection: The name of the collection to search
+        query_vector: The query embedding
+        top_k: Number of results to return
+        filters: Optional attribute/value pairs the documents must match exactly
+        valid_at: Optional timestamp (ISO format) at which the documents must be valid
+        fields: Optional attributes to return (_id and _key are always included)
+        exclude_fields: Optional attributes to leave out, ignored when fields is given
+        max_response_bytes: Optional response size budget (defaults to MAX_RESPONSE_BYTES, 0 disables it)
+
+    Returns:
+        List of matching documents, most similar first, each with a _score field
+    """
+    index = get_vector_index(collection)
+    allowed_keys = _filtered_keys(collection, filters, valid_at) if filters or valid_at else None
+    hits = index.search(query_vector, top_k, allowed_keys)
+    if not hits:
+        return []
+
+    bind_vars = {"hits": hits, "collection": collection, "field": EMBEDDING_FIELD}
+    cursor = admission.execute(
+        "FOR hit IN @hits LET raw = DOCUMENT(@collection, hit.key) FILTER raw != null "
+        f"LET doc = UNSET(raw, @field) RETURN MERGE({projection('doc', bind_vars, fields, exclude_fields)}, "
+        "{_score: hit.score})",
+        bind_vars,
+        tool="arango_vector_search",
+    )
+    return collect_within_budget(cursor, max_response_bytes)
+
+
+@mcp.tool()
+def arango_build_vector_index(collection: str, persist: bool = False) -> Dict[str, Any]:
+    """Rebuild the vector index of a collection from the embeddings stored in ArangoDB.
+
+    Args:
+        collection: The name of the collection to index
+        persist: Whether to save the index to VECTOR_INDEX_DIR for fast restarts
+
+    Returns:
+        Dictionary with the index size and type
+    """
+    index = _load_from_db(collection)
+    _catch_up(collection, index)
+    with _indexes_lock:
+        _indexes[collection] = index
+
+    path = None
+    if persist:
+        if not VECTOR_INDEX_DIR:
+            raise ValueError("VECTOR_INDEX_DIR is not configured")
+        os.makedirs(VECTOR_INDEX_DIR, exist_ok=True)
+        path = _index_path(collection)
+        index.save(path)
+
+    return {
+        "collection": collection,
+        "vectors": len(index),
+        "dimension": index.dim,
+        "index_type": "ivf" if index.centroids is not None else "brute_force",
+        "persisted_to": path
+    }
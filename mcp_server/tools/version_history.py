@@ -0,0 +1,333 @@
+from typing import Dict, Any, List, Optional, Tuple, Callable
+import copy
+import datetime
+import os
+import threading
+import time
+from .db_connection import db, mcp
+
+# Suffix of the history collection; a collection is versioned while its history collection exists
+VERSION_HISTORY_SUFFIX = os.environ.get("VERSION_HISTORY_SUFFIX", "_history")
+
+# Every Nth history entry stores the full document, the others only a delta
+VERSION_CHECKPOINT_EVERY = int(os.environ.get("VERSION_CHECKPOINT_EVERY", "10"))
+
+# Seconds the versioned/unversioned state of a collection is cached
+_STATE_CACHE_TTL = 10
+
+# Attributes that change on every write and are not part of a version
+_IGNORED_FIELDS = ("_rev",)
+
+_versioned: Dict[str, tuple] = {}
+_versioned_lock = threading.Lock()
+
+
+def history_collection(collection: str) -> str:
+    return f"{collection}{VERSION_HISTORY_SUFFIX}"
+
+
+def is_versioned(collection: str) -> bool:
+    """Whether updates of collection are recorded, cached for a few seconds."""
+    with _versioned_lock:
+        cached = _versioned.get(collection)
+    if cached is not None and time.time() - cached[1] < _STATE_CACHE_TTL:
+        return cached[0]
+    versioned = db.has_collection(history_collection(collection))
+    with _versioned_lock:
+        _versioned[collection] = (versioned, time.time())
+    return versioned
+
+
+def _valid_from(document: Dict[str, Any]) -> Optional[str]:
+    return document.get("updated_at") or document.get("created_at")
+
+
+def _delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level attributes set or removed between two versions."""
+    return {
+        "set": {k: v for k, v in new.items() if k not in _IGNORED_FIELDS and old.get(k, object()) != v},
+        "unset": [k for k in old if k not in new and k not in _IGNORED_FIELDS]
+    }
+
+
+def _snapshot(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in document.items() if k not in _IGNORED_FIELDS}
+
+
+def _last_entries(database, history: str, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """The newest history entry of each key that has one, in one query."""
+    cursor = database.aql.execute(
+        """
+        FOR key IN @keys
+            LET last = FIRST(
+                FOR h IN @@history
+                    FILTER h.doc_key == key
+                    SORT h.version DESC
+                    LIMIT 1
+                    RETURN KEEP(h, "version", "since_checkpoint", "removed")
+            )
+            FILTER last != null
+            RETURN MERGE(last, {doc_key: key})
+        """,
+        bind_vars={"@history": history, "keys": list(set(keys))},
+    )
+    return {entry.pop("doc_key"): entry for entry in cursor}
+
+
+def _append_versions(database, collection: str, writes: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+    """Number the writes after the newest recorded version of each key and insert them into the history."""
+    if not writes:
+        return
+    history = database.collection(history_collection(collection))
+    last_entries = _last_entries(database, history.name, [key for key, _, _ in writes])
+    entries = []
+
+    def append(key, version, valid_from, entry):
+        entries.append({"doc_key": key, "version": version, "valid_from": valid_from, **entry})
+        last_entries[key] = {"version": version, "since_checkpoint": entry["since_checkpoint"],
+                             "removed": entry.get("removed", False)}
+
+    for key, old, new in writes:
+        last = last_entries.get(key)
+        version = last["version"] + 1 if last else 0
+        if new is None:
+            append(key, version, datetime.datetime.utcnow().isoformat(),
+                   {"kind": "checkpoint", "document": None, "removed": True, "since_checkpoint": 0})
+        elif old is None:
+            append(key, version, _valid_from(new), {"kind": "checkpoint", "document": _snapshot(new),
+                                                    "since_checkpoint": 0})
+        else:
+            if last is None or last.get("removed"):
+                # Start a new chain with the version being replaced
+                append(key, version, _valid_from(old), {"kind": "checkpoint", "document": _snapshot(old),
+                                                        "since_checkpoint": 0})
+                last = last_entries[key]
+            if last["since_checkpoint"] + 1 >= VERSION_CHECKPOINT_EVERY:
+                entry = {"kind": "checkpoint", "document": _snapshot(new), "since_checkpoint": 0}
+            else:
+                entry = {"kind": "delta", "delta": _delta(old, new), "since_checkpoint": last["since_checkpoint"] + 1}
+            append(key, last["version"] + 1, _valid_from(new), entry)
+    history.insert_many(entries, silent=True)
+
+
+def versioned_write(collection: str, write: Callable[[Any], Tuple[Any, list]]) -> Any:
+    """Run a write to a versioned collection and record its versions in one stream transaction.
+
+    The transaction holds an exclusive lock on the history collection, so
+    writers of the same collection take turns: each reads the newest version
+    of its keys and appends the next ones with no other writer in between,
+    and the history follows the order of the document writes. A failed
+    write records nothing, and a failed history insert undoes the write.
+
+    Args:
+        collection: The name of a versioned collection
+        write: Called with the collection inside the transaction; returns
+            (result, writes) with writes as described in record_writes
+
+    Returns:
+        The result returned by write
+    """
+    txn = db.begin_transaction(write=[collection], exclusive=[history_collection(collection)])
+    try:
+        result, writes = write(txn.collection(collection))
+        _append_versions(txn, collection, writes)
+        txn.commit_transaction()
+    except Exception:
+        txn.abort_transaction()
+        raise
+    return result
+
+
+def record_writes(collection: str, writes: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+    """Append the versions written to documents of a versioned collection to its history.
+
+    Each write is (key, old, new): old is None for an insert and new is None
+    for a removal. An insert, including a re-insert after a removal, stores
+    the full document. The first recorded update of a document (and the first
+    after an unrecorded re-insert) also stores the version it replaced, so the
+    document can be read as of any time since it was created. Writes to the
+    same key are applied in order.
+    """
+    if writes:
+        versioned_write(collection, lambda coll: (None, writes))
+
+
+def versioned_insert(collection: str, document: Dict[str, Any], **options) -> Dict[str, Any]:
+    """Insert a document, recording it as a new version when the collection is versioned.
+
+    Returns:
+        The insert metadata, as returned by collection.insert
+    """
+    if not is_versioned(collection):
+        return db.collection(collection).insert(document, **options)
+
+    def write(coll):
+        result = coll.insert(document, return_new=True, **options)
+        return result, [(result["_key"], None, result.pop("new"))]
+
+    return versioned_write(collection, write)
+
+
+def versioned_update(collection: str, key: str, update: Dict[str, Any]) -> Dict[str, Any]:
+    """Update a document, recording the new version when the collection is versioned.
+
+    Returns:
+        The update metadata, as returned by collection.update
+    """
+    if not is_versioned(collection):
+        return db.collection(collection).update(key, update)
+
+    def write(coll):
+        result = coll.update(key, update, return_old=True, return_new=True)
+        return result, [(key, result.pop("old"), result.pop("new"))]
+
+    return versioned_write(collection, write)
+
+
+def versioned_delete(collection: str, key: str) -> Dict[str, Any]:
+    """Remove a document, recording a tombstone so reads after the removal find no document.
+
+    Returns:
+        The delete metadata, as returned by collection.delete
+    """
+    if not is_versioned(collection):
+        return db.collection(collection).delete(key)
+    return versioned_write(collection, lambda coll: (coll.delete(key), [(key, None, None)]))
+
+
+def _replay(entries: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Rebuild a version from history entries ordered newest first, back to a checkpoint.
+
+    Returns None when the newest checkpoint is a removal, i.e. the document
+    did not exist; a re-insert after a removal is itself a checkpoint.
+    """
+    for i, entry in enumerate(entries):
+        if entry["kind"] == "checkpoint":
+            if entry["document"] is None:
+                return None
+            document = copy.deepcopy(entry["document"])
+            for later in reversed(entries[:i]):
+                document.update(later["delta"]["set"])
+                for name in later["delta"]["unset"]:
+                    document.pop(name, None)
+            return document
+    return None
+
+
+def _entries_since_checkpoint(collection: str, key: str, timestamp: str) -> List[Dict[str, Any]]:
+    """History entries up to timestamp back to the nearest checkpoint, newest first."""
+    cursor = db.aql.execute(
+        """
+        LET checkpoint = FIRST(
+            FOR h IN @@history
+                FILTER h.doc_key == @key AND h.valid_from <= @timestamp AND h.kind == "checkpoint"
+                SORT h.valid_from DESC, h.version DESC
+                LIMIT 1
+                RETURN h
+        )
+        FOR h IN @@history
+            FILTER checkpoint != null AND h.doc_key == @key
+            FILTER h.valid_from >= checkpoint.valid_from AND h.valid_from <= @timestamp
+            FILTER h.version >= checkpoint.version
+            SORT h.valid_from DESC, h.version DESC
+            RETURN h
+        """,
+        bind_vars={"@history": history_collection(collection), "key": key, "timestamp": timestamp},
+    )
+    return list(cursor)
+
+
+@mcp.tool()
+def arango_enable_versioning(collection: str) -> Dict[str, Any]:
+    """Start recording the version history of a collection.
+
+    Inserts, updates and removals by the tools (arango_insert, arango_update,
+    arango_remove, arango_set_validity_period, edge creation, file imports
+    and the image tools) then append the new version to <collection>_history:
+    a delta of the changed attributes, or for inserts and every
+    VERSION_CHECKPOINT_EVERY versions the full document. Writes made with
+    arango_query are not recorded.
+
+    Args:
+        collection: The name of the collection
+
+    Returns:
+        Dictionary with the history collection and checkpoint interval
+    """
+    history = history_collection(collection)
+    if not db.has_collection(history):
+        db.create_collection(history)
+    db.collection(history).add_index({"type": "persistent", "fields": ["doc_key", "valid_from"]})
+    # Writers look up the newest version of a key to number the next one
+    db.collection(history).add_index({"type": "persistent", "fields": ["doc_key", "version"]})
+    with _versioned_lock:
+        _versioned[collection] = (True, time.time())
+    return {"collection": collection, "history_collection": history,
+            "checkpoint_every": VERSION_CHECKPOINT_EVERY}
+
+
+@mcp.tool()
+def arango_get_document_as_of(collection: str, key: str, timestamp: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a document as it was at a point in time.
+
+    Reads at most VERSION_CHECKPOINT_EVERY history entries with one range
+    scan of the [doc_key, valid_from] index and replays their deltas onto
+    the nearest checkpoint. Should that window hold no checkpoint, a second
+    query reads back to the nearest earlier one.
+
+    Args:
+        collection: The name of a versioned collection
+        key: The document key
+        timestamp: The point in time (ISO format)
+
+    Returns:
+        Dictionary with the document, its version number and the time that version
+        became current, or None if the document did not exist (or was removed) at that time
+    """
+    if not is_versioned(collection):
+        raise ValueError(f"Collection {collection} is not versioned; call arango_enable_versioning first")
+
+    cursor = db.aql.execute(
+        """
+        LET entries = (
+            FOR h IN @@history
+                FILTER h.doc_key == @key AND h.valid_from <= @timestamp
+                SORT h.valid_from DESC, h.version DESC
+                LIMIT @window
+                RETURN h
+        )
+        LET recorded = LENGTH(FOR h IN @@history FILTER h.doc_key == @key LIMIT 1 RETURN 1) > 0
+        RETURN {entries, recorded, current: DOCUMENT(@@collection, @key)}
+        """,
+        bind_vars={
+            "@history": history_collection(collection),
+            "@collection": collection,
+            "key": key,
+            "timestamp": timestamp,
+            "window": VERSION_CHECKPOINT_EVERY
+        },
+    )
+    result = next(iter(cursor))
+    current = result["current"]
+
+    if not result["recorded"]:
+        # Never written since versioning started: the current document is the only version
+        if current is None or (_valid_from(current) or "") > timestamp:
+            return None
+        return {"document": current, "version": 0, "version_valid_from": _valid_from(current)}
+
+    entries = result["entries"]
+    if entries and entries[0].get("removed") and current is not None:
+        # Re-inserted after the removal without a recorded insert, e.g. by arango_query
+        if entries[0]["valid_from"] < (_valid_from(current) or "") <= timestamp:
+            return {"document": current, "version": entries[0]["version"] + 1,
+                    "version_valid_from": _valid_from(current)}
+    if not entries or entries[0].get("removed"):
+        return None
+    document = _replay(entries)
+    if document is None:
+        entries = _entries_since_checkpoint(collection, key, timestamp)
+        document = _replay(entries)
+        if document is None:
+            raise ValueError(f"The history of {collection}/{key} has no checkpoint before {timestamp}")
+    return {"document": document, "version": entries[0]["version"], "version_valid_from": entries[0]["valid_from"]}